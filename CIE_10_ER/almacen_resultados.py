@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+ALMACÉN CONSOLIDADO DE RESULTADOS DE HOMOLOGACIÓN
+Una base SQLite para todas las corridas, en lugar de CSV sueltos con timestamp
+
+Estructura en disco:
+    resultados_homologacion/almacen_resultados.sqlite
+        corridas    <- una fila por corrida (script de origen, fecha, columnas originales)
+        resultados  <- una fila por enfermedad y corrida
+
+Los nombres de columna de cada script (numero_colombia, Numero_Colombia,
+similitud_nombre...) se guardan en columnas canónicas indexadas; las columnas
+sin equivalente van en `datos` (JSON). Así cada corrida se puede devolver con
+su formato original, y a la vez consultar todas con el mismo esquema:
+
+    almacen = AlmacenResultados()
+    almacen.consultar(fuente='directa', encontrado=True, codigo_cie10='Q87.8')
+
+Los filtros se resuelven en SQL (índices sobre numero_colombia, orpha_number
+y codigo_cie10), sin leer ni parsear corridas completas.
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RUTA_ALMACEN = os.path.join('resultados_homologacion', 'almacen_resultados.sqlite')
+
+# Columna canónica -> nombres usados por los distintos scripts (en minúsculas)
+ALIAS_COLUMNAS = {
+    'numero_colombia': ('numero_colombia', 'numero'),
+    'nombre_colombia': ('nombre_colombia',),
+    'encontrado': ('encontrado',),
+    'nivel_confianza': ('nivel_confianza',),
+    'orpha_number': ('orpha_number',),
+    'nombre_orphanet': ('nombre_orphanet',),
+    'codigos_cie10_orphanet': ('codigos_cie10_orphanet', 'cie10_orphanet'),
+    'similitud': ('similitud', 'similitud_nombre'),
+    'metodo': ('metodo_encontrado', 'tipo_match'),
+    'observaciones': ('observaciones_colombia', 'observaciones'),
+}
+# Columnas de las que se deriva codigo_cie10 (código Colombia con punto), en orden de preferencia
+COLUMNAS_CODIGO_COLOMBIA = ('codigo_cie10_formateado', 'cie10_colombia', 'codigo_cie10_colombia', 'codigo_cie10')
+FILTROS = ('numero_colombia', 'orpha_number', 'codigo_cie10', 'encontrado', 'nivel_confianza', 'lote')
+
+
+def formatear_cie10(codigo):
+    """Q878 -> Q87.8 (mismo formato que cargar_dataset_colombia)"""
+    if codigo is None or codigo != codigo or codigo == '':
+        return None
+    codigo = str(codigo).strip().upper()
+    if len(codigo) == 4 and codigo[0].isalpha() and codigo[1:].isdigit():
+        return f"{codigo[:3]}.{codigo[3]}"
+    return codigo
+
+
+def _valor_sql(valor):
+    """Convierte un valor de pandas/numpy a un tipo que SQLite acepta"""
+    if valor is None or (isinstance(valor, float) and valor != valor):
+        return None
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, (list, tuple, dict)):
+        return json.dumps(valor, ensure_ascii=False)
+    return valor
+
+
+def _mapear_columnas(columnas):
+    """Devuelve [(columna_original, canonica_o_None)] para un DataFrame"""
+    mapeo = []
+    usadas = set()
+    for columna in columnas:
+        nombre = str(columna).lower()
+        canonica = None
+        for candidata, alias in ALIAS_COLUMNAS.items():
+            if nombre in alias and candidata not in usadas:
+                canonica = candidata
+                usadas.add(candidata)
+                break
+        mapeo.append((columna, canonica))
+    return mapeo
+
+
+class AlmacenResultados:
+    """Almacén SQLite de resultados de homologación"""
+
+    def __init__(self, ruta=RUTA_ALMACEN):
+        self.ruta = ruta
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._conexion = sqlite3.connect(ruta)
+        self._conexion.execute('PRAGMA journal_mode=WAL')
+        self._conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS corridas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                fuente TEXT NOT NULL,
+                fecha TEXT NOT NULL,
+                archivo TEXT,
+                version_orphanet TEXT,
+                columnas TEXT
+            );
+            CREATE TABLE IF NOT EXISTS resultados (
+                corrida_id INTEGER NOT NULL REFERENCES corridas(id),
+                fila INTEGER NOT NULL,
+                lote INTEGER,
+                numero_colombia INTEGER,
+                nombre_colombia TEXT,
+                codigo_cie10 TEXT,
+                encontrado INTEGER,
+                nivel_confianza TEXT,
+                orpha_number INTEGER,
+                nombre_orphanet TEXT,
+                codigos_cie10_orphanet TEXT,
+                similitud REAL,
+                metodo TEXT,
+                observaciones TEXT,
+                datos TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_resultados_corrida ON resultados(corrida_id, lote, fila);
+            CREATE INDEX IF NOT EXISTS idx_resultados_numero ON resultados(numero_colombia);
+            CREATE INDEX IF NOT EXISTS idx_resultados_orpha ON resultados(orpha_number);
+            CREATE INDEX IF NOT EXISTS idx_resultados_cie10 ON resultados(codigo_cie10);
+        """)
+        self._conexion.commit()
+
+    def cerrar(self):
+        self._conexion.close()
+
+    def nueva_corrida(self, fuente, archivo=None, version_orphanet=None):
+        """Registra una corrida y devuelve su id"""
+        cursor = self._conexion.execute(
+            'INSERT INTO corridas (fuente, fecha, archivo, version_orphanet) VALUES (?, ?, ?, ?)',
+            (fuente, datetime.now().isoformat(timespec='seconds'), archivo, version_orphanet))
+        self._conexion.commit()
+        return cursor.lastrowid
+
+    def agregar(self, corrida_id, df, lote=None):
+        """Agrega las filas de un DataFrame (con las columnas de cualquier script) a una corrida"""
+        mapeo = _mapear_columnas(df.columns)
+        tipos = {str(c): str(t) for c, t in df.dtypes.items()}
+
+        # La primera vez se guarda el formato original de la corrida
+        fila_corrida = self._conexion.execute('SELECT columnas FROM corridas WHERE id = ?', (corrida_id,)).fetchone()
+        if fila_corrida is None:
+            raise ValueError(f"No existe la corrida {corrida_id}")
+        if fila_corrida[0] is None:
+            columnas = [[str(c), canonica, tipos[str(c)]] for c, canonica in mapeo]
+            self._conexion.execute('UPDATE corridas SET columnas = ? WHERE id = ?',
+                                   (json.dumps(columnas, ensure_ascii=False), corrida_id))
+
+        por_nombre = {str(c).lower(): c for c in df.columns}
+        codigo_origen = next((por_nombre[n] for n in COLUMNAS_CODIGO_COLOMBIA if n in por_nombre), None)
+        inicio = self._conexion.execute('SELECT COALESCE(MAX(fila) + 1, 0) FROM resultados WHERE corrida_id = ?',
+                                        (corrida_id,)).fetchone()[0]
+
+        filas = []
+        for posicion, registro in enumerate(df.to_dict('records')):
+            canonicos = dict.fromkeys(ALIAS_COLUMNAS)
+            datos = {}
+            for columna, canonica in mapeo:
+                valor = _valor_sql(registro[columna])
+                if canonica:
+                    canonicos[canonica] = valor
+                else:
+                    datos[str(columna)] = valor
+            codigo = formatear_cie10(registro[codigo_origen]) if codigo_origen is not None else None
+            filas.append((corrida_id, inicio + posicion, lote, canonicos['numero_colombia'],
+                          canonicos['nombre_colombia'], codigo, canonicos['encontrado'],
+                          canonicos['nivel_confianza'], canonicos['orpha_number'], canonicos['nombre_orphanet'],
+                          canonicos['codigos_cie10_orphanet'], canonicos['similitud'], canonicos['metodo'],
+                          canonicos['observaciones'], json.dumps(datos, ensure_ascii=False)))
+
+        self._conexion.executemany('INSERT INTO resultados VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', filas)
+        self._conexion.commit()
+        return len(filas)
+
+    def reemplazar_lote(self, corrida_id, df, lote):
+        """Sustituye las filas de un lote de la corrida (lotes reprocesados o reconstruidos)"""
+        self._conexion.execute('DELETE FROM resultados WHERE corrida_id = ? AND lote = ?', (corrida_id, lote))
+        return self.agregar(corrida_id, df, lote=lote)
+
+    def guardar_corrida(self, fuente, df, archivo=None, version_orphanet=None):
+        """Atajo: crea una corrida con todas las filas del DataFrame"""
+        corrida_id = self.nueva_corrida(fuente, archivo, version_orphanet)
+        self.agregar(corrida_id, df)
+        return corrida_id
+
+    def ultima_corrida(self, fuente):
+        fila = self._conexion.execute('SELECT MAX(id) FROM corridas WHERE fuente = ?', (fuente,)).fetchone()
+        return fila[0]
+
+    def corridas(self):
+        return pd.read_sql_query("""
+            SELECT c.id, c.fuente, c.fecha, c.archivo, c.version_orphanet, COUNT(r.fila) AS registros
+            FROM corridas c LEFT JOIN resultados r ON r.corrida_id = c.id
+            GROUP BY c.id ORDER BY c.id
+        """, self._conexion)
+
+    def _where(self, corrida_id=None, fuente=None, **filtros):
+        """Condiciones SQL y parámetros para los filtros dados"""
+        condiciones, parametros = [], []
+        if corrida_id is not None:
+            condiciones.append('r.corrida_id = ?')
+            parametros.append(corrida_id)
+        if fuente is not None:
+            condiciones.append('c.fuente = ?')
+            parametros.append(fuente)
+        for campo, valor in filtros.items():
+            if campo not in FILTROS:
+                raise ValueError(f"Filtro no soportado: {campo}")
+            if valor is None:
+                continue
+            if campo == 'codigo_cie10':
+                valor = [formatear_cie10(v) for v in valor] if isinstance(valor, (list, tuple, set)) else formatear_cie10(valor)
+            if isinstance(valor, (list, tuple, set)):
+                condiciones.append(f"r.{campo} IN ({', '.join('?' * len(valor))})")
+                parametros.extend(_valor_sql(v) for v in valor)
+            else:
+                condiciones.append(f'r.{campo} = ?')
+                parametros.append(_valor_sql(valor))
+        return (' WHERE ' + ' AND '.join(condiciones)) if condiciones else '', parametros
+
+    def _resolver_corrida(self, fuente, corrida):
+        """'ultima' -> id de la última corrida de la fuente; None = todas"""
+        if corrida != 'ultima':
+            return corrida
+        if fuente is None:
+            raise ValueError("corrida='ultima' requiere indicar la fuente")
+        return self.ultima_corrida(fuente)
+
+    def contar(self, fuente=None, corrida='ultima', **filtros):
+        """Número de filas que cumplen los filtros, sin traerlas"""
+        corrida_id = self._resolver_corrida(fuente, corrida)
+        if corrida == 'ultima' and corrida_id is None:
+            return 0
+        where, parametros = self._where(corrida_id, fuente, **filtros)
+        return self._conexion.execute(
+            f'SELECT COUNT(*) FROM resultados r JOIN corridas c ON c.id = r.corrida_id {where}', parametros
+        ).fetchone()[0]
+
+    def consultar(self, fuente=None, corrida='ultima', **filtros):
+        """
+        Consulta con el esquema canónico. corrida='ultima' usa la última corrida de
+        la fuente; None consulta todas (útil para comparar corridas históricas).
+        Filtros: numero_colombia, orpha_number, codigo_cie10, encontrado,
+        nivel_confianza, lote (valor único o lista).
+        """
+        corrida_id = self._resolver_corrida(fuente, corrida)
+        if corrida == 'ultima' and corrida_id is None:
+            return pd.DataFrame()
+
+        where, parametros = self._where(corrida_id, fuente, **filtros)
+        df = pd.read_sql_query(f"""
+            SELECT r.*, c.fuente, c.fecha FROM resultados r JOIN corridas c ON c.id = r.corrida_id
+            {where} ORDER BY r.corrida_id, r.lote, r.fila
+        """, self._conexion, params=parametros)
+        if 'encontrado' in df:
+            df['encontrado'] = df['encontrado'].map({1: True, 0: False})
+        return df
+
+    def corrida_para(self, fuente, archivo_respaldo=None):
+        """
+        Id de la corrida de la fuente que corresponde a archivo_respaldo: la última
+        registrada con ese archivo (se compara el nombre, sin carpeta) o, si no hay
+        ninguna y el archivo existe, una nueva importada de él. Sin archivo, o si
+        no existe, la última corrida de la fuente (None si no tiene ninguna).
+        """
+        if archivo_respaldo:
+            nombre = os.path.basename(archivo_respaldo)
+            for corrida_id, archivo in self._conexion.execute(
+                    'SELECT id, archivo FROM corridas WHERE fuente = ? ORDER BY id DESC', (fuente,)):
+                if archivo and os.path.basename(archivo) == nombre:
+                    return corrida_id
+            if os.path.exists(archivo_respaldo):
+                return self.importar_csv(archivo_respaldo, fuente)
+            print(f"⚠️  {archivo_respaldo} no existe ni está en el almacén; se usa la última corrida '{fuente}'")
+        return self.ultima_corrida(fuente)
+
+    def cargar_corrida(self, fuente, archivo_respaldo=None, **filtros):
+        """
+        Devuelve la corrida de la fuente con sus columnas y tipos originales (como
+        si se leyera el CSV): la de archivo_respaldo si se da (importándolo si aún
+        no está en el almacén), si no la última. Informa qué corrida y archivo se usan.
+        """
+        corrida_id = self.corrida_para(fuente, archivo_respaldo)
+        if corrida_id is None:
+            return None
+
+        fecha, archivo, columnas = self._conexion.execute(
+            'SELECT fecha, archivo, columnas FROM corridas WHERE id = ?', (corrida_id,)).fetchone()
+        print(f"📂 Corrida {corrida_id} ({fuente}, {fecha}): {archivo or 'sin archivo'}")
+        columnas = json.loads(columnas or '[]')
+        df = self.consultar(corrida=corrida_id, **filtros)
+
+        datos = pd.DataFrame([json.loads(d) for d in df['datos']], index=df.index) if len(df) else pd.DataFrame()
+        salida = pd.DataFrame(index=df.index)
+        for original, canonica, tipo in columnas:
+            serie = df[canonica] if canonica else datos.get(original, pd.Series(None, index=df.index, dtype=object))
+            serie = serie.where(serie.notna(), np.nan)
+            try:
+                serie = serie.astype(tipo)
+            except (ValueError, TypeError):
+                pass
+            salida[original] = serie
+        return salida.reset_index(drop=True)
+
+    def importar_csv(self, archivo, fuente):
+        """Importa un CSV de resultados existente como una corrida nueva"""
+        df = pd.read_csv(archivo, encoding='utf-8-sig')
+        corrida_id = self.guardar_corrida(fuente, df, archivo=os.path.basename(archivo))
+        print(f"📥 {archivo} importado como corrida {corrida_id} ({fuente}, {len(df)} registros)")
+        return corrida_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén consolidado de resultados de homologación")
+    parser.add_argument("--importar", nargs='+', metavar="CSV", help="CSV de resultados a importar")
+    parser.add_argument("--fuente", default="importado", help="Fuente con la que se registran los CSV importados")
+    args = parser.parse_args()
+
+    almacen = AlmacenResultados()
+    for archivo in args.importar or []:
+        almacen.importar_csv(archivo, args.fuente)
+
+    print(f"💾 {almacen.ruta}")
+    print(almacen.corridas().to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,20 +4,22 @@ Análisis de enfermedades únicas y grupos en la homologación Orphanet-Colombia
 Genera estadísticas y visualizaciones de los datos homologados
 """
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import Counter
 import re
 
+from almacen_resultados import AlmacenResultados
+
 def cargar_y_analizar_datos(archivo_csv):
     """
-    Carga el archivo CSV y realiza análisis de enfermedades únicas
+    Carga la corrida 'final_con_orpha' de archivo_csv desde el almacén de
+    resultados (la primera vez la importa) y realiza análisis de enfermedades únicas
     """
     print(f"🔄 Cargando archivo: {archivo_csv}")
     
     try:
-        df = pd.read_csv(archivo_csv)
+        df = AlmacenResultados().cargar_corrida('final_con_orpha', archivo_respaldo=archivo_csv)
         print(f"📊 Total de registros: {len(df)}")
         
         # Información básica
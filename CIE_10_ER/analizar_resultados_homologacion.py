@@ -5,12 +5,13 @@ ANÁLISIS DE RESULTADOS - HOMOLOGACIÓN COLOMBIA ↔ ORPHANET
 Analiza los resultados del mapeo y genera reportes detallados
 """
 
-import pandas as pd
 import numpy as np
 from datetime import datetime
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from almacen_resultados import AlmacenResultados
+
 def analizar_resultados_homologacion():
     """
     Analiza los resultados de la homologación
@@ -23,7 +24,8 @@ def analizar_resultados_homologacion():
     archivo_resultados = "homologacion_orphanet_escalable_20250701_215557.csv"
     
     try:
-        df = pd.read_csv(archivo_resultados, encoding='utf-8')
+        # Corrida 'escalable' del CSV en el almacén; la primera vez se importa
+        df = AlmacenResultados().cargar_corrida('escalable', archivo_respaldo=archivo_resultados)
         print(f"✅ Archivo cargado: {len(df)} registros")
     except Exception as e:
         print(f"❌ Error cargando archivo: {e}")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DEL MÉTODO ALTERNATIVO DE extraer_cie10.py
+Compara el recorrido único por línea (alternativos_y_codigos) con la
+implementación anterior (buscar_patrones_cie10 sobre el texto y sobre cada
+línea, y linea.split(codigo) por cada código)
+
+Corpus:
+    texto_extraido.txt (por defecto) o el archivo de texto indicado
+
+Antes de medir verifica que ambas versiones encuentran los mismos códigos y las
+mismas enfermedades (nombre y código); si difieren termina con código 1. El
+orden dentro de una línea con varios códigos no se compara: la versión
+anterior lo tomaba de un set.
+"""
+
+import os
+import time
+import argparse
+import sys
+from collections import Counter
+
+from extraer_cie10 import ExtractorCIE10
+
+
+def verificar(extractor, texto):
+    """Lista de descripciones de las diferencias entre las dos implementaciones"""
+    enfermedades, codigos = extractor.alternativos_y_codigos(texto)
+    enfermedades_ref, codigos_ref = extractor.alternativos_y_codigos_split(texto)
+
+    diferencias = []
+    if set(codigos) != set(codigos_ref) or len(codigos) != len(codigos_ref):
+        diferencias.append(f"códigos: {len(codigos)} vs {len(codigos_ref)} de referencia")
+    pares = Counter((e['nombre'], e['codigo_cie10']) for e in enfermedades)
+    pares_ref = Counter((e['nombre'], e['codigo_cie10']) for e in enfermedades_ref)
+    for (nombre, codigo), cantidad in (pares - pares_ref).items():
+        diferencias.append(f"solo en la actual ({cantidad}): {codigo} {nombre}")
+    for (nombre, codigo), cantidad in (pares_ref - pares).items():
+        diferencias.append(f"solo en la anterior ({cantidad}): {codigo} {nombre}")
+    return diferencias
+
+
+def medir(funcion, texto, repeticiones):
+    """Mejor tiempo (ms) de `repeticiones` pasadas sobre el texto"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(texto)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del método alternativo de extracción de códigos CIE-10")
+    parser.add_argument("--texto", default="texto_extraido.txt", help="Texto extraído del PDF (default: texto_extraido.txt)")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Pasadas sobre el texto (default: 5)")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.texto):
+        print(f"❌ No se encuentra el archivo {args.texto}")
+        sys.exit(1)
+
+    with open(args.texto, 'r', encoding='utf-8') as f:
+        texto = f.read()
+
+    extractor = ExtractorCIE10(args.texto)
+    print(f"📄 Texto: {texto.count(chr(10)) + 1} líneas ({len(texto) / 1024:.0f} K caracteres) desde {args.texto}")
+
+    diferencias = verificar(extractor, texto)
+    if diferencias:
+        print(f"❌ {len(diferencias)} diferencias entre las dos implementaciones:")
+        for diferencia in diferencias[:10]:
+            print(f"   • {diferencia}")
+        sys.exit(1)
+    enfermedades, codigos = extractor.alternativos_y_codigos(texto)
+    print(f"✅ Resultados idénticos: {len(enfermedades)} enfermedades, {len(codigos)} códigos distintos")
+
+    anterior = medir(extractor.alternativos_y_codigos_split, texto, args.repeticiones)
+    actual = medir(extractor.alternativos_y_codigos, texto, args.repeticiones)
+    print(f"⏱️  Anterior (findall + split por código): {anterior:8.2f} ms")
+    print(f"⏱️  Actual (un recorrido por línea):       {actual:8.2f} ms")
+    print(f"🚀 Aceleración: {anterior / actual:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DE EXTRACCIÓN DE PÁGINAS DE DETALLE DE ORPHANET
+Compara extraer_detalle() con la implementación anterior (varios re.findall)
+y con el parser DOM de parser_orphanet (selectolax / lxml, si están instalados)
+
+Corpus:
+    --corpus DIR   archivos *.html guardados de disease/detail/{orpha}
+    (por defecto)  páginas de detalle guardadas en la caché HTTP
+
+Antes de medir verifica que ambas versiones devuelven el mismo nombre y los
+mismos códigos para cada página; si alguna difiere termina con código 1. El
+parser DOM extrae a propósito menos códigos (solo el bloque ICD-10/CIE-10): se
+informa cuántos de los códigos de los patrones descarta.
+"""
+
+import os
+import glob
+import sqlite3
+import zlib
+import time
+import argparse
+import sys
+
+from cache_http import RUTA_CACHE_HTTP
+from extraccion_orphanet import extraer_detalle, extraer_detalle_regex
+import parser_orphanet
+
+
+def cargar_corpus_directorio(directorio):
+    paginas = {}
+    for archivo in sorted(glob.glob(os.path.join(directorio, '*.html'))):
+        with open(archivo, 'r', encoding='utf-8', errors='replace') as f:
+            paginas[os.path.basename(archivo)] = f.read()
+    return paginas
+
+
+def cargar_corpus_cache(ruta=RUTA_CACHE_HTTP):
+    if not os.path.exists(ruta):
+        return {}
+    conexion = sqlite3.connect(ruta)
+    filas = conexion.execute(
+        "SELECT clave, codificacion, cuerpo FROM respuestas WHERE clave LIKE '%disease/detail/%' AND estado = 200")
+    paginas = {clave: zlib.decompress(cuerpo).decode(codificacion or 'utf-8', errors='replace')
+               for clave, codificacion, cuerpo in filas}
+    conexion.close()
+    return paginas
+
+
+def verificar(paginas):
+    """Lista de páginas donde las dos implementaciones no coinciden"""
+    diferencias = []
+    for clave, html in paginas.items():
+        nombre, codigos = extraer_detalle(html)
+        nombre_ref, codigos_ref = extraer_detalle_regex(html)
+        if nombre != nombre_ref or set(codigos) != set(codigos_ref):
+            diferencias.append(clave)
+    return diferencias
+
+
+def medir(funcion, paginas, repeticiones):
+    """Mejor tiempo por página (µs) de `repeticiones` pasadas sobre el corpus"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for html in paginas:
+            funcion(html)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(paginas) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extracción de páginas de detalle de Orphanet")
+    parser.add_argument("--corpus", help="Directorio con páginas *.html (por defecto: caché HTTP)")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Pasadas sobre el corpus (default: 5)")
+
+    args = parser.parse_args()
+
+    if args.corpus:
+        paginas = cargar_corpus_directorio(args.corpus)
+        origen = args.corpus
+    else:
+        paginas = cargar_corpus_cache()
+        origen = RUTA_CACHE_HTTP
+
+    if not paginas:
+        print(f"❌ No hay páginas de detalle en {origen}")
+        sys.exit(1)
+
+    tamano = sum(len(html) for html in paginas.values())
+    print(f"📄 Corpus: {len(paginas)} páginas ({tamano / 1024:.0f} KB) desde {origen}")
+
+    diferencias = verificar(paginas)
+    if diferencias:
+        print(f"❌ {len(diferencias)} páginas con resultados distintos:")
+        for clave in diferencias[:10]:
+            print(f"   • {clave}")
+        sys.exit(1)
+    print("✅ Resultados idénticos en todas las páginas")
+
+    htmls = list(paginas.values())
+    anterior = medir(extraer_detalle_regex, htmls, args.repeticiones)
+    actual = medir(extraer_detalle, htmls, args.repeticiones)
+    print(f"⏱️  Anterior (varios recorridos): {anterior:8.1f} µs/página")
+    print(f"⏱️  Actual (precompilado):        {actual:8.1f} µs/página")
+    print(f"🚀 Aceleración: {anterior / actual:.2f}x")
+
+    motores = [motor for motor, disponible in (('selectolax', parser_orphanet.LexborHTMLParser is not None),
+                                               ('lxml', parser_orphanet.lxml is not None)) if disponible]
+    if not motores:
+        print("⚠️ Sin selectolax ni lxml: se omite el parser DOM")
+    for motor in motores:
+        def extraer(html, motor=motor):
+            return parser_orphanet.extraer_detalle_dom(html, motor)
+        tiempo = medir(extraer, htmls, args.repeticiones)
+        codigos_patrones = codigos_dom = 0
+        for html in htmls:
+            codigos_patrones += len(extraer_detalle(html)[1])
+            codigos_dom += len(extraer(html)[1])
+        print(f"⏱️  DOM ({motor}):{' ' * (19 - len(motor))}{tiempo:8.1f} µs/página "
+              f"({anterior / tiempo:.2f}x) | códigos: {codigos_dom} de {codigos_patrones} "
+              f"({codigos_patrones - codigos_dom} descartados fuera del bloque ICD-10)")
+
+
+if __name__ == "__main__":
+    main()
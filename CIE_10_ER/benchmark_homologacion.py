@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DE EXTREMO A EXTREMO DE LA HOMOLOGACIÓN
+Tiempos, memoria y matches por etapa con entradas fijas, y detección de regresiones
+
+Etapas (cada una en un proceso aparte, para medir su pico de memoria):
+    pdf       ExtractorCIE10.procesar() sobre la Resolución 023 de 2023
+    indice    lectura del XML de Orphanet + construcción del índice de nombres
+    directa   homologar_enfermedades() del listado de Colombia contra el índice
+    orpha     encontrar_orpha_number() (completar_numeros_orpha.py)
+    masiva    HomologadorMasivo.procesar_lote() contra servidor_replay.py
+
+Entradas fijas:
+    - enfermedades_raras_colombia_2023_corregido.csv (en el repositorio)
+    - XML de Orphanet: --xml RUTA (p. ej. un product1 descargado y guardado) o,
+      por defecto, un XML generado a partir del listado con una semilla fija
+      (nombres con y sin tildes, con erratas, reordenados, ausentes y
+      enfermedades de relleno)
+    - HTTP: sitio sintético de servidor_replay.py o --corpus DIR grabado
+
+Cada corrida se guarda en resultados_benchmark/benchmark_<fecha>.json con el
+hash de las entradas. Si existe una línea base con las mismas entradas
+(--baseline, por defecto resultados_benchmark/baseline.json), se compara y el
+script termina con código 1 si alguna métrica empeora más del umbral:
+tiempo y memoria (más es peor), matches/s (menos es peor) y matches (cualquier
+pérdida es una regresión).
+
+Los tiempos dependen de la máquina, así que resultados_benchmark/ (línea base
+incluida) es local y está en .gitignore; el directorio es relativo a la carpeta
+desde la que se ejecuta el script.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import hashlib
+import tempfile
+import argparse
+import platform
+import resource
+import subprocess
+import contextlib
+import unicodedata
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+import pandas as pd
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+CSV_COLOMBIA = os.path.join(DIRECTORIO, 'enfermedades_raras_colombia_2023_corregido.csv')
+PDF_RESOLUCION = os.path.join(DIRECTORIO, 'Resolución No. 023 de 2023.pdf')
+CARPETA_RESULTADOS = 'resultados_benchmark'
+RUTA_BASELINE = os.path.join(CARPETA_RESULTADOS, 'baseline.json')
+
+ETAPAS = ('pdf', 'indice', 'directa', 'orpha', 'masiva')
+SEMILLA_FIXTURE = 2023
+UMBRAL_REGRESION = 0.15           # Fracción de empeoramiento tolerada
+TAMANO_LOTE_MASIVA = 30
+LIMITE_ORPHA = 300                # Nombres para encontrar_orpha_number (fuzzy sobre todo el diccionario)
+
+# Métrica -> sentido en que es mejor
+METRICAS_SEGUIDAS = {
+    'tiempo_s': 'menor',
+    'rss_max_mb': 'menor',
+    'matches_por_s': 'mayor',
+    'matches': 'mayor',
+}
+
+
+def sha256_archivo(ruta):
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def _sin_tildes(texto):
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+def _variante(nombre, azar):
+    """Nombre como lo publicaría Orphanet: igual, sin tildes, con errata, reordenado o ausente (None)"""
+    sorteo = azar.random()
+    if sorteo < 0.40:
+        return nombre
+    if sorteo < 0.60:
+        return _sin_tildes(nombre)
+    if sorteo < 0.75:
+        palabras = nombre.split()
+        largas = [i for i, p in enumerate(palabras) if len(p) > 5]
+        if largas:
+            i = azar.choice(largas)
+            j = azar.randrange(len(palabras[i]))
+            palabras[i] = palabras[i][:j] + palabras[i][j + 1:]
+        return ' '.join(palabras).lower()
+    if sorteo < 0.85:
+        palabras = nombre.split()
+        corte = max(1, len(palabras) // 2)
+        return ' '.join(palabras[corte:] + palabras[:corte])
+    return None
+
+
+def generar_xml_fixture(ruta, archivo_csv=CSV_COLOMBIA, semilla=SEMILLA_FIXTURE):
+    """
+    XML con la estructura de product1 (JDBOR/DisorderList/Disorder) generado a
+    partir del listado de Colombia. Los números ORPHA coinciden con los del
+    sitio sintético de servidor_replay.py.
+    """
+    from servidor_replay import ORPHA_BASE_SINTETICO
+
+    azar = random.Random(semilla)
+    df = pd.read_csv(archivo_csv, encoding='utf-8')
+    raiz = ET.Element('JDBOR', date='fixture', version=f'semilla-{semilla}')
+    lista = ET.SubElement(raiz, 'DisorderList')
+
+    def agregar(orpha, nombre, sinonimos, codigo):
+        disorder = ET.SubElement(lista, 'Disorder')
+        ET.SubElement(disorder, 'OrphaCode').text = str(orpha)
+        ET.SubElement(disorder, 'Name', lang='es').text = nombre
+        if sinonimos:
+            lista_sinonimos = ET.SubElement(disorder, 'SynonymList', count=str(len(sinonimos)))
+            for sinonimo in sinonimos:
+                ET.SubElement(lista_sinonimos, 'Synonym', lang='es').text = sinonimo
+        if codigo:
+            referencias = ET.SubElement(disorder, 'ExternalReferenceList', count='1')
+            referencia = ET.SubElement(referencias, 'ExternalReference')
+            ET.SubElement(referencia, 'Source').text = 'ICD-10'
+            ET.SubElement(referencia, 'Reference').text = codigo
+
+    vocabulario = set()
+    for _, fila in df.iterrows():
+        nombre = str(fila['Nombre_Enfermedad'])
+        vocabulario.update(p for p in nombre.split() if len(p) > 3)
+        variante = _variante(nombre, azar)
+        if variante is None:
+            continue
+        codigo = str(fila['Código_CIE10'])
+        codigo = f"{codigo[:3]}.{codigo[3:]}" if len(codigo) > 3 else codigo
+        sinonimos = [_sin_tildes(nombre).upper()] if azar.random() < 0.3 else []
+        agregar(ORPHA_BASE_SINTETICO + int(fila['Número']), variante, sinonimos, codigo)
+
+    # Enfermedades de relleno (Orphanet tiene bastantes más que el listado)
+    vocabulario = sorted(vocabulario)
+    for i in range(len(df)):
+        nombre = ' '.join(azar.sample(vocabulario, azar.randint(2, 5)))
+        agregar(900000 + i, nombre, [], None)
+
+    ET.ElementTree(raiz).write(ruta, encoding='utf-8', xml_declaration=True)
+    return ruta
+
+
+def _rss_max_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+# --- Etapas (se ejecutan en el proceso hijo, dentro del directorio de trabajo) ---
+
+def etapa_pdf(args):
+    from extraer_cie10 import ExtractorCIE10
+
+    # Sin la caché por página: se mide la extracción completa en cada corrida
+    extractor = ExtractorCIE10(args.pdf, usar_cache=False)
+    inicio = time.perf_counter()
+    exito = extractor.procesar()
+    tiempo = time.perf_counter() - inicio
+    if not exito:
+        raise RuntimeError("ExtractorCIE10.procesar() no generó el CSV")
+    return {'tiempo_s': tiempo, 'elementos': extractor.reporte['total_enfermedades'],
+            'matches': extractor.reporte['con_codigo_cie10']}
+
+
+def etapa_indice(args):
+    from orphanet_xml import iterar_disorders
+    from indice_orphanet import construir_indice
+
+    inicio = time.perf_counter()
+    registros = list(iterar_disorders(args.xml))
+    leido = time.perf_counter()
+    total = construir_indice(registros, args.ruta_indice)
+    fin = time.perf_counter()
+    return {'tiempo_s': fin - inicio, 'elementos': len(registros), 'nombres_indice': total,
+            'subetapas': {'leer_xml_s': leido - inicio, 'construir_indice_s': fin - leido}}
+
+
+def etapa_directa(args):
+    from indice_orphanet import IndiceOrphanet
+    from homologacion_directa_orphanet import cargar_dataset_colombia, homologar_enfermedades
+
+    inicio = time.perf_counter()
+    indice = IndiceOrphanet(args.ruta_indice)
+    df_colombia = cargar_dataset_colombia(args.csv)
+    cargado = time.perf_counter()
+    df_resultados = homologar_enfermedades(df_colombia, indice)
+    fin = time.perf_counter()
+    return {'tiempo_s': fin - inicio, 'elementos': len(df_colombia),
+            'matches': int(df_resultados['encontrado'].sum()),
+            'subetapas': {'cargar_s': cargado - inicio, 'homologar_s': fin - cargado}}
+
+
+def etapa_orpha(args):
+    from indice_orphanet import IndiceOrphanet
+    from completar_numeros_orpha import encontrar_orpha_number
+
+    inicio = time.perf_counter()
+    diccionario = IndiceOrphanet(args.ruta_indice).diccionario_orpha()
+    nombres = pd.read_csv(args.csv, encoding='utf-8')['Nombre_Enfermedad'].head(args.limite_orpha).tolist()
+    cargado = time.perf_counter()
+    matches = sum(1 for nombre in nombres if encontrar_orpha_number(nombre, diccionario))
+    fin = time.perf_counter()
+    return {'tiempo_s': fin - inicio, 'elementos': len(nombres), 'matches': matches,
+            'subetapas': {'diccionario_s': cargado - inicio, 'buscar_s': fin - cargado}}
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def etapa_masiva(args):
+    # cliente_http lee la URL base al importarse: se fija antes de importar nada que lo use
+    puerto = _puerto_libre()
+    os.environ['ORPHANET_BASE_URL'] = f"http://127.0.0.1:{puerto}"
+    from servidor_replay import SitioSintetico, CorpusGrabado, iniciar_en_hilo
+    from homologacion_masiva_lotes import HomologadorMasivo
+
+    corpus = CorpusGrabado.desde_directorio(args.corpus) if args.corpus else SitioSintetico(args.csv)
+    servidor = iniciar_en_hilo(corpus, puerto=puerto, latencia=args.latencia / 1000)
+
+    inicio = time.perf_counter()
+    homologador = HomologadorMasivo(args.csv, tamano_lote=args.lote, delay_request=0.2)
+    resultado = homologador.procesar_lote(0)
+    fin = time.perf_counter()
+    servidor.shutdown()
+    if not servidor.estadisticas['peticiones']:
+        raise RuntimeError("el servidor replay no recibió peticiones")
+    return {'tiempo_s': fin - inicio, 'elementos': resultado['total'], 'matches': resultado['matches'],
+            'peticiones_http': servidor.estadisticas['peticiones']}
+
+
+FUNCIONES_ETAPA = {
+    'pdf': etapa_pdf,
+    'indice': etapa_indice,
+    'directa': etapa_directa,
+    'orpha': etapa_orpha,
+    'masiva': etapa_masiva,
+}
+
+
+def ejecutar_etapa_hijo(args):
+    """Punto de entrada del proceso hijo: ejecuta la etapa y escribe su JSON"""
+    os.chdir(args.directorio)
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        medidas = FUNCIONES_ETAPA[args.etapa](args)
+    medidas['rss_max_mb'] = _rss_max_mb()
+    # Desglose de los temporizadores de metricas.py que la etapa haya recorrido
+    from metricas import obtener_metricas
+    tiempos = obtener_metricas().tiempos()
+    if tiempos:
+        medidas['metricas_s'] = {nombre: round(segundos, 4) for nombre, segundos in sorted(tiempos.items())}
+    if medidas.get('matches') is not None and medidas['tiempo_s'] > 0:
+        medidas['matches_por_s'] = medidas['matches'] / medidas['tiempo_s']
+    with open(os.path.join(args.directorio, f"etapa_{args.etapa}.json"), 'w', encoding='utf-8') as f:
+        json.dump(medidas, f)
+
+
+def ejecutar_etapa(etapa, args):
+    """Lanza la etapa en un proceso nuevo y devuelve sus medidas"""
+    comando = [sys.executable, os.path.abspath(__file__), '--etapa', etapa, '--directorio', args.directorio,
+               '--csv', args.csv, '--pdf', args.pdf, '--xml', args.xml, '--lote', str(args.lote),
+               '--latencia', str(args.latencia), '--limite-orpha', str(args.limite_orpha)]
+    if args.corpus:
+        comando += ['--corpus', args.corpus]
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [DIRECTORIO, os.environ.get('PYTHONPATH')])))
+    proceso = subprocess.run(comando, env=entorno, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else
+                           f"código {proceso.returncode}")
+    with open(os.path.join(args.directorio, f"etapa_{etapa}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRECTORIO,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def comparar(resultados, baseline, umbral):
+    """Lista de regresiones (textos) de resultados frente a la línea base"""
+    regresiones = []
+    if baseline.get('entradas') != resultados['entradas']:
+        print("⚠️  La línea base usa otras entradas (hashes distintos): no se compara")
+        return regresiones
+
+    for etapa, medidas in resultados['etapas'].items():
+        base = baseline.get('etapas', {}).get(etapa)
+        if not base:
+            continue
+        for metrica, sentido in METRICAS_SEGUIDAS.items():
+            actual, anterior = medidas.get(metrica), base.get(metrica)
+            if actual is None or anterior is None or anterior == 0:
+                continue
+            cambio = (actual - anterior) / anterior
+            # Los matches son exactos: cualquier pérdida cuenta
+            tolerancia = 0 if metrica == 'matches' else umbral
+            peor = cambio > tolerancia if sentido == 'menor' else -cambio > tolerancia
+            if peor:
+                regresiones.append(f"{etapa}.{metrica}: {anterior:.4g} → {actual:.4g} ({cambio:+.1%})")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo de la homologación")
+    parser.add_argument("--etapas", nargs='+', choices=ETAPAS, default=list(ETAPAS), help="Etapas a medir")
+    parser.add_argument("--csv", default=CSV_COLOMBIA, help="Listado de Colombia")
+    parser.add_argument("--pdf", default=PDF_RESOLUCION, help="PDF de la resolución")
+    parser.add_argument("--xml", help="XML de Orphanet fijado (por defecto se genera uno con semilla fija)")
+    parser.add_argument("--corpus", help="Corpus HTTP grabado para la etapa masiva (por defecto, sitio sintético)")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE_MASIVA,
+                        help=f"Enfermedades del lote de la etapa masiva (default: {TAMANO_LOTE_MASIVA})")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latencia del servidor replay en ms (default: 0)")
+    parser.add_argument("--limite-orpha", type=int, default=LIMITE_ORPHA,
+                        help=f"Nombres para la etapa orpha (default: {LIMITE_ORPHA})")
+    parser.add_argument("--directorio", help="Directorio de trabajo (por defecto, uno temporal)")
+    parser.add_argument("--salida", help="Archivo JSON de resultados")
+    parser.add_argument("--baseline", default=RUTA_BASELINE, help=f"Línea base (default: {RUTA_BASELINE})")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION,
+                        help=f"Empeoramiento tolerado (default: {UMBRAL_REGRESION:.0%}%)")
+    parser.add_argument("--actualizar-baseline", action="store_true", help="Guardar esta corrida como línea base")
+    parser.add_argument("--etapa", choices=ETAPAS, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    args.csv, args.pdf = os.path.abspath(args.csv), os.path.abspath(args.pdf)
+    args.directorio = os.path.abspath(args.directorio or tempfile.mkdtemp(prefix='benchmark_homologacion_'))
+    args.ruta_indice = os.path.join(args.directorio, 'indice_orphanet.bin')
+
+    if args.etapa:
+        ejecutar_etapa_hijo(args)
+        return
+
+    os.makedirs(args.directorio, exist_ok=True)
+    if args.xml:
+        args.xml = os.path.abspath(args.xml)
+    else:
+        args.xml = generar_xml_fixture(os.path.join(args.directorio, 'orphanet_fixture.xml'), args.csv)
+    # directa y orpha necesitan el índice
+    etapas = [e for e in ETAPAS if e in args.etapas or (e == 'indice' and {'directa', 'orpha'} & set(args.etapas))]
+
+    print("🚀 BENCHMARK DE HOMOLOGACIÓN")
+    print("=" * 60)
+    print(f"📁 Directorio de trabajo: {args.directorio}")
+    print(f"📄 XML de Orphanet: {args.xml}")
+
+    resultados = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_actual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'entradas': {
+            'csv': sha256_archivo(args.csv),
+            'xml': sha256_archivo(args.xml),
+            'pdf': sha256_archivo(args.pdf) if os.path.exists(args.pdf) else None,
+            'corpus': sha256_archivo(os.path.join(args.corpus, 'indice.json')) if args.corpus else 'sintetico',
+            'lote': args.lote,
+            'latencia_ms': args.latencia,
+            'limite_orpha': args.limite_orpha,
+        },
+        'etapas': {},
+    }
+
+    inicio = time.perf_counter()
+    for etapa in etapas:
+        print(f"\n⏱️  Etapa {etapa}...")
+        try:
+            medidas = ejecutar_etapa(etapa, args)
+        except Exception as e:
+            print(f"❌ Error en la etapa {etapa}: {e}")
+            sys.exit(1)
+        resultados['etapas'][etapa] = medidas
+        linea = f"   {medidas['tiempo_s']:.2f}s | RSS máx {medidas['rss_max_mb']:.0f} MB | {medidas['elementos']} elementos"
+        if 'matches' in medidas:
+            linea += f" | {medidas['matches']} matches ({medidas.get('matches_por_s', 0):.1f}/s)"
+        print(linea)
+        for subetapa, segundos in medidas.get('subetapas', {}).items():
+            print(f"     • {subetapa}: {segundos:.2f}s")
+        for nombre, segundos in sorted(medidas.get('metricas_s', {}).items(), key=lambda par: -par[1])[:5]:
+            print(f"     ◦ {nombre}: {segundos:.2f}s")
+    resultados['tiempo_total_s'] = time.perf_counter() - inicio
+
+    os.makedirs(CARPETA_RESULTADOS, exist_ok=True)
+    salida = args.salida or os.path.join(CARPETA_RESULTADOS,
+                                         f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados: {salida} (total {resultados['tiempo_total_s']:.1f}s)")
+
+    regresiones = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regresiones = comparar(resultados, json.load(f), args.umbral)
+        if not regresiones:
+            print(f"✅ Sin regresiones frente a {args.baseline} (umbral {args.umbral:.0%})")
+    else:
+        print(f"⚠️  Sin línea base en {args.baseline}")
+
+    if args.actualizar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"📌 Línea base actualizada: {args.baseline}")
+
+    if regresiones:
+        print(f"❌ {len(regresiones)} regresiones:")
+        for regresion in regresiones:
+            print(f"   • {regresion}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
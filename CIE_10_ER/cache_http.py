@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+CACHÉ PERSISTENTE DE RESPUESTAS HTTP (orpha.net)
+Compartida por todos los scrapers: búsquedas y páginas de detalle
+
+Estructura en disco:
+    .cache_orphanet/respuestas_http.sqlite
+
+Cada respuesta 200 se guarda comprimida (zlib) bajo su URL normalizada
+(esquema y host en minúsculas, parámetros ordenados, sin fragmento), de modo
+que quote(termino) en la URL y params={'query': termino} comparten entrada.
+
+- Dentro del TTL la respuesta se sirve desde disco sin tocar la red
+- Vencido el TTL se revalida con If-None-Match / If-Modified-Since; un 304
+  renueva la entrada sin volver a descargar el cuerpo
+- Si la red falla se sirve la última copia conocida, aunque esté vencida
+- Cuando la base supera el tamaño máximo se eliminan las entradas usadas
+  hace más tiempo (LRU). El tamaño total se lleva en memoria y la fecha de
+  último uso de los aciertos se escribe por tandas (cada USOS_POR_VOLCADO
+  aciertos, cada SEGUNDOS_ENTRE_VOLCADOS o al cerrar), no en cada acierto
+"""
+
+import os
+import sys
+import time
+import zlib
+import json
+import sqlite3
+import atexit
+import argparse
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import cliente_http
+from cache_orphanet import DIRECTORIO_CACHE
+from metricas import obtener_metricas
+
+RUTA_CACHE_HTTP = os.path.join(DIRECTORIO_CACHE, 'respuestas_http.sqlite')
+TTL_RESPUESTAS = 7 * 24 * 3600           # Segundos antes de revalidar una respuesta
+TAMANO_MAXIMO = 200 * 1024 * 1024        # Bytes (comprimidos) antes de desalojar por LRU
+CABECERAS_GUARDADAS = ('Content-Type', 'ETag', 'Last-Modified')
+USOS_POR_VOLCADO = 200                   # Aciertos acumulados antes de escribir sus fechas de uso
+SEGUNDOS_ENTRE_VOLCADOS = 30             # Tiempo máximo que una fecha de uso espera en memoria
+
+
+def normalizar_url(url, params=None):
+    """Clave canónica de una URL con sus parámetros de consulta"""
+    partes = urlsplit(url)
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or '').lower()
+    if partes.port and not ((esquema, partes.port) in (('http', 80), ('https', 443))):
+        host = f"{host}:{partes.port}"
+
+    consulta = parse_qsl(partes.query, keep_blank_values=True)
+    if params:
+        elementos = params.items() if hasattr(params, 'items') else params
+        consulta.extend((str(k), str(v)) for k, v in elementos if v is not None)
+    consulta.sort()
+
+    return urlunsplit((esquema, host, partes.path or '/', urlencode(consulta, quote_via=quote), ''))
+
+
+def _respuesta_desde_fila(fila, url):
+    """Reconstruye un requests.Response a partir de una entrada de la caché"""
+    respuesta = requests.Response()
+    respuesta.status_code = fila['estado']
+    respuesta._content = zlib.decompress(fila['cuerpo'])
+    respuesta.headers = CaseInsensitiveDict(json.loads(fila['cabeceras']))
+    respuesta.encoding = fila['codificacion']
+    respuesta.url = url
+    respuesta.reason = 'OK'
+    respuesta.from_cache = True
+    return respuesta
+
+
+class CacheHTTP:
+    """Caché de respuestas en SQLite, segura para usar desde varios hilos"""
+
+    def __init__(self, ruta=RUTA_CACHE_HTTP, ttl=TTL_RESPUESTAS, tamano_maximo=TAMANO_MAXIMO):
+        self.ruta = ruta
+        self.ttl = ttl
+        self.tamano_maximo = tamano_maximo
+        self.aciertos = 0
+        self.revalidadas = 0
+        self.descargas = 0
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+        self._conexion.row_factory = sqlite3.Row
+        self._conexion.execute('PRAGMA journal_mode=WAL')
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                estado INTEGER NOT NULL,
+                cabeceras TEXT NOT NULL,
+                codificacion TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                cuerpo BLOB NOT NULL,
+                tamano INTEGER NOT NULL,
+                guardado_en REAL NOT NULL,
+                usado_en REAL NOT NULL
+            )
+        """)
+        self._conexion.execute('CREATE INDEX IF NOT EXISTS idx_respuestas_usado ON respuestas(usado_en)')
+        self._conexion.commit()
+
+        # Tamaño total comprimido: se calcula una vez y se actualiza en cada escritura
+        self._tamano_total = self._sumar_tamanos()
+        # Aciertos aún no escritos en disco: clave -> usado_en
+        self._usos_pendientes = {}
+        self._ultimo_volcado = time.time()
+        atexit.register(self.cerrar)
+
+    def _sumar_tamanos(self):
+        return self._conexion.execute('SELECT COALESCE(SUM(tamano), 0) FROM respuestas').fetchone()[0]
+
+    def _buscar(self, clave):
+        with self._lock:
+            return self._conexion.execute('SELECT * FROM respuestas WHERE clave = ?', (clave,)).fetchone()
+
+    def _marcar_uso(self, clave, revalidada=False):
+        ahora = time.time()
+        with self._lock:
+            if revalidada:
+                # guardado_en decide el TTL: se escribe ya para no revalidar otra vez
+                self._usos_pendientes.pop(clave, None)
+                self._conexion.execute('UPDATE respuestas SET usado_en = ?, guardado_en = ? WHERE clave = ?',
+                                       (ahora, ahora, clave))
+                self._conexion.commit()
+                return
+            self._usos_pendientes[clave] = ahora
+            if (len(self._usos_pendientes) >= USOS_POR_VOLCADO
+                    or ahora - self._ultimo_volcado >= SEGUNDOS_ENTRE_VOLCADOS):
+                self._volcar_usos()
+                self._conexion.commit()
+
+    def _volcar_usos(self):
+        """Escribe las fechas de uso pendientes (llamar con el lock tomado)"""
+        if self._usos_pendientes:
+            self._conexion.executemany('UPDATE respuestas SET usado_en = ? WHERE clave = ?',
+                                       [(usado, clave) for clave, usado in self._usos_pendientes.items()])
+            self._usos_pendientes.clear()
+        self._ultimo_volcado = time.time()
+
+    def _guardar(self, clave, respuesta):
+        cuerpo = zlib.compress(respuesta.content, 6)
+        cabeceras = {k: respuesta.headers[k] for k in CABECERAS_GUARDADAS if k in respuesta.headers}
+        ahora = time.time()
+        with self._lock:
+            anterior = self._conexion.execute('SELECT tamano FROM respuestas WHERE clave = ?', (clave,)).fetchone()
+            self._conexion.execute(
+                'INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (clave, respuesta.status_code, json.dumps(cabeceras), respuesta.encoding,
+                 respuesta.headers.get('ETag'), respuesta.headers.get('Last-Modified'),
+                 cuerpo, len(cuerpo), ahora, ahora))
+            self._usos_pendientes.pop(clave, None)
+            self._tamano_total += len(cuerpo) - (anterior[0] if anterior else 0)
+            self._desalojar()
+            self._conexion.commit()
+
+    def _desalojar(self):
+        """Elimina las entradas menos usadas hasta quedar bajo el 90% del máximo"""
+        if self._tamano_total <= self.tamano_maximo:
+            return
+        # Otro proceso puede haber escrito o desalojado: se confirma el total antes de borrar
+        self._tamano_total = total = self._sumar_tamanos()
+        if total <= self.tamano_maximo:
+            return
+        # El orden LRU necesita las fechas de uso que aún están en memoria
+        self._volcar_usos()
+        objetivo = self.tamano_maximo * 0.9
+        for clave, tamano in self._conexion.execute(
+                'SELECT clave, tamano FROM respuestas ORDER BY usado_en').fetchall():
+            if total <= objetivo:
+                break
+            self._conexion.execute('DELETE FROM respuestas WHERE clave = ?', (clave,))
+            total -= tamano
+        self._tamano_total = total
+
+    def get(self, url, params=None, headers=None, getter=cliente_http.get, **kwargs):
+        """
+        Igual que requests.get(url, params=..., headers=..., **kwargs) pero pasando
+        por la caché. Por defecto usa la sesión compartida de cliente_http; `getter`
+        permite pasar un wrapper con rate limit. Solo se llama cuando hay que ir a la red.
+        """
+        clave = normalizar_url(url, params)
+        fila = self._buscar(clave)
+
+        if fila is not None and time.time() - fila['guardado_en'] < self.ttl:
+            self._marcar_uso(clave)
+            self.aciertos += 1
+            obtener_metricas().contador('cache_http', resultado='acierto')
+            return _respuesta_desde_fila(fila, clave)
+
+        cabeceras = dict(headers or {})
+        if fila is not None:
+            if fila['etag']:
+                cabeceras['If-None-Match'] = fila['etag']
+            if fila['last_modified']:
+                cabeceras['If-Modified-Since'] = fila['last_modified']
+
+        try:
+            respuesta = getter(url, params=params, headers=cabeceras, **kwargs)
+        except requests.exceptions.RequestException:
+            if fila is None:
+                raise
+            print(f"⚠️  Sin conexión, usando copia guardada de {clave}", file=sys.stderr)
+            self.aciertos += 1
+            obtener_metricas().contador('cache_http', resultado='copia_sin_conexion')
+            return _respuesta_desde_fila(fila, clave)
+
+        if respuesta.status_code == 304 and fila is not None:
+            self._marcar_uso(clave, revalidada=True)
+            self.revalidadas += 1
+            obtener_metricas().contador('cache_http', resultado='revalidada')
+            return _respuesta_desde_fila(fila, clave)
+
+        self.descargas += 1
+        obtener_metricas().contador('cache_http', resultado='descarga')
+        if respuesta.status_code == 200:
+            self._guardar(clave, respuesta)
+        return respuesta
+
+    def estadisticas(self):
+        with self._lock:
+            entradas, tamano = self._conexion.execute(
+                'SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM respuestas').fetchone()
+        return {
+            'entradas': entradas,
+            'tamano_bytes': tamano,
+            'aciertos': self.aciertos,
+            'revalidadas': self.revalidadas,
+            'descargas': self.descargas
+        }
+
+    def vaciar(self):
+        with self._lock:
+            self._conexion.execute('DELETE FROM respuestas')
+            self._conexion.commit()
+            self._conexion.execute('VACUUM')
+            self._usos_pendientes.clear()
+            self._tamano_total = 0
+
+    def cerrar(self):
+        """Escribe las fechas de uso pendientes y cierra la base (se llama también al salir)"""
+        with self._lock:
+            if self._conexion is None:
+                return
+            try:
+                self._volcar_usos()
+                self._conexion.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️  No se pudieron guardar las fechas de uso de la caché: {e}", file=sys.stderr)
+            self._conexion.close()
+            self._conexion = None
+
+
+_cache_por_defecto = None
+_lock_defecto = threading.Lock()
+
+
+def obtener_cache_http():
+    """Instancia compartida por el proceso (se abre la primera vez que se usa)"""
+    global _cache_por_defecto
+    with _lock_defecto:
+        if _cache_por_defecto is None:
+            _cache_por_defecto = CacheHTTP()
+        return _cache_por_defecto
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caché persistente de respuestas HTTP de Orphanet")
+    parser.add_argument("--vaciar", action="store_true", help="Eliminar todas las respuestas guardadas")
+
+    args = parser.parse_args()
+
+    cache = obtener_cache_http()
+    if args.vaciar:
+        cache.vaciar()
+        print(f"🗑️  Caché vaciada: {cache.ruta}")
+
+    stats = cache.estadisticas()
+    print(f"💾 {cache.ruta}: {stats['entradas']} respuestas, {stats['tamano_bytes'] / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
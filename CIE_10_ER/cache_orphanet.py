@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+CACHÉ LOCAL DE SNAPSHOTS DE ORPHANET
+Guarda cada versión de Orphadata en disco, indexada por producto, idioma y aDate
+
+Estructura en disco:
+    .cache_orphanet/
+        metadatos_product1_Spanish.json     <- última consulta de free_product1_cross_xml.json
+        product1_Spanish_<aDate>/
+            product.xml                     <- XML original descargado
+            tabla.pkl                       <- tabla normalizada (orpha, nombre, sinónimos, CIE-10)
+
+Si la versión no ha cambiado, una ejecución carga tabla.pkl sin hacer ninguna
+petición de red. Los metadatos se vuelven a consultar solo cuando superan el TTL.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import pickle
+import argparse
+import requests
+
+import cliente_http
+from orphanet_xml import obtener_metadatos_producto, iterar_disorders
+from metricas import obtener_metricas
+
+DIRECTORIO_CACHE = os.environ.get('ORPHANET_CACHE_DIR', '.cache_orphanet')
+TTL_METADATOS = 24 * 3600  # Segundos antes de volver a consultar la versión publicada
+FORMATO_TABLA = 1
+CAMPOS_TABLA = ('orpha_number', 'nombre_oficial', 'sinonimos', 'codigos_cie10_orphanet')
+
+
+def ruta_snapshot(product_id, idioma, version, directorio=DIRECTORIO_CACHE):
+    """Carpeta del snapshot para un producto, idioma y versión (aDate)"""
+    version_segura = re.sub(r'[^0-9A-Za-z]+', '-', str(version)).strip('-')
+    return os.path.join(directorio, f"{product_id}_{idioma}_{version_segura}")
+
+
+def _ruta_metadatos(product_id, idioma, directorio):
+    return os.path.join(directorio, f"metadatos_{product_id}_{idioma}.json")
+
+
+def escribir_atomico(ruta, escribir):
+    """Escribe en un archivo temporal y lo renombra, para no dejar archivos a medias"""
+    ruta_tmp = ruta + '.tmp'
+    with open(ruta_tmp, 'wb') as f:
+        escribir(f)
+    os.replace(ruta_tmp, ruta)
+
+
+def obtener_version_publicada(product_id="product1", idioma="Spanish",
+                              ttl_metadatos=TTL_METADATOS, directorio=DIRECTORIO_CACHE):
+    """
+    Devuelve (url_xml, version). Usa los metadatos guardados si son más recientes
+    que el TTL; si no, consulta Orphadata. Ante un fallo de red se reutilizan los
+    últimos metadatos conocidos, aunque estén vencidos.
+    """
+    ruta = _ruta_metadatos(product_id, idioma, directorio)
+    guardados = None
+    if os.path.exists(ruta):
+        with open(ruta, 'r', encoding='utf-8') as f:
+            guardados = json.load(f)
+        if time.time() - guardados['consultado_en'] < ttl_metadatos:
+            return guardados['url'], guardados['version']
+
+    try:
+        xml_url, version = obtener_metadatos_producto(product_id, idioma)
+    except requests.exceptions.RequestException:
+        if guardados:
+            print(f"⚠️  Sin conexión con Orphadata, usando versión conocida {guardados['version']}", file=sys.stderr)
+            return guardados['url'], guardados['version']
+        raise
+
+    if xml_url:
+        os.makedirs(directorio, exist_ok=True)
+        contenido = json.dumps({
+            'url': xml_url,
+            'version': version,
+            'consultado_en': time.time()
+        }, ensure_ascii=False).encode('utf-8')
+        escribir_atomico(ruta, lambda f: f.write(contenido))
+
+    return xml_url, version
+
+
+def _descargar_xml(xml_url, ruta_xml):
+    """Descarga el XML a disco por bloques"""
+    metricas = obtener_metricas()
+
+    def escribir(f):
+        with cliente_http.get(xml_url, timeout=120, stream=True) as respuesta:
+            respuesta.raise_for_status()
+            for bloque in respuesta.iter_content(chunk_size=1 << 16):
+                f.write(bloque)
+                metricas.contador('descarga_xml_bytes', len(bloque))
+
+    with metricas.temporizador('descarga_xml'):
+        escribir_atomico(ruta_xml, escribir)
+
+
+def _guardar_tabla(registros, ruta_tabla, version):
+    """Guarda los registros como tabla columnar en formato binario (pickle)"""
+    columnas = {campo: [r[campo] for r in registros] for campo in CAMPOS_TABLA}
+    tabla = {'formato': FORMATO_TABLA, 'version': version, 'columnas': columnas}
+    escribir_atomico(ruta_tabla, lambda f: pickle.dump(tabla, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _cargar_tabla(ruta_tabla):
+    """Carga la tabla binaria y la convierte en lista de registros planos"""
+    with open(ruta_tabla, 'rb') as f:
+        tabla = pickle.load(f)
+    if tabla.get('formato') != FORMATO_TABLA:
+        return None
+    columnas = tabla['columnas']
+    return [dict(zip(CAMPOS_TABLA, fila)) for fila in zip(*(columnas[c] for c in CAMPOS_TABLA))]
+
+
+def cargar_registros_orphanet(product_id="product1", idioma="Spanish",
+                              ttl_metadatos=TTL_METADATOS, directorio=DIRECTORIO_CACHE):
+    """
+    Devuelve (registros, version) para la versión publicada de Orphanet.
+
+    Orden de uso: tabla.pkl del snapshot → product.xml ya descargado → descarga.
+    Los registros tienen los campos de orphanet_xml.iterar_disorders.
+    """
+    xml_url, version = obtener_version_publicada(product_id, idioma, ttl_metadatos, directorio)
+    if not xml_url:
+        return None, None
+
+    carpeta = ruta_snapshot(product_id, idioma, version, directorio)
+    ruta_tabla = os.path.join(carpeta, 'tabla.pkl')
+    ruta_xml = os.path.join(carpeta, 'product.xml')
+
+    metricas = obtener_metricas()
+    if os.path.exists(ruta_tabla):
+        with metricas.temporizador('carga_snapshot'):
+            registros = _cargar_tabla(ruta_tabla)
+        if registros is not None:
+            print(f"💾 Snapshot Orphanet {version} cargado desde caché ({len(registros)} disorders)")
+            return registros, version
+
+    os.makedirs(carpeta, exist_ok=True)
+    if not os.path.exists(ruta_xml):
+        print(f"🔗 Descargando XML de Orphanet (versión {version}): {xml_url}")
+        _descargar_xml(xml_url, ruta_xml)
+
+    with metricas.temporizador('parseo_xml'):
+        registros = list(iterar_disorders(ruta_xml))
+    metricas.contador('disorders_parseados', len(registros))
+    with metricas.temporizador('guardado_snapshot'):
+        _guardar_tabla(registros, ruta_tabla, version)
+    print(f"💾 Snapshot Orphanet {version} guardado en {carpeta} ({len(registros)} disorders)")
+    return registros, version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caché local de snapshots de Orphanet")
+    parser.add_argument("--producto", default="product1", help="Producto de Orphadata")
+    parser.add_argument("--idioma", default="Spanish", help="Idioma del XML")
+    parser.add_argument("--forzar", action="store_true", help="Volver a consultar la versión publicada ignorando el TTL")
+
+    args = parser.parse_args()
+
+    ttl = 0 if args.forzar else TTL_METADATOS
+    inicio = time.time()
+    registros, version = cargar_registros_orphanet(args.producto, args.idioma, ttl_metadatos=ttl)
+    if registros is None:
+        print("❌ No se encontró el XML para el idioma solicitado")
+        sys.exit(1)
+
+    print(f"✅ Versión {version}: {len(registros)} disorders en {time.time() - inicio:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+CACHÉ DE TEXTO POR PÁGINA DE LOS PDF DE RESOLUCIONES
+Texto extraído de cada página, indexado por el hash de su contenido
+
+Estructura en disco:
+    .cache_pdf/paginas_pdf.sqlite
+
+La clave de una página es el SHA-256 de todo lo que determina su texto: el
+content stream, los Form XObjects que dibuja y, de cada fuente, el nombre, la
+codificación y el mapa ToUnicode. No depende del archivo ni de la posición de
+la página, de modo que:
+
+- volver a correr extraer_cie10.py (p. ej. tras ajustar los patrones) no
+  vuelve a extraer ninguna página
+- una versión nueva de la resolución que conserva la mayoría de las páginas
+  solo extrae las que cambiaron
+
+Cada entrada guarda además la versión de extracción (versión de PyPDF2 y
+VERSION_EXTRACCION): al actualizar PyPDF2 las páginas se vuelven a extraer.
+"""
+
+import os
+import sqlite3
+import hashlib
+import argparse
+import threading
+import time
+
+import PyPDF2
+from PyPDF2.generic import ArrayObject
+
+DIRECTORIO_CACHE_PDF = os.environ.get('PDF_CACHE_DIR', '.cache_pdf')
+RUTA_CACHE_PAGINAS = os.path.join(DIRECTORIO_CACHE_PDF, 'paginas_pdf.sqlite')
+VERSION_EXTRACCION = f"PyPDF2-{PyPDF2.__version__}/1"    # Cambiarla invalida todo el texto guardado
+
+
+def _datos_stream(objeto):
+    """Bytes decodificados de un stream o de un arreglo de streams"""
+    objeto = objeto.get_object()
+    if isinstance(objeto, ArrayObject):
+        return b''.join(_datos_stream(parte) for parte in objeto)
+    return objeto.get_data()
+
+
+def _actualizar_con_recursos(h, recursos, visitados):
+    """Agrega al hash las fuentes y los Form XObjects de un diccionario /Resources"""
+    if recursos is None:
+        return
+    recursos = recursos.get_object()
+
+    fuentes = recursos.get('/Font')
+    fuentes = fuentes.get_object() if fuentes is not None else {}
+    for nombre in sorted(fuentes):
+        fuente = fuentes[nombre].get_object()
+        codificacion = fuente.get('/Encoding')
+        h.update(nombre.encode('utf-8'))
+        h.update(str(fuente.get('/BaseFont')).encode('utf-8'))
+        h.update(str(codificacion.get_object() if codificacion is not None else None).encode('utf-8'))
+        if fuente.get('/ToUnicode') is not None:
+            h.update(_datos_stream(fuente['/ToUnicode']))
+
+    # Los Form XObjects pueden contener texto; las imágenes no se leen
+    objetos = recursos.get('/XObject')
+    objetos = objetos.get_object() if objetos is not None else {}
+    for nombre in sorted(objetos):
+        referencia = objetos[nombre]
+        objeto = referencia.get_object()
+        clave = getattr(referencia, 'idnum', None) or id(objeto)
+        if objeto.get('/Subtype') != '/Form' or clave in visitados:
+            continue
+        visitados.add(clave)
+        h.update(nombre.encode('utf-8'))
+        h.update(objeto.get_data())
+        _actualizar_con_recursos(h, objeto.get('/Resources'), visitados)
+
+
+def hash_pagina(pagina):
+    """SHA-256 (hex) del contenido de una página que determina su texto extraído"""
+    h = hashlib.sha256()
+    contenido = pagina.get('/Contents')
+    if contenido is not None:
+        h.update(_datos_stream(contenido))
+    _actualizar_con_recursos(h, pagina.get('/Resources'), set())
+    return h.hexdigest()
+
+
+class CachePaginasPDF:
+    """Texto de páginas por hash de contenido, seguro para usar desde varios hilos"""
+
+    def __init__(self, ruta=RUTA_CACHE_PAGINAS, version=VERSION_EXTRACCION):
+        self.ruta = ruta
+        self.version = version
+        self.aciertos = 0
+        self.extraidas = 0
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+        self._conexion.execute('PRAGMA journal_mode=WAL')
+        self._conexion.execute("""
+            CREATE TABLE IF NOT EXISTS paginas (
+                hash TEXT NOT NULL,
+                version TEXT NOT NULL,
+                texto TEXT NOT NULL,
+                guardado_en REAL NOT NULL,
+                PRIMARY KEY (hash, version)
+            )
+        """)
+        self._conexion.commit()
+
+    def _consultar(self, columnas, hashes):
+        unicos = list(dict.fromkeys(hashes))
+        filas = []
+        # Por tandas, por debajo del límite de parámetros de SQLite
+        for inicio in range(0, len(unicos), 500):
+            tanda = unicos[inicio:inicio + 500]
+            marcadores = ','.join('?' * len(tanda))
+            filas.extend(self._conexion.execute(
+                f'SELECT {columnas} FROM paginas WHERE version = ? AND hash IN ({marcadores})',
+                [self.version] + tanda).fetchall())
+        return filas
+
+    def presentes(self, hashes):
+        """Conjunto de los hashes que ya están en la caché para esta versión (sin leer los textos)"""
+        with self._lock:
+            return {fila[0] for fila in self._consultar('hash', hashes)}
+
+    def obtener(self, hashes):
+        """{hash: texto} de los hashes que ya están en la caché para esta versión"""
+        with self._lock:
+            encontrados = dict(self._consultar('hash, texto', hashes))
+            self.aciertos += sum(1 for h in hashes if h in encontrados)
+        return encontrados
+
+    def guardar(self, textos):
+        """Guarda los pares (hash, texto) de las páginas recién extraídas"""
+        ahora = time.time()
+        with self._lock:
+            self._conexion.executemany('INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?)',
+                                       [(h, self.version, texto, ahora) for h, texto in textos])
+            self._conexion.commit()
+            self.extraidas += len(textos)
+
+    def estadisticas(self):
+        with self._lock:
+            entradas, tamano = self._conexion.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(texto)), 0) FROM paginas WHERE version = ?',
+                (self.version,)).fetchone()
+        return {
+            'entradas': entradas,
+            'caracteres': tamano,
+            'aciertos': self.aciertos,
+            'extraidas': self.extraidas,
+        }
+
+    def vaciar(self):
+        with self._lock:
+            self._conexion.execute('DELETE FROM paginas')
+            self._conexion.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caché de texto por página de los PDF de resoluciones")
+    parser.add_argument("--vaciar", action="store_true", help="Eliminar todas las páginas guardadas")
+
+    args = parser.parse_args()
+
+    cache = CachePaginasPDF()
+    if args.vaciar:
+        cache.vaciar()
+        print(f"🗑️  Caché vaciada: {cache.ruta}")
+
+    stats = cache.estadisticas()
+    print(f"💾 {cache.ruta} ({VERSION_EXTRACCION})")
+    print(f"   • Páginas: {stats['entradas']} ({stats['caracteres'] / 1024:.0f} K caracteres)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+CLIENTE HTTP COMPARTIDO PARA ORPHANET / ORPHADATA
+Una sola sesión de requests reutilizada por todos los scripts
+
+Características:
+- Keep-alive y pool de conexiones: la conexión TLS con orpha.net se abre una
+  vez y se reutiliza, en lugar de un handshake por petición
+- Pool dimensionado para las búsquedas concurrentes de motor_descargas.py
+- Reintentos automáticos ante errores de conexión y respuestas 429/5xx, con
+  espera exponencial y jitter (respeta Retry-After)
+- Cabeceras comunes, incluida la compresión gzip/deflate
+- Ritmo adaptativo por host (LimitadorAdaptativo de motor_descargas.py): cada
+  get() espera su turno y luego informa estado, latencia y Retry-After, de modo
+  que los scripts no necesitan time.sleep entre peticiones. La tasa aprendida
+  se guarda en .cache_orphanet/limitador_http.json
+- Cada petición registra su latencia (http_peticion_segundos) y su estado
+  (http_respuestas) en metricas.py
+- URL base de orpha.net configurable con la variable de entorno
+  ORPHANET_BASE_URL (p. ej. http://localhost:8765 para servidor_replay.py);
+  ES_ORPHANET_OFICIAL indica a los scripts que deben guardar aparte lo que
+  obtengan de otro servidor
+"""
+
+import os
+import time
+import atexit
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from motor_descargas import LimitadorAdaptativo
+from metricas import obtener_metricas
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+CABECERAS = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'es,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+TIMEOUT = 10                 # Segundos, para las llamadas que no indiquen otro
+TAMANO_POOL = 16             # Conexiones por host
+REINTENTOS = 3
+FACTOR_ESPERA = 0.5          # Espera base: 0.5s, 1s, 2s...
+JITTER = 0.5                 # Segundos aleatorios añadidos a cada espera
+ESTADOS_REINTENTABLES = (429, 500, 502, 503, 504)
+TASA_INICIAL = 0.8           # Peticiones/s por host mientras no haya una tasa aprendida
+
+# Raíz de orpha.net para todos los scrapers; ORPHANET_BASE_URL la redirige a otro servidor
+URL_ORPHANET_OFICIAL = 'https://www.orpha.net'
+URL_ORPHANET = os.environ.get('ORPHANET_BASE_URL', URL_ORPHANET_OFICIAL).rstrip('/')
+HOST_ORPHANET = urlsplit(URL_ORPHANET).hostname     # Clave del limitador de _peticion()
+SERVIDOR_ORPHANET = urlsplit(URL_ORPHANET).netloc   # host[:puerto]
+# Falso con servidor_replay.py u otro servidor: memo y resultados van aparte de los reales
+ES_ORPHANET_OFICIAL = SERVIDOR_ORPHANET == urlsplit(URL_ORPHANET_OFICIAL).netloc
+
+
+def _crear_retry(reintentos):
+    """Política de reintentos; backoff_jitter solo existe desde urllib3 2.0"""
+    opciones = dict(
+        total=reintentos,
+        connect=reintentos,
+        read=reintentos,
+        status=reintentos,
+        backoff_factor=FACTOR_ESPERA,
+        status_forcelist=ESTADOS_REINTENTABLES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Tras el último intento se devuelve la respuesta tal cual
+    )
+    try:
+        return Retry(backoff_jitter=JITTER, **opciones)
+    except TypeError:
+        return Retry(**opciones)
+
+
+def crear_sesion(tamano_pool=TAMANO_POOL, reintentos=REINTENTOS):
+    """Crea una sesión nueva con pool de conexiones y reintentos"""
+    sesion = requests.Session()
+    sesion.headers.update(CABECERAS)
+    adaptador = HTTPAdapter(pool_connections=tamano_pool, pool_maxsize=tamano_pool,
+                            max_retries=_crear_retry(reintentos))
+    sesion.mount('https://', adaptador)
+    sesion.mount('http://', adaptador)
+    return sesion
+
+
+_sesion = None
+_lock = threading.Lock()
+
+
+def obtener_sesion():
+    """Sesión compartida por el proceso (se crea la primera vez que se usa)"""
+    global _sesion
+    with _lock:
+        if _sesion is None:
+            _sesion = crear_sesion()
+        return _sesion
+
+
+_limitadores = {}
+
+
+def ruta_estado_limitador():
+    # Import diferido: cache_orphanet importa este módulo
+    from cache_orphanet import DIRECTORIO_CACHE
+    return os.path.join(DIRECTORIO_CACHE, 'limitador_http.json')
+
+
+def obtener_limitador(host, tasa_inicial=TASA_INICIAL):
+    """
+    Limitador adaptativo compartido para un host. `tasa_inicial` solo se usa
+    la primera vez, si no hay una tasa guardada de ejecuciones anteriores.
+    """
+    host = host.lower()
+    with _lock:
+        if host not in _limitadores:
+            _limitadores[host] = LimitadorAdaptativo(tasa_inicial, ruta_estado=ruta_estado_limitador(), clave=host)
+        return _limitadores[host]
+
+
+@atexit.register
+def guardar_limitadores():
+    """Guarda la tasa aprendida de cada host al terminar el proceso"""
+    for limitador in list(_limitadores.values()):
+        limitador.guardar(forzar=True)
+
+
+def _peticion(metodo, url, **kwargs):
+    """Petición con timeout común, esperando al limitador del host y avisándole del resultado"""
+    kwargs.setdefault('timeout', TIMEOUT)
+    host = urlsplit(url).hostname or ''
+    limitador = obtener_limitador(host)
+    metricas = obtener_metricas()
+    with metricas.temporizador('http_espera_limitador', host=host):
+        limitador.esperar()
+
+    inicio = time.monotonic()
+    try:
+        respuesta = getattr(obtener_sesion(), metodo)(url, **kwargs)
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+        limitador.registrar_error()
+        metricas.contador('http_errores', host=host, tipo=type(e).__name__)
+        raise
+    duracion = time.monotonic() - inicio
+    metricas.observar('http_peticion_segundos', duracion, host=host, metodo=metodo.upper())
+    metricas.contador('http_respuestas', host=host, estado=respuesta.status_code)
+
+    # Los 429/5xx que urllib3 ya reintentó también cuentan como saturación
+    historial = getattr(getattr(respuesta.raw, 'retries', None), 'history', ())
+    reintentada = any(intento.status in ESTADOS_REINTENTABLES or intento.error for intento in historial)
+    if reintentada:
+        metricas.contador('http_reintentadas', host=host)
+    limitador.registrar_respuesta(respuesta.status_code, duracion,
+                                  respuesta.headers.get('Retry-After'), reintentada)
+    return respuesta
+
+
+def get(url, **kwargs):
+    """requests.get sobre la sesión compartida, con el timeout común por defecto"""
+    return _peticion('get', url, **kwargs)
+
+
+def head(url, **kwargs):
+    return _peticion('head', url, **kwargs)
@@ -5,202 +5,37 @@ Solución eficiente para completar los números ORPHA faltantes
 """
 
 import pandas as pd
-import requests
-import xmltodict
 from thefuzz import process, fuzz
-import re
 
-def descargar_datos_orphanet_completos():
+from indice_orphanet import obtener_indice, normalizar_nombre
+from almacen_resultados import AlmacenResultados
+
+def crear_diccionario_orpha_completo():
     """
-    Descarga y procesa los datos completos de Orphanet incluyendo números ORPHA
+    Crea un diccionario completo de nombres -> números ORPHA
+    a partir del índice compartido (ver indice_orphanet.py)
     """
-    print("🔄 Descargando datos completos de Orphanet...")
+    print("🔄 Creando diccionario de nombres -> números ORPHA...")
     try:
-        # Obtener la URL del archivo XML
-        meta_url = "http://www.orphadata.org/cgi-bin/free_product1_cross_xml.json"
-        meta_response = requests.get(meta_url, timeout=60)
-        meta_response.raise_for_status()
-        meta_list = meta_response.json()
-
-        # Buscar archivo en español
-        xml_url = None
-        for item in meta_list:
-            if isinstance(item, dict) and item.get('aLanguage') == 'Spanish':
-                xml_url = item.get('anUrl')
-                break
-        
-        if not xml_url:
-            print("❌ No se encontró URL del archivo XML en español")
-            return None
-
-        print(f"🔗 Descargando: {xml_url}")
-        xml_response = requests.get(xml_url, timeout=120)
-        xml_response.raise_for_status()
-        
-        # Parsear XML
-        data = xmltodict.parse(xml_response.content)
-        print("✅ Datos XML descargados y parseados")
-        
-        return data
-        
+        indice, version = obtener_indice('product1', idioma='Spanish')
     except Exception as e:
         print(f"❌ Error descargando datos: {e}")
         return None
-
-def crear_diccionario_orpha_completo(data):
-    """
-    Crea un diccionario completo de nombres -> números ORPHA
-    """
-    print("🔄 Creando diccionario de nombres -> números ORPHA...")
-    
-    # Debug: verificar estructura del XML
-    print("🔍 Estructura del XML:")
-    print(f"   Claves principales: {list(data.keys())}")
-    
-    if 'JDBOR' in data:
-        jdbor = data['JDBOR']
-        print(f"   JDBOR claves: {list(jdbor.keys()) if isinstance(jdbor, dict) else 'No es dict'}")
-        
-        if 'DisorderList' in jdbor:
-            disorder_list = jdbor['DisorderList']
-            print(f"   DisorderList claves: {list(disorder_list.keys()) if isinstance(disorder_list, dict) else 'No es dict'}")
-            
-            if 'Disorder' in disorder_list:
-                disorders = disorder_list['Disorder']
-                print(f"   Total disorders: {len(disorders) if isinstance(disorders, list) else 'No es lista'}")
-                
-                # Mostrar ejemplo del primer disorder
-                if isinstance(disorders, list) and len(disorders) > 0:
-                    primer_disorder = disorders[0]
-                    print(f"   Ejemplo disorder claves: {list(primer_disorder.keys()) if isinstance(primer_disorder, dict) else 'No es dict'}")
-                    if isinstance(primer_disorder, dict):
-                        print(f"   OrphaNumber: {primer_disorder.get('OrphaNumber')}")
-                        if 'Name' in primer_disorder:
-                            name_obj = primer_disorder['Name']
-                            print(f"   Name objeto: {name_obj}")
-    
-    # Continuar con el parseo original pero con más debugging
-    disorders = data.get('JDBOR', {}).get('DisorderList', {}).get('Disorder', [])
-    
-    if not disorders:
-        print("❌ No se encontraron disorders en el XML")
-        return {}
     
-    diccionario_orpha = {}
-    contador = 0
-    errores = 0
-    
-    # Procesar solo los primeros 10 para debugging
-    for i, disorder in enumerate(disorders[:10]):
-        print(f"\n🔍 Procesando disorder {i+1}:")
-        print(f"   Tipo: {type(disorder)}")
-        print(f"   Contenido: {disorder}")
-        
-        orpha_number = disorder.get('OrphaCode') if isinstance(disorder, dict) else None  # Cambio de OrphaNumber a OrphaCode
-        print(f"   OrphaCode extraído: {orpha_number}")
-        
-        nombre_oficial = None
-        if isinstance(disorder, dict) and 'Name' in disorder:
-            name_obj = disorder['Name']
-            if isinstance(name_obj, dict) and '#text' in name_obj:
-                nombre_oficial = name_obj['#text']
-            elif isinstance(name_obj, str):
-                nombre_oficial = name_obj
-        
-        print(f"   Nombre extraído: {nombre_oficial}")
-        
-        if orpha_number and nombre_oficial:
-            nombre_limpio = limpiar_nombre(nombre_oficial)
-            diccionario_orpha[nombre_limpio] = orpha_number
-            contador += 1
-            print(f"   ✅ Agregado: {nombre_limpio} -> {orpha_number}")
-        else:
-            errores += 1
-            print(f"   ❌ Error: OrphaNumber={orpha_number}, Nombre={nombre_oficial}")
-    
-    print(f"\n📊 Debug resumen (primeros 10):")
-    print(f"   Exitosos: {contador}")
-    print(f"   Errores: {errores}")
-    print(f"   Diccionario size: {len(diccionario_orpha)}")
-    
-    # Si el debug funciona, procesar todos
-    if contador > 0:
-        print("✅ El parseo funciona, procesando todos los disorders...")
-        diccionario_orpha = {}
-        contador = 0
-        
-        for disorder in disorders:
-            orpha_number = disorder.get('OrphaCode') if isinstance(disorder, dict) else None  # Cambio de OrphaNumber a OrphaCode
-            
-            nombre_oficial = None
-            if isinstance(disorder, dict) and 'Name' in disorder:
-                name_obj = disorder['Name']
-                if isinstance(name_obj, dict) and '#text' in name_obj:
-                    nombre_oficial = name_obj['#text']
-                elif isinstance(name_obj, str):
-                    nombre_oficial = name_obj
-            
-            if orpha_number and nombre_oficial:
-                nombre_limpio = limpiar_nombre(nombre_oficial)
-                diccionario_orpha[nombre_limpio] = orpha_number
-                contador += 1
-                
-                # Agregar sinónimos
-                if 'SynonymList' in disorder and disorder['SynonymList']:
-                    synonyms = disorder['SynonymList'].get('Synonym', [])
-                    if not isinstance(synonyms, list):
-                        synonyms = [synonyms]
-                        
-                    for syn in synonyms:
-                        syn_text = None
-                        if isinstance(syn, dict) and '#text' in syn:
-                            syn_text = syn['#text']
-                        elif isinstance(syn, str):
-                            syn_text = syn
-                            
-                        if syn_text:
-                            syn_limpio = limpiar_nombre(syn_text)
-                            diccionario_orpha[syn_limpio] = orpha_number
-                            contador += 1
+    if indice is None:
+        print("❌ No se encontró URL del archivo XML en español")
+        return None
     
-    print(f"✅ Diccionario creado con {contador} entradas y {len(set(diccionario_orpha.values()))} números ORPHA únicos")
+    diccionario_orpha = indice.diccionario_orpha()
+    print(f"✅ Diccionario creado (versión {version}) con {len(diccionario_orpha)} entradas y {len(set(diccionario_orpha.values()))} números ORPHA únicos")
     return diccionario_orpha
 
-def limpiar_nombre(nombre):
-    """
-    Limpia y normaliza nombres para búsqueda
-    """
-    if not nombre:
-        return ""
-    
-    # Normalizar texto
-    nombre = str(nombre).strip()
-    
-    # Reemplazos comunes
-    reemplazos = {
-        'Sindrome': 'Síndrome',
-        'sindrome': 'síndrome',
-        'Deficiencia': 'Deficiencia',
-        'deficiencia': 'deficiencia',
-        'Déficit': 'Deficiencia',
-        'déficit': 'deficiencia'
-    }
-    
-    for original, normalizado in reemplazos.items():
-        nombre = nombre.replace(original, normalizado)
-    
-    # Limpiar caracteres especiales
-    nombre = re.sub(r'[^\w\sáéíóúñü-]', '', nombre)
-    nombre = ' '.join(nombre.split())
-    
-    return nombre
-
 def encontrar_orpha_number(nombre_enfermedad, diccionario_orpha):
     """
     Encuentra el número ORPHA usando fuzzy matching
     """
-    # Limpiar nombre de búsqueda
-    nombre_limpio = limpiar_nombre(nombre_enfermedad)
+    # Limpiar nombre de búsqueda (misma regla que el índice)
+    nombre_limpio = normalizar_nombre(nombre_enfermedad)
     
     # Búsqueda exacta primero
     if nombre_limpio in diccionario_orpha:
@@ -228,13 +63,10 @@ def completar_numeros_orpha(archivo_csv):
         df = pd.read_csv(archivo_csv)
         print(f"📊 Total de registros: {len(df)}")
         
-        # Descargar datos de Orphanet
-        data_orphanet = descargar_datos_orphanet_completos()
-        if not data_orphanet:
+        # Crear diccionario desde el índice de Orphanet
+        diccionario_orpha = crear_diccionario_orpha_completo()
+        if not diccionario_orpha:
             return None
-            
-        # Crear diccionario
-        diccionario_orpha = crear_diccionario_orpha_completo(data_orphanet)
         
         # Identificar registros sin número ORPHA
         sin_orpha = df['ORPHA_Number'].isna() | (df['ORPHA_Number'] == '') | (df['ORPHA_Number'] == 'nan')
@@ -308,6 +140,7 @@ def main():
         # Guardar archivo completado
         archivo_salida = archivo_entrada.replace('.csv', '_con_orpha.csv')
         df_completado.to_csv(archivo_salida, index=False, encoding='utf-8-sig')
+        AlmacenResultados().guardar_corrida('final_con_orpha', df_completado, archivo=archivo_salida)
         
         # Generar estadísticas
         generar_estadisticas_finales(df_completado)
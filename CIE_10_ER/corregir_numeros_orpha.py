@@ -5,11 +5,11 @@ Busca y asigna los números ORPHA faltantes en los resultados de homologación
 """
 
 import pandas as pd
-import requests
-import time
 import re
 from urllib.parse import quote
 
+import cliente_http
+
 def buscar_orpha_number(nombre_enfermedad):
     """
     Busca el número ORPHA de una enfermedad mediante búsqueda web
@@ -19,14 +19,9 @@ def buscar_orpha_number(nombre_enfermedad):
         nombre_limpio = nombre_enfermedad.replace('Síndrome', '').replace('síndrome', '').strip()
         
         # URL de búsqueda en Orphanet
-        url_busqueda = f"https://www.orpha.net/consor/cgi-bin/Disease_Search.php?lng=ES&search_type=simple&search_value={quote(nombre_limpio)}"
-        
-        # Headers para simular navegador
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        url_busqueda = f"{cliente_http.URL_ORPHANET}/consor/cgi-bin/Disease_Search.php?lng=ES&search_type=simple&search_value={quote(nombre_limpio)}"
         
-        response = requests.get(url_busqueda, headers=headers, timeout=10)
+        response = cliente_http.get(url_busqueda, timeout=10)
         
         if response.status_code == 200:
             # Buscar patrones de números ORPHA en la respuesta
@@ -80,9 +75,6 @@ def corregir_numeros_orpha(archivo_csv):
                 print(f"   ✅ Encontrado: ORPHA:{orpha_num}")
             else:
                 print(f"   ❌ No encontrado")
-            
-            # Pausa para no saturar el servidor
-            time.sleep(1)
         
         print(f"🎯 Números ORPHA encontrados: {contador_encontrados}/{muestra}")
         return df
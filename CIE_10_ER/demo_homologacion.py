@@ -12,11 +12,12 @@ Proceso:
 
 import pandas as pd
 import requests
-import time
 from datetime import datetime
 import re
 import warnings
 
+import cliente_http
+
 # Suprimir advertencias de solicitud insegura si verify=False se utiliza
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 warnings.simplefilter('ignore', InsecureRequestWarning)
@@ -81,8 +82,6 @@ def demonstrar_homologacion():
             print(f"   Motivo: {resultado.get('error', 'Sin resultados específicos')}")
         
         print(f"   🌐 URL búsqueda: {resultado['url']}")
-        
-        time.sleep(2)  # Pausa entre búsquedas
     
     print(f"\n{'='*80}")
     print("✅ DEMOSTRACIÓN COMPLETADA")
@@ -96,7 +95,7 @@ def buscar_en_orphanet(nombre_enfermedad):
     termino = limpiar_nombre(nombre_enfermedad)
     
     # URL de búsqueda Orphanet
-    base_url = "https://www.orpha.net/consor/cgi-bin/Disease_Search.php"
+    base_url = f"{cliente_http.URL_ORPHANET}/consor/cgi-bin/Disease_Search.php"
     params = {
         "lng": "EN",  # MODIFICADO: Usar inglés para búsquedas más robustas
         "data_id": "Pat", 
@@ -110,9 +109,8 @@ def buscar_en_orphanet(nombre_enfermedad):
     url_completa = f"{base_url}?{query_string}"
     
     try:
-        # Usar un User-Agent común y deshabilitar la verificación SSL
-        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"}
-        response = requests.get(base_url, params=params, headers=headers, timeout=15, verify=False)
+        # Sesión compartida (User-Agent de navegador) sin verificación SSL
+        response = cliente_http.get(base_url, params=params, timeout=15, verify=False)
         
         if response.status_code == 200:
             # Parsear resultados
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+EXTRACCIÓN DE DATOS DE PÁGINAS DE ORPHANET
+Expresiones regulares compiladas una sola vez, guiadas por dígitos
+
+Páginas de búsqueda:  primer enlace a disease/detail/{orpha} y su texto
+Páginas de detalle:   nombre (primer <h1>, si no <h2>, si no <title>) y
+                      códigos CIE-10
+
+La versión anterior recorría el HTML completo cuatro veces para los códigos
+(ICD-10, CIE-10, con decimales y de 3 caracteres) intentando una letra en cada
+posición. Aquí un recorrido encuentra todos los códigos con sus decimales y
+otro, anclado en el '10' de los prefijos, las formas ICD-10/CIE-10; ambos
+empiezan por un dígito, así que el motor de re avanza en C por el texto, y las
+coincidencias repetidas se descartan antes de llegar a Python. El resultado es
+idéntico al anterior. extraer_detalle_regex() conserva la implementación anterior como
+referencia (ver benchmark_extraccion.py).
+"""
+
+import re
+
+PATRON_ENLACE_DETALLE = re.compile(r'href="[^"]*disease/detail/(\d+)[^"]*"[^>]*>([^<]+)</a>', re.IGNORECASE)
+
+PATRONES_NOMBRE = tuple(re.compile(patron, re.IGNORECASE | re.DOTALL) for patron in (
+    r'<h1[^>]*>([^<]+)</h1>',
+    r'<h2[^>]*>([^<]+)</h2>',
+    r'<title>([^<]+?)\s*-\s*Orphanet</title>'
+))
+# Los patrones de códigos empiezan por un dígito (o el '1' de '10'): el escáner de
+# re salta en C hasta el siguiente dígito y la letra se comprueba hacia atrás,
+# en lugar de intentar [A-Z] en cada posición de la página
+PATRON_CODIGO = re.compile(r'(\d)(?<=([A-Z])\d)(\d)([\.\d]*)', re.IGNORECASE)
+PATRON_CODIGO_PREFIJO = re.compile(r'1(?:(?<=ICD1)|(?<=CIE1)|(?<=ICD-1)|(?<=CIE-1))0[:\s]*([A-Z]\d{2}[\.\d]*)',
+                                   re.IGNORECASE)
+PATRON_DECIMALES = re.compile(r'\.\d+')
+PATRON_INICIO_CIE10 = re.compile(r'^[A-Z]\d{2}')
+PATRON_ESPACIOS = re.compile(r'\s+')
+
+# Códigos genéricos o de ejemplo que no se aceptan
+CODIGOS_INVALIDOS = ('A00', 'B00', 'Z99', 'X99', 'Y99')
+
+# Patrones de la implementación anterior (referencia)
+PATRONES_NOMBRE_REGEX = (
+    r'<h1[^>]*>([^<]+)</h1>',
+    r'<h2[^>]*>([^<]+)</h2>',
+    r'<title>([^<]+?)\s*-\s*Orphanet</title>'
+)
+PATRONES_CIE10_REGEX = (
+    r'ICD-?10[:\s]*([A-Z]\d{2}[\.\d]*)',
+    r'CIE-?10[:\s]*([A-Z]\d{2}[\.\d]*)',
+    r'([A-Z]\d{2}\.\d+)',
+    r'([A-Z]\d{2})'
+)
+
+
+def es_codigo_cie10_valido(codigo):
+    """Valida si un código CIE-10 es válido"""
+    if not codigo or len(codigo) < 3:
+        return False
+
+    # Debe empezar con letra seguida de números
+    if not PATRON_INICIO_CIE10.match(codigo):
+        return False
+
+    # Evitar códigos genéricos o de ejemplo
+    return not codigo.startswith(CODIGOS_INVALIDOS)
+
+
+def primer_enlace_detalle(html):
+    """(orpha_number, texto) del primer enlace a una página de detalle, o None"""
+    match = PATRON_ENLACE_DETALLE.search(html)
+    return match.groups() if match else None
+
+
+def _codigos_de_coincidencias(coincidencias, con_prefijo):
+    """
+    Reconstruye lo que encontraban los cuatro patrones anteriores: cada código
+    de 3 caracteres (incluidos 'D10'/'E10' dentro de 'ICD10'/'CIE10'), su forma
+    con decimales y la forma completa tras un prefijo ICD-10/CIE-10.
+    """
+    codigos = set(con_prefijo)
+    for primero, letra, segundo, resto in coincidencias:
+        codigo = letra + primero + segundo
+        codigos.add(codigo)
+        if resto:
+            decimales = PATRON_DECIMALES.match(resto)
+            if decimales:
+                codigos.add(codigo + decimales.group())
+    return codigos
+
+
+def _filtrar_codigos(codigos):
+    validos = set()
+    for codigo in codigos:
+        codigo = codigo.upper().strip()
+        if es_codigo_cie10_valido(codigo):
+            validos.add(codigo)
+    return list(validos)
+
+
+def extraer_nombre(html):
+    """Primer <h1>, si no <h2>, si no <title> de la página, o None"""
+    for patron in PATRONES_NOMBRE:
+        match = patron.search(html)
+        if match:
+            return PATRON_ESPACIOS.sub(' ', match.group(1).strip())
+    return None
+
+
+def extraer_codigos_cie10(html):
+    """Lista de códigos CIE-10 válidos de una página"""
+    # findall y set() corren en C; Python solo procesa las coincidencias distintas
+    return _filtrar_codigos(_codigos_de_coincidencias(set(PATRON_CODIGO.findall(html)),
+                                                      PATRON_CODIGO_PREFIJO.findall(html)))
+
+
+def extraer_detalle(html):
+    """Nombre (o None) y lista de códigos CIE-10 válidos de una página de detalle"""
+    return extraer_nombre(html), extraer_codigos_cie10(html)
+
+
+def extraer_detalle_regex(html):
+    """Implementación anterior (varios re.search/re.findall sobre el HTML completo), como referencia"""
+    nombre = None
+    for patron in PATRONES_NOMBRE_REGEX:
+        match = re.search(patron, html, re.IGNORECASE | re.DOTALL)
+        if match:
+            nombre = match.group(1).strip()
+            nombre = re.sub(r'\s+', ' ', nombre)
+            break
+
+    codigos = []
+    for patron in PATRONES_CIE10_REGEX:
+        codigos.extend(re.findall(patron, html, re.IGNORECASE))
+
+    return nombre, _filtrar_codigos(codigos)
@@ -8,38 +8,211 @@ import PyPDF2
 import re
 import csv
 import os
-from typing import List, Tuple, Dict
+import filecmp
+import argparse
+import multiprocessing
+from typing import List, Tuple, Dict, Iterable, Iterator, Optional
+
+from cache_paginas_pdf import CachePaginasPDF, hash_pagina, VERSION_EXTRACCION
+
+# Fragmentos de páginas por proceso: varios, para repartir bien las páginas lentas
+FRAGMENTOS_POR_WORKER = 4
+# Páginas recién extraídas que se acumulan antes de escribirlas en la caché
+PAGINAS_POR_GUARDADO = 20
+
+CAMPOS_CSV = ['Número', 'Nombre_Enfermedad', 'Código_CIE10', 'Observaciones']
+# Patrón para capturar enfermedades: número de lista, nombre y código opcional
+PATRON_ENFERMEDAD = re.compile(r'(\d+)[\.\)\s]+([A-ZÁÉÍÓÚÑ][^0-9]*?)(?:\s+([A-Z]\d{2}[\dX]))?', re.IGNORECASE)
+PATRON_ESPACIOS = re.compile(r'\s+')
+# Método alternativo: códigos CIE-10 sueltos y número de lista al inicio de la línea
+PATRON_CODIGO_CIE10 = re.compile(r'\b[A-Z]\d{2}[\dX]\b')
+PATRON_NUMERO_LISTA = re.compile(r'\d+[\.\)]\s*')
+
+# Lector abierto en cada proceso del pool (cada uno abre el PDF por su cuenta)
+_lector_worker = None
+_extraer_pagina_worker = None
+
+
+def extraer_texto_pagina(pagina) -> str:
+    """Texto de una página con el extractor de PyPDF2"""
+    return pagina.extract_text()
+
+
+def _iniciar_worker(pdf_path: str, extraer_pagina=extraer_texto_pagina):
+    global _lector_worker, _extraer_pagina_worker
+    _lector_worker = PyPDF2.PdfReader(pdf_path)
+    _extraer_pagina_worker = extraer_pagina
+
+
+def _extraer_paginas(indices: List[int]) -> List[Tuple[int, str, str]]:
+    """Extrae las páginas indicadas dentro de un proceso del pool: (índice, texto, error)"""
+    resultados = []
+    for indice in indices:
+        try:
+            resultados.append((indice, _extraer_pagina_worker(_lector_worker.pages[indice]), None))
+        except Exception as e:
+            resultados.append((indice, None, str(e)))
+    return resultados
+
+
+def fragmentos_paginas(indices: List[int], workers: int) -> List[List[int]]:
+    """Divide los índices de página (en orden) en fragmentos contiguos para el pool"""
+    tamano = max(1, -(-len(indices) // (workers * FRAGMENTOS_POR_WORKER)))
+    return [indices[inicio:inicio + tamano] for inicio in range(0, len(indices), tamano)]
+
+
+def fila_csv(enfermedad: Dict) -> Dict:
+    """Fila del CSV de salida para un registro de enfermedad"""
+    return {
+        'Número': enfermedad['numero'],
+        'Nombre_Enfermedad': enfermedad['nombre'],
+        'Código_CIE10': enfermedad['codigo_cie10'],
+        'Observaciones': enfermedad['observaciones']
+    }
+
+
+class ReporteCalidad:
+    """Control de calidad acumulado registro por registro (memoria acotada por los códigos distintos)"""
+
+    def __init__(self):
+        self.total_enfermedades = 0
+        self.con_codigo = 0
+        self.codigos_unicos = set()
+
+    def agregar(self, enfermedad: Dict):
+        self.total_enfermedades += 1
+        if enfermedad['codigo_cie10'] != 'XXXX':
+            self.con_codigo += 1
+            self.codigos_unicos.add(enfermedad['codigo_cie10'])
+
+    def como_dict(self) -> Dict:
+        return {
+            'total_enfermedades': self.total_enfermedades,
+            'con_codigo_cie10': self.con_codigo,
+            'sin_codigo_cie10': self.total_enfermedades - self.con_codigo,
+            'codigos_unicos': len(self.codigos_unicos),
+            'codigos_lista': sorted(self.codigos_unicos)
+        }
+
 
 class ExtractorCIE10:
-    def __init__(self, pdf_path: str):
+    """
+    Pipeline de generadores desde el PDF hasta el CSV:
+
+        páginas → líneas → candidatos → registros validados → filas del CSV
+
+    Cada etapa consume la anterior de a un elemento, de modo que el texto del
+    PDF nunca está entero en memoria; solo se acumulan los registros. El CSV
+    se escribe cuando la extracción terminó bien, en un temporal que reemplaza
+    al anterior, así que un PDF ilegible o una corrida interrumpida no lo vacía.
+    
+    extraer_pagina convierte una página en texto y version_cache identifica ese
+    texto en la caché por página; las subclases con otra extracción cambian ambos.
+    """
+    extraer_pagina = staticmethod(extraer_texto_pagina)
+    version_cache = VERSION_EXTRACCION
+
+    def __init__(self, pdf_path: str, workers: int = 1, usar_cache: bool = True):
         self.pdf_path = pdf_path
+        self.workers = workers
+        self.usar_cache = usar_cache
         self.texto_completo = ""
-        self.enfermedades = []
+        self.reporte = None
         
-    def extraer_texto_pdf(self) -> str:
-        """Extrae todo el texto del PDF"""
-        try:
-            with open(self.pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                texto = ""
-                
-                print(f"Procesando {len(pdf_reader.pages)} páginas...")
-                
-                for num_pagina, pagina in enumerate(pdf_reader.pages, 1):
-                    try:
-                        texto_pagina = pagina.extract_text()
-                        texto += texto_pagina + "\n"
-                        print(f"Página {num_pagina} procesada")
-                    except Exception as e:
-                        print(f"Error en página {num_pagina}: {e}")
+    def iterar_textos_paginas(self) -> Iterator[str]:
+        """
+        Texto de cada página, en orden. Las páginas cuyo contenido ya está en la
+        caché por página (cache_paginas_pdf.py) no se vuelven a extraer. Con
+        workers > 1 las demás se reparten entre un pool de procesos. Las páginas
+        con error se informan y se omiten.
+        """
+        with open(self.pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            total_paginas = len(pdf_reader.pages)
+            print(f"Procesando {total_paginas} páginas...")
+            
+            hashes = [None] * total_paginas
+            en_cache = set()
+            cache = CachePaginasPDF(version=self.version_cache) if self.usar_cache else None
+            por_guardar = []
+            try:
+                if cache is not None:
+                    for indice, pagina in enumerate(pdf_reader.pages):
+                        try:
+                            hashes[indice] = hash_pagina(pagina)
+                        except Exception as e:
+                            print(f"Página {indice + 1} sin hash, se extrae siempre: {e}")
+                    en_cache = cache.presentes([h for h in hashes if h is not None])
+                    desde_cache = sum(1 for h in hashes if h in en_cache)
+                    print(f"💾 {desde_cache} de {total_paginas} páginas desde la caché ({cache.ruta})")
                 
-                self.texto_completo = texto
-                return texto
+                pendientes = [indice for indice, h in enumerate(hashes) if h not in en_cache]
+                if self.workers > 1 and len(pendientes) > 1:
+                    extraidas = self._extraer_paginas_en_paralelo(pendientes)
+                else:
+                    extraidas = self._extraer_paginas_en_serie(pdf_reader, pendientes)
                 
+                for indice, h in enumerate(hashes):
+                    if h in en_cache:
+                        yield cache.obtener([h])[h]
+                        continue
+                    # Las páginas pendientes llegan en orden
+                    _, texto_pagina = next(extraidas)
+                    if texto_pagina is None:
+                        continue
+                    if cache is not None and h is not None:
+                        por_guardar.append((h, texto_pagina))
+                        if len(por_guardar) >= PAGINAS_POR_GUARDADO:
+                            cache.guardar(por_guardar)
+                            por_guardar = []
+                    yield texto_pagina
+            finally:
+                if cache is not None:
+                    if por_guardar:
+                        cache.guardar(por_guardar)
+                    cache.cerrar()
+    
+    def extraer_texto_pdf(self) -> str:
+        """Extrae todo el texto del PDF (una sola concatenación al final)"""
+        try:
+            texto = "".join(texto_pagina + "\n" for texto_pagina in self.iterar_textos_paginas())
+            self.texto_completo = texto
+            return texto
         except Exception as e:
             print(f"Error al leer el PDF: {e}")
             return ""
     
+    def _extraer_paginas_en_serie(self, pdf_reader, indices: List[int]) -> Iterator[Tuple[int, Optional[str]]]:
+        """(índice, texto o None si falló) de las páginas indicadas, una tras otra"""
+        for indice in indices:
+            try:
+                texto_pagina = self.extraer_pagina(pdf_reader.pages[indice])
+                print(f"Página {indice + 1} procesada")
+            except Exception as e:
+                print(f"Error en página {indice + 1}: {e}")
+                texto_pagina = None
+            yield indice, texto_pagina
+    
+    def _extraer_paginas_en_paralelo(self, indices: List[int]) -> Iterator[Tuple[int, Optional[str]]]:
+        """(índice, texto o None si falló) de las páginas indicadas, extraídas por fragmentos en un pool de procesos"""
+        fragmentos = fragmentos_paginas(indices, self.workers)
+        print(f"Repartiendo {len(indices)} páginas en {len(fragmentos)} fragmentos entre {self.workers} procesos...")
+        
+        with multiprocessing.Pool(processes=self.workers, initializer=_iniciar_worker,
+                                  initargs=(self.pdf_path, self.extraer_pagina)) as pool:
+            # imap conserva el orden de los fragmentos
+            for resultados_fragmento in pool.imap(_extraer_paginas, fragmentos):
+                for indice, texto_pagina, error in resultados_fragmento:
+                    if error is not None:
+                        print(f"Error en página {indice + 1}: {error}")
+                    yield indice, texto_pagina
+                print(f"Páginas {resultados_fragmento[0][0] + 1}-{resultados_fragmento[-1][0] + 1} procesadas")
+    
+    def iterar_lineas(self, textos_paginas: Iterable[str]) -> Iterator[str]:
+        """Líneas de texto de cada página, en orden"""
+        for texto_pagina in textos_paginas:
+            yield from texto_pagina.split('\n')
+    
     def validar_codigo_cie10(self, codigo: str) -> bool:
         """
         Valida si un código cumple con el formato CIE-10:
@@ -63,213 +236,293 @@ class ExtractorCIE10:
         return True
     
     def buscar_patrones_cie10(self, texto: str) -> List[str]:
-        """Busca patrones que podrían ser códigos CIE-10"""
+        """Busca patrones que podrían ser códigos CIE-10 (sin duplicados, en orden de aparición)"""
         # Patrón para códigos CIE-10: Letra + 3 dígitos/X
-        patron = re.compile(r'\b[A-Z]\d{2}[\dX]\b')
-        coincidencias = patron.findall(texto)
+        coincidencias = PATRON_CODIGO_CIE10.findall(texto)
         
         # Filtrar solo códigos válidos
         codigos_validos = [codigo for codigo in coincidencias if self.validar_codigo_cie10(codigo)]
         
-        return list(set(codigos_validos))  # Eliminar duplicados
+        return list(dict.fromkeys(codigos_validos))  # Eliminar duplicados
     
-    def extraer_enfermedades_y_codigos(self, texto: str) -> List[Dict]:
+    def iterar_candidatos(self, lineas: Iterable[str]) -> Iterator[Tuple[str, str, Optional[str]]]:
         """
-        Extrae enfermedades y sus códigos CIE-10 del texto
-        Busca patrones como números seguidos de nombre de enfermedad y posible código
+        (número, nombre, código o None) de cada línea que parece una enfermedad:
+        un número de lista seguido del nombre y, opcionalmente, el código
         """
-        lineas = texto.split('\n')
-        enfermedades = []
-        numero_actual = 0
-        
-        # Patrón para líneas que empiezan con número (posibles enfermedades)
-        patron_numeracion = re.compile(r'^\s*(\d+)[\.\)]\s*(.+)', re.MULTILINE)
-        
-        # Patrón más flexible para capturar enfermedades
-        patron_enfermedad = re.compile(r'(\d+)[\.\)\s]+([A-ZÁÉÍÓÚÑ][^0-9]*?)(?:\s+([A-Z]\d{2}[\dX]))?', re.IGNORECASE)
-        
         for linea in lineas:
             linea = linea.strip()
             if not linea:
                 continue
             
-            # Buscar coincidencias del patrón
-            coincidencia = patron_enfermedad.search(linea)
+            coincidencia = PATRON_ENFERMEDAD.search(linea)
             if coincidencia:
-                numero = coincidencia.group(1)
-                nombre_enfermedad = coincidencia.group(2).strip()
-                codigo = coincidencia.group(3) if coincidencia.group(3) else None
-                
-                # Validar código si existe
-                if codigo and not self.validar_codigo_cie10(codigo):
-                    codigo = None
-                
-                # Limpiar nombre de enfermedad
-                nombre_enfermedad = re.sub(r'\s+', ' ', nombre_enfermedad)
-                nombre_enfermedad = nombre_enfermedad.strip('.,;')
-                
-                if nombre_enfermedad and len(nombre_enfermedad) > 3:
-                    enfermedad = {
-                        'numero': int(numero) if numero.isdigit() else len(enfermedades) + 1,
-                        'nombre': nombre_enfermedad,
-                        'codigo_cie10': codigo if codigo else 'XXXX',
-                        'observaciones': 'Sin código asignado' if not codigo else ''
-                    }
-                    enfermedades.append(enfermedad)
+                yield coincidencia.group(1), coincidencia.group(2).strip(), coincidencia.group(3) or None
+    
+    def iterar_validados(self, candidatos: Iterable[Tuple[str, str, Optional[str]]]) -> Iterator[Dict]:
+        """Registros de enfermedad con el código validado y el nombre limpio"""
+        emitidos = 0
+        for numero, nombre_enfermedad, codigo in candidatos:
+            # Validar código si existe
+            if codigo and not self.validar_codigo_cie10(codigo):
+                codigo = None
+            
+            # Limpiar nombre de enfermedad
+            nombre_enfermedad = PATRON_ESPACIOS.sub(' ', nombre_enfermedad)
+            nombre_enfermedad = nombre_enfermedad.strip('.,;')
+            
+            if nombre_enfermedad and len(nombre_enfermedad) > 3:
+                emitidos += 1
+                yield {
+                    'numero': int(numero) if numero.isdigit() else emitidos,
+                    'nombre': nombre_enfermedad,
+                    'codigo_cie10': codigo if codigo else 'XXXX',
+                    'observaciones': 'Sin código asignado' if not codigo else ''
+                }
+    
+    def extraer_enfermedades_y_codigos(self, texto: str) -> List[Dict]:
+        """
+        Extrae enfermedades y sus códigos CIE-10 del texto
+        Busca patrones como números seguidos de nombre de enfermedad y posible código
+        """
+        return list(self.iterar_validados(self.iterar_candidatos(texto.split('\n'))))
+    
+    def escanear_linea(self, linea: str) -> Iterator[Tuple[int, int, str]]:
+        """
+        (inicio, fin, código) de cada código CIE-10 de la línea, en un solo recorrido:
+        linea[inicio:fin] es el texto antes del código sin el número de lista
+        """
+        numero = PATRON_NUMERO_LISTA.match(linea)
+        inicio_nombre = numero.end() if numero else 0
+        for coincidencia in PATRON_CODIGO_CIE10.finditer(linea):
+            yield inicio_nombre, coincidencia.start(), coincidencia.group()
+    
+    def alternativos_de_linea(self, linea: str, codigos_encontrados: Optional[Dict[str, None]] = None) -> List[Tuple[str, str]]:
+        """
+        (nombre, código) de una línea según el método alternativo: el texto antes de cada código.
+        Si se pasa codigos_encontrados, agrega ahí todos los códigos de la línea.
+        """
+        linea = linea.strip()
+        encontrados = []
+        vistos = set()
+        for inicio, fin, codigo in self.escanear_linea(linea):
+            if codigos_encontrados is not None:
+                codigos_encontrados.setdefault(codigo)
+            # Muy corta para ser una enfermedad, o el código ya apareció antes en la línea
+            if len(linea) < 10 or codigo in vistos:
+                continue
+            vistos.add(codigo)
+            
+            nombre_candidato = linea[inicio:fin].strip()
+            if len(nombre_candidato) > 5:
+                encontrados.append((nombre_candidato, codigo))
+        return encontrados
+    
+    def iterar_alternativos(self, lineas: Iterable[str], codigos_encontrados: Optional[Dict[str, None]] = None) -> Iterator[Dict]:
+        """Registros del método alternativo, numerados en orden de aparición"""
+        contador = 0
+        for linea in lineas:
+            for nombre_candidato, codigo in self.alternativos_de_linea(linea, codigos_encontrados):
+                contador += 1
+                yield {
+                    'numero': contador,
+                    'nombre': nombre_candidato,
+                    'codigo_cie10': codigo,
+                    'observaciones': ''
+                }
+    
+    def alternativos_y_codigos(self, texto: str) -> Tuple[List[Dict], List[str]]:
+        """Registros del método alternativo y todos los códigos del texto, en una sola pasada por las líneas"""
+        codigos_encontrados = {}
+        enfermedades = list(self.iterar_alternativos(texto.split('\n'), codigos_encontrados))
+        return enfermedades, list(codigos_encontrados)
+    
+    def alternativos_y_codigos_split(self, texto: str) -> Tuple[List[Dict], List[str]]:
+        """
+        Implementación anterior (re.findall sin precompilar sobre el texto y sobre cada línea,
+        y linea.split(codigo) por cada código), como referencia
+        """
+        def buscar_patrones(texto):
+            coincidencias = re.compile(r'\b[A-Z]\d{2}[\dX]\b').findall(texto)
+            return list(set(codigo for codigo in coincidencias if self.validar_codigo_cie10(codigo)))
         
-        return enfermedades
+        codigos_encontrados = buscar_patrones(texto)
+        enfermedades = []
+        contador = 0
+        for linea in texto.split('\n'):
+            linea = linea.strip()
+            if len(linea) < 10:
+                continue
+            for codigo in buscar_patrones(linea):
+                partes = linea.split(codigo)
+                if len(partes) >= 2:
+                    nombre_candidato = re.sub(r'^\d+[\.\)]\s*', '', partes[0].strip())
+                    if len(nombre_candidato) > 5:
+                        contador += 1
+                        enfermedades.append({
+                            'numero': contador,
+                            'nombre': nombre_candidato,
+                            'codigo_cie10': codigo,
+                            'observaciones': ''
+                        })
+        return enfermedades, codigos_encontrados
     
     def buscar_enfermedades_alternativo(self, texto: str) -> List[Dict]:
         """
         Método alternativo para buscar enfermedades cuando el patrón principal falla
         """
-        enfermedades = []
-        
-        # Buscar todos los códigos CIE-10 en el texto
-        codigos_encontrados = self.buscar_patrones_cie10(texto)
+        enfermedades, codigos_encontrados = self.alternativos_y_codigos(texto)
         print(f"Códigos CIE-10 encontrados: {len(codigos_encontrados)}")
         print(f"Primeros 10 códigos: {codigos_encontrados[:10]}")
+        return enfermedades
+    
+    def derivar_alternativos(self, lineas: Iterable[str], alternativos: List[Dict],
+                             codigos_encontrados: Dict[str, None]) -> Iterator[str]:
+        """
+        Deja pasar las líneas sin cambios y, con cada una, agrega a `alternativos`
+        los registros del método alternativo y a `codigos_encontrados` todos los
+        códigos de la línea. Así ambos métodos recorren el PDF en la misma pasada
+        y el respaldo está listo si el patrón principal falla.
+        """
+        for linea in lineas:
+            for nombre_candidato, codigo in self.alternativos_de_linea(linea, codigos_encontrados):
+                alternativos.append({'numero': len(alternativos) + 1, 'nombre': nombre_candidato,
+                                     'codigo_cie10': codigo, 'observaciones': ''})
+            yield linea
+    
+    def escribir_filas_csv(self, enfermedades: Iterable[Dict], csvfile) -> Iterator[Dict]:
+        """Escribe cada enfermedad en el CSV a medida que llega y la devuelve para la siguiente etapa"""
+        writer = csv.DictWriter(csvfile, fieldnames=CAMPOS_CSV)
         
-        # Buscar líneas con posibles enfermedades
-        lineas = texto.split('\n')
-        contador = 0
-        
-        for i, linea in enumerate(lineas):
-            linea = linea.strip()
-            if len(linea) < 10:  # Muy corta para ser una enfermedad
-                continue
-            
-            # Buscar códigos CIE-10 en la línea
-            codigos_en_linea = self.buscar_patrones_cie10(linea)
-            
-            if codigos_en_linea:
-                # Extraer el nombre de la enfermedad (texto antes del código)
-                for codigo in codigos_en_linea:
-                    partes = linea.split(codigo)
-                    if len(partes) >= 2:
-                        nombre_candidato = partes[0].strip()
-                        # Limpiar números de lista del inicio
-                        nombre_candidato = re.sub(r'^\d+[\.\)]\s*', '', nombre_candidato)
-                        
-                        if len(nombre_candidato) > 5:
-                            contador += 1
-                            enfermedad = {
-                                'numero': contador,
-                                'nombre': nombre_candidato,
-                                'codigo_cie10': codigo,
-                                'observaciones': ''
-                            }
-                            enfermedades.append(enfermedad)
+        # Escribir encabezados
+        writer.writeheader()
         
-        return enfermedades
+        # Escribir datos
+        for enfermedad in enfermedades:
+            writer.writerow(fila_csv(enfermedad))
+            yield enfermedad
     
-    def generar_csv(self, enfermedades: List[Dict], archivo_salida: str):
-        """Genera el archivo CSV con las enfermedades y códigos"""
+    def generar_csv(self, enfermedades: Iterable[Dict], archivo_salida: str) -> Optional[Dict]:
+        """
+        Genera el archivo CSV con las enfermedades y códigos. Se escribe en un
+        temporal que solo reemplaza al archivo si todas las filas se escribieron,
+        como en guardar_texto. Devuelve el reporte de calidad, o None si falla.
+        """
+        temporal = archivo_salida + '.tmp'
         try:
-            with open(archivo_salida, 'w', newline='', encoding='utf-8') as csvfile:
-                campos = ['Número', 'Nombre_Enfermedad', 'Código_CIE10', 'Observaciones']
-                writer = csv.DictWriter(csvfile, fieldnames=campos)
-                
-                # Escribir encabezados
-                writer.writeheader()
-                
-                # Escribir datos
-                for enfermedad in enfermedades:
-                    writer.writerow({
-                        'Número': enfermedad['numero'],
-                        'Nombre_Enfermedad': enfermedad['nombre'],
-                        'Código_CIE10': enfermedad['codigo_cie10'],
-                        'Observaciones': enfermedad['observaciones']
-                    })
+            with open(temporal, 'w', newline='', encoding='utf-8') as csvfile:
+                reporte = self.generar_reporte_calidad(self.escribir_filas_csv(enfermedades, csvfile))
+            os.replace(temporal, archivo_salida)
             
             print(f"Archivo CSV generado: {archivo_salida}")
-            return True
+            return reporte
             
         except Exception as e:
             print(f"Error al generar CSV: {e}")
-            return False
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return None
     
-    def generar_reporte_calidad(self, enfermedades: List[Dict]) -> Dict:
-        """Genera reporte de control de calidad"""
-        total_enfermedades = len(enfermedades)
-        con_codigo = len([e for e in enfermedades if e['codigo_cie10'] != 'XXXX'])
-        sin_codigo = total_enfermedades - con_codigo
-        
-        codigos_unicos = set([e['codigo_cie10'] for e in enfermedades if e['codigo_cie10'] != 'XXXX'])
-        
-        reporte = {
-            'total_enfermedades': total_enfermedades,
-            'con_codigo_cie10': con_codigo,
-            'sin_codigo_cie10': sin_codigo,
-            'codigos_unicos': len(codigos_unicos),
-            'codigos_lista': sorted(list(codigos_unicos))
-        }
+    def generar_reporte_calidad(self, enfermedades: Iterable[Dict]) -> Dict:
+        """Genera reporte de control de calidad (en una sola pasada, sirve para generadores)"""
+        reporte = ReporteCalidad()
+        for enfermedad in enfermedades:
+            reporte.agregar(enfermedad)
+        return reporte.como_dict()
+    
+    def guardar_texto(self, textos_paginas: Iterable[str], archivo: str) -> Iterator[str]:
+        """
+        Copia el texto de cada página en `archivo` mientras pasa por el pipeline.
+        Se escribe en un temporal que solo reemplaza al archivo si el texto cambió.
+        """
+        temporal = archivo + '.tmp'
+        caracteres = 0
+        try:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                for texto_pagina in textos_paginas:
+                    f.write(texto_pagina + "\n")
+                    caracteres += len(texto_pagina) + 1
+                    yield texto_pagina
+        except BaseException:
+            # Error o pipeline abandonado a medias: el archivo anterior queda intacto
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
         
-        return reporte
+        print(f"Texto extraído: {caracteres} caracteres")
+        if os.path.exists(archivo) and filecmp.cmp(temporal, archivo, shallow=False):
+            os.remove(temporal)
+            print(f"'{archivo}' ya contiene este texto, no se reescribe")
+        else:
+            os.replace(temporal, archivo)
+            print(f"Texto guardado en '{archivo}' para revisión")
     
     def procesar(self) -> bool:
         """Método principal para procesar el PDF y generar el CSV"""
         print("=== EXTRACTOR DE CÓDIGOS CIE-10 ===")
         print(f"Procesando: {self.pdf_path}")
+        archivo_csv = "enfermedades_raras_cie10.csv"
         
-        # 1. Extraer texto del PDF
-        print("\n1. Extrayendo texto del PDF...")
-        texto = self.extraer_texto_pdf()
-        
-        if not texto:
-            print("Error: No se pudo extraer texto del PDF")
+        # 1. Extraer el texto página por página y las enfermedades línea por línea
+        # (el método alternativo en la misma pasada, por si el principal no encuentra nada)
+        print("\n1. Extrayendo texto, enfermedades y códigos (página por página)...")
+        alternativos = []
+        codigos_encontrados = {}
+        try:
+            textos = self.guardar_texto(self.iterar_textos_paginas(), 'texto_extraido.txt')
+            lineas = self.derivar_alternativos(self.iterar_lineas(textos), alternativos, codigos_encontrados)
+            enfermedades = list(self.iterar_validados(self.iterar_candidatos(lineas)))
+        except Exception as e:
+            print(f"Error al leer el PDF: {e}")
             return False
         
-        print(f"Texto extraído: {len(texto)} caracteres")
-        
-        # Guardar texto extraído para depuración
-        with open('texto_extraido.txt', 'w', encoding='utf-8') as f:
-            f.write(texto)
-        print("Texto guardado en 'texto_extraido.txt' para revisión")
-        
-        # 2. Extraer enfermedades y códigos
-        print("\n2. Extrayendo enfermedades y códigos...")
-        enfermedades = self.extraer_enfermedades_y_codigos(texto)
-        
         if not enfermedades:
-            print("No se encontraron enfermedades con el patrón principal. Probando método alternativo...")
-            enfermedades = self.buscar_enfermedades_alternativo(texto)
+            print("No se encontraron enfermedades con el patrón principal. Usando método alternativo...")
+            print(f"Códigos CIE-10 encontrados: {len(codigos_encontrados)}")
+            print(f"Primeros 10 códigos: {list(codigos_encontrados)[:10]}")
+            enfermedades = alternativos
         
         if not enfermedades:
             print("No se pudieron extraer enfermedades del documento")
             return False
         
-        self.enfermedades = enfermedades
+        # 2. Escribir el CSV (reemplaza al anterior solo si se escribió completo)
+        print("\n2. Generando archivo CSV...")
+        reporte = self.generar_csv(enfermedades, archivo_csv)
+        if reporte is None:
+            print("❌ Error al generar archivo CSV")
+            return False
         
-        # 3. Generar reporte de calidad
-        print("\n3. Generando reporte de calidad...")
-        reporte = self.generar_reporte_calidad(enfermedades)
+        self.reporte = reporte
         
+        # 3. Reporte de calidad
+        print("\n3. Reporte de calidad...")
         print(f"Total de enfermedades procesadas: {reporte['total_enfermedades']}")
         print(f"Con código CIE-10: {reporte['con_codigo_cie10']}")
         print(f"Sin código CIE-10: {reporte['sin_codigo_cie10']}")
         print(f"Códigos únicos encontrados: {reporte['codigos_unicos']}")
         
-        # 4. Generar CSV
-        print("\n4. Generando archivo CSV...")
-        archivo_csv = "enfermedades_raras_cie10.csv"
-        if self.generar_csv(enfermedades, archivo_csv):
-            print(f"✅ Proceso completado exitosamente")
-            print(f"📄 Archivo generado: {archivo_csv}")
-            return True
-        else:
-            print("❌ Error al generar archivo CSV")
-            return False
+        print(f"✅ Proceso completado exitosamente")
+        print(f"📄 Archivo generado: {archivo_csv}")
+        return True
 
 def main():
     """Función principal"""
-    pdf_path = "Resolución No. 023 de 2023.pdf"
+    parser = argparse.ArgumentParser(description="Extrae enfermedades raras y códigos CIE-10 del PDF de la resolución")
+    parser.add_argument("pdf", nargs='?', default="Resolución No. 023 de 2023.pdf", help="PDF de la resolución")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Procesos para extraer el texto de las páginas (0 = todos los núcleos)")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="Extraer todas las páginas sin usar ni actualizar la caché por página")
+    args = parser.parse_args()
+    
+    pdf_path = args.pdf
     
     if not os.path.exists(pdf_path):
         print(f"Error: No se encuentra el archivo {pdf_path}")
         return
     
-    extractor = ExtractorCIE10(pdf_path)
+    extractor = ExtractorCIE10(pdf_path, workers=args.workers or os.cpu_count(), usar_cache=not args.sin_cache)
     extractor.procesar()
 
 if __name__ == "__main__":
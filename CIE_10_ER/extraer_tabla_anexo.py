@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+EXTRACCIÓN POR COORDENADAS DE LA TABLA DEL ANEXO TÉCNICO
+Listado de enfermedades huérfanas de la resolución leído directamente del PDF
+
+extract_text() devuelve el texto en el orden del content stream y pierde las
+columnas: en la Resolución 023 (escaneada, con capa de texto OCR) el código de
+una fila puede salir antes que su número ("0878 1 3MC Sindrome de...") y los
+nombres de dos renglones quedan partidos alrededor del número. Por eso el
+listado se transcribía a mano (enfermedades_raras_huerfanas_listado_2023_colombia.txt).
+
+Este extractor lee cada fragmento de texto (Tj/TJ) con su posición, agrupa las
+posiciones x de cada página en las tres columnas de la tabla (número / nombre /
+código CIE-10) y asigna cada fragmento al número de fila más cercano en
+vertical, en una sola pasada por el PDF. Las filas que siguen en la página
+siguiente se unen a su número.
+
+Salida (mismo formato que el listado manual, "número nombre código"):
+    enfermedades_raras_listado_extraido.txt
+
+    python extraer_tabla_anexo.py
+    python procesar_manual.py enfermedades_raras_listado_extraido.txt
+
+Los códigos se escriben tal como los leyó el OCR (p. ej. 0878 por Q878):
+procesar_manual.py hace las mismas correcciones que con el listado manual.
+Usa la caché por página (con su propia versión, VERSION_TABLA) y el pool de
+procesos de ExtractorCIE10.
+
+Para decodificar cada fragmento se usa PyPDF2._cmap.build_char_map, una API
+privada (probada con PyPDF2 3.0.1). Si desaparece o cambia de forma, los
+fragmentos salen de la API pública extract_text(visitor_text=...): PyPDF2 ya
+une ahí algunos fragmentos del mismo renglón, así que la tabla sale peor pero
+sale, y se avisa por consola.
+"""
+
+import os
+import re
+import bisect
+import argparse
+import statistics
+from typing import List, Tuple, Dict, Iterable, Iterator, Optional
+
+try:
+    from PyPDF2._cmap import build_char_map    # API privada: puede cambiar en cualquier versión
+except ImportError:
+    build_char_map = None
+
+from cache_paginas_pdf import VERSION_EXTRACCION
+from extraer_cie10 import ExtractorCIE10, ReporteCalidad, PATRON_ESPACIOS
+
+# Cambiarla invalida las filas guardadas en la caché (la extracción de respaldo guarda las suyas aparte)
+VERSION_TABLA = f"{VERSION_EXTRACCION}/tabla-1{'' if build_char_map is not None else '/publica'}"
+ARCHIVO_LISTADO = 'enfermedades_raras_listado_extraido.txt'
+ARCHIVO_LISTADO_MANUAL = 'enfermedades_raras_huerfanas_listado_2023_colombia.txt'
+
+OPERADORES_TEXTO = (b'Tj', b'TJ', b"'", b'"')
+# Separación máxima (pt) entre inicios x consecutivos de una misma columna
+TOLERANCIA_COLUMNA = 8.0
+# Fragmentos mínimos para aceptar un grupo de posiciones x como columna
+MIN_FRAGMENTOS_COLUMNA = 5
+# Diferencia de altura (pt) hasta la cual dos fragmentos están en el mismo renglón
+TOLERANCIA_RENGLON = 3.0
+# Diferencia (pt) entre las distancias al número de arriba y al de abajo que se considera empate
+TOLERANCIA_EMPATE = 2.0
+# Distancia vertical máxima (pt) entre un código y el número de su fila
+VENTANA_CODIGOS = 45.0
+# Códigos seguidos como máximo en una misma fila
+MAX_CODIGOS_FILA = 8
+# Costo (pt) de dejar una fila sin código al repartir los códigos
+COSTO_FILA_SIN_CODIGO = 15.0
+# Los renglones de la columna de códigos más cortos que esto son ruido del OCR ("I", "—1")
+LONGITUD_MINIMA_CODIGO = 3
+# Desplazamiento en TJ (milésimas de em) a partir del cual se cuenta como espacio
+DESPLAZAMIENTO_ESPACIO = 200
+# Ancho medio de un carácter (en em) para repartir las palabras de un renglón en la extracción de respaldo
+ANCHO_CARACTER = 0.56
+
+# Último renglón del encabezado de la columna de códigos: "(CIE-10)" y sus lecturas OCR ("(CIE40)", "(CE-lo)", "C1E-10")
+PATRON_ENCABEZADO_CIE = re.compile(r'C[I1]?E\s*[-\d]')
+PATRON_NUMERO_FILA = re.compile(r'[\W_]*(\d{1,5})[\W_]*')    # El OCR a veces pega ruido: "_ 1090", "'1448"
+PATRON_RUIDO_CODIGO = re.compile(r'[^A-Za-z0-9()<-]')
+
+
+def _decodificar(datos, fuente) -> str:
+    """Texto de los bytes de un operador de texto con la codificación y el ToUnicode de la fuente"""
+    if isinstance(datos, str):
+        return datos
+    if fuente is None:
+        return datos.decode('charmap')
+    _, _, codificacion, mapa, _ = fuente
+    if isinstance(codificacion, str):
+        try:
+            texto = datos.decode(codificacion, 'surrogatepass')
+        except Exception:
+            texto = datos.decode('utf-16-be' if codificacion == 'charmap' else 'charmap', 'surrogatepass')
+    else:
+        texto = ''.join(codificacion.get(byte, chr(byte)) for byte in datos)
+    return ''.join(mapa.get(caracter, caracter) for caracter in texto)
+
+
+def _posicion(cm, tm) -> Tuple[float, float]:
+    return tm[4] * cm[0] + tm[5] * cm[2] + cm[4], tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+
+
+_aviso_api_publica = False
+
+
+def _avisar_api_publica(motivo):
+    global _aviso_api_publica
+    if not _aviso_api_publica:
+        _aviso_api_publica = True
+        print(f"⚠️  PyPDF2._cmap.build_char_map no disponible ({motivo}); "
+              f"se usa extract_text(visitor_text=...), menos preciso")
+
+
+def fragmentos_pagina(pagina) -> List[Tuple[float, float, str]]:
+    """
+    (x, y, texto) de cada operador de texto de la página, en coordenadas de la
+    página; con la API pública si la privada de PyPDF2 no está o falla
+    """
+    if build_char_map is None:
+        _avisar_api_publica('ImportError')
+        return fragmentos_api_publica(pagina)
+    try:
+        return fragmentos_api_privada(pagina)
+    except Exception as e:
+        _avisar_api_publica(f"{type(e).__name__}: {e}")
+        return fragmentos_api_publica(pagina)
+
+
+def repartir_palabras(texto: str, posiciones: List[Tuple[float, float]], ancho: float) -> List[Tuple[float, float, str]]:
+    """
+    Reparte las palabras de un renglón que PyPDF2 entregó unido entre los
+    operadores que lo forman: cada uno se lleva las que caben (a `ancho` pt por
+    carácter) antes de la x del siguiente, dejando al menos una para cada uno
+    de los que siguen.
+    """
+    palabras = texto.split()
+    fragmentos = []
+    for indice, (x, y) in enumerate(posiciones):
+        restantes = len(posiciones) - indice - 1
+        if not palabras:
+            break
+        if not restantes:
+            tomadas = len(palabras)
+        else:
+            espacio = posiciones[indice + 1][0] - x
+            tomadas = 1
+            while (tomadas < len(palabras) - restantes
+                   and len(' '.join(palabras[:tomadas + 1])) * ancho <= espacio):
+                tomadas += 1
+        fragmentos.append((x, y, ' '.join(palabras[:tomadas]) + ' '))
+        palabras = palabras[tomadas:]
+    return fragmentos
+
+
+def fragmentos_api_publica(pagina) -> List[Tuple[float, float, str]]:
+    """
+    (x, y, texto) con extract_text(visitor_text=...). PyPDF2 entrega el texto
+    acumulado al procesar el operador siguiente, y une los operadores de un
+    mismo renglón: sus palabras se reparten entre las posiciones de esos
+    operadores (repartir_palabras).
+    """
+    fragmentos = []
+    posiciones = []          # Operadores de texto cuyo texto aún no se entregó
+    actual_es_texto = False
+
+    def antes(operador, operandos, cm, tm):
+        nonlocal actual_es_texto
+        actual_es_texto = operador in OPERADORES_TEXTO
+        if actual_es_texto:
+            posiciones.append(_posicion(cm, tm))
+
+    def visitar(texto, cm, tm, fuente, tamano):
+        # El operador que se está procesando (si es de texto) aún no aportó nada
+        propias = posiciones[:-1] if actual_es_texto else posiciones[:]
+        del posiciones[:len(propias)]
+        if texto.strip() and propias:
+            ancho = ANCHO_CARACTER * tamano * abs(tm[0] * cm[0]) if tamano else 0.0
+            fragmentos.extend(repartir_palabras(texto, propias, ancho or ANCHO_CARACTER * 10))
+
+    pagina.extract_text(visitor_operand_before=antes, visitor_text=visitar)
+    return fragmentos
+
+
+def fragmentos_api_privada(pagina) -> List[Tuple[float, float, str]]:
+    """(x, y, texto) de cada operador de texto, decodificado con build_char_map"""
+    fragmentos = []
+    fuentes = {}
+    fuente = None
+
+    def visitar(operador, operandos, cm, tm):
+        nonlocal fuente
+        if operador == b'Tf':
+            nombre = operandos[0]
+            if nombre not in fuentes:
+                try:
+                    fuentes[nombre] = build_char_map(nombre, 200.0, pagina)
+                except Exception:
+                    fuentes[nombre] = None
+            fuente = fuentes[nombre]
+        elif operador in OPERADORES_TEXTO and operandos:
+            if operador == b'TJ':
+                texto = ''.join(' ' if isinstance(parte, (int, float)) and parte <= -DESPLAZAMIENTO_ESPACIO
+                                else _decodificar(parte, fuente) if isinstance(parte, (bytes, str)) else ''
+                                for parte in operandos[0])
+            else:
+                texto = _decodificar(operandos[-1], fuente)
+            if texto.strip():
+                fragmentos.append((*_posicion(cm, tm), texto))
+
+    pagina.extract_text(visitor_operand_before=visitar)
+    return fragmentos
+
+
+def agrupar_columnas(xs: Iterable[float]) -> Optional[Tuple[float, float, float]]:
+    """
+    Posición x (mediana) de las columnas número, nombre y código: los tres grupos
+    más poblados de inicios x separados por más de TOLERANCIA_COLUMNA.
+    None si la página no tiene tres columnas.
+    """
+    grupos = []
+    for x in sorted(xs):
+        if grupos and x - grupos[-1][-1] <= TOLERANCIA_COLUMNA:
+            grupos[-1].append(x)
+        else:
+            grupos.append([x])
+    columnas = sorted(grupos, key=len, reverse=True)[:3]
+    if len(columnas) < 3 or len(columnas[-1]) < MIN_FRAGMENTOS_COLUMNA:
+        return None
+    return tuple(sorted(statistics.median(grupo) for grupo in columnas))
+
+
+def _renglones(fragmentos: List[Tuple[float, float, str]]) -> List[str]:
+    """Textos de los fragmentos agrupados en renglones (de arriba hacia abajo, cada uno de izquierda a derecha)"""
+    renglones = []
+    for x, y, texto in sorted(fragmentos, key=lambda fragmento: -fragmento[1]):
+        if renglones and renglones[-1][0] - y <= TOLERANCIA_RENGLON:
+            renglones[-1][1].append((x, texto))
+        else:
+            renglones.append((y, [(x, texto)]))
+    return [' '.join(texto for _, texto in sorted(partes)) for _, partes in renglones]
+
+
+def _fila_de(y: float, alturas: List[float], continua_arriba: bool) -> int:
+    """
+    Índice del número de fila al que pertenece un fragmento a la altura y, o -1
+    si es la continuación de la última fila de la página anterior. alturas son
+    las de los números, negadas (de arriba hacia abajo). El más cercano gana; en
+    un empate, o si no hay número arriba, decide continua_arriba.
+    """
+    posicion = bisect.bisect_right(alturas, -y)
+    arriba = posicion - 1 if posicion > 0 else None
+    abajo = posicion if posicion < len(alturas) else None
+    if abajo is None:
+        return arriba if arriba is not None else -1
+    distancia_abajo = y + alturas[abajo]
+    if arriba is None:
+        # Alineado con el primer número, o primer renglón de un nombre partido alrededor de él
+        if distancia_abajo <= 2 * TOLERANCIA_RENGLON or not continua_arriba:
+            return abajo
+        return -1
+    distancia_arriba = -alturas[arriba] - y
+    if abs(distancia_arriba - distancia_abajo) > TOLERANCIA_EMPATE:
+        return arriba if distancia_arriba < distancia_abajo else abajo
+    return arriba if continua_arriba else abajo
+
+
+def _codigos(fragmentos: List[Tuple[float, float, str]]) -> List[str]:
+    """Un código por renglón de la columna de códigos (partes del mismo renglón unidas: "D71 X" → D71X)"""
+    codigos = [renglon.replace(' ', '') for renglon in _renglones(fragmentos)]
+    return [codigo for codigo in codigos if len(codigo) >= LONGITUD_MINIMA_CODIGO]
+
+
+def repartir_codigos(alturas_codigos: List[float], alturas_numeros: List[float]) -> Optional[List[int]]:
+    """
+    Índice de fila de cada código (alturas de arriba hacia abajo). Los códigos de
+    una fila forman un bloque contiguo centrado en su número (Drepanocitosis: cinco
+    códigos, dos por encima y dos por debajo), así que el más cercano no sirve: se
+    reparten en bloques contiguos minimizando la distancia del centro de cada bloque
+    a su número, más COSTO_FILA_SIN_CODIGO por cada fila vacía (programación
+    dinámica). None si algún código no tiene número a menos de VENTANA_CODIGOS.
+    """
+    total = len(alturas_codigos)
+    costos = [0.0] + [float('inf')] * total    # costos[i]: mejor reparto de los primeros i códigos
+    bloques = []                               # bloques[fila][i]: códigos de esa fila en ese reparto
+    for altura_numero in alturas_numeros:
+        nuevos = [costo + COSTO_FILA_SIN_CODIGO for costo in costos]
+        tamanos = [0] * (total + 1)
+        for i in range(1, total + 1):
+            suma = 0.0
+            for tamano in range(1, min(MAX_CODIGOS_FILA, i) + 1):
+                altura = alturas_codigos[i - tamano]
+                if abs(altura - altura_numero) > VENTANA_CODIGOS:
+                    break
+                suma += altura
+                costo = costos[i - tamano] + abs(suma / tamano - altura_numero)
+                if costo < nuevos[i]:
+                    nuevos[i], tamanos[i] = costo, tamano
+        costos = nuevos
+        bloques.append(tamanos)
+    if costos[total] == float('inf'):
+        return None
+
+    filas = [0] * total
+    i = total
+    for fila in range(len(alturas_numeros) - 1, -1, -1):
+        tamano = bloques[fila][i]
+        filas[i - tamano:i] = [fila] * tamano
+        i -= tamano
+    return filas
+
+
+def _empieza_en_minuscula(texto: str) -> bool:
+    """Los renglones que continúan un nombre suelen empezar en minúscula ("severa", "retraso en el desarrollo")"""
+    for caracter in texto:
+        if caracter.isalpha():
+            return caracter.islower()
+    return False
+
+
+def filas_pagina(fragmentos: List[Tuple[float, float, str]]) -> List[Tuple[str, str, List[str]]]:
+    """
+    (número, nombre, códigos) de cada fila de la tabla en la página, de arriba
+    hacia abajo. La primera tiene número '' si continúa la fila de la página
+    anterior. Lista vacía si la página no tiene la tabla.
+    """
+    columnas = agrupar_columnas(x for x, _, _ in fragmentos)
+    if columnas is None:
+        return []
+    x_numero, x_nombre, x_codigo = columnas
+
+    # El encabezado de la columna de códigos está centrado: se busca a la derecha de la mitad entre nombre y código
+    encabezados = [y for x, y, texto in fragmentos
+                   if x >= (x_nombre + x_codigo) / 2 and PATRON_ENCABEZADO_CIE.search(texto)]
+    if not encabezados:
+        return []
+    limite = max(encabezados) - TOLERANCIA_RENGLON
+
+    numeros, nombres, codigos = [], [], []
+    for x, y, texto in fragmentos:
+        texto = PATRON_ESPACIOS.sub(' ', texto).strip()
+        if y >= limite or not texto:
+            continue
+        if abs(x - x_numero) <= TOLERANCIA_COLUMNA:
+            numero = PATRON_NUMERO_FILA.fullmatch(texto)
+            if numero:
+                numeros.append((y, numero.group(1)))
+        elif x >= x_codigo - TOLERANCIA_COLUMNA:
+            codigo = PATRON_RUIDO_CODIGO.sub('', texto).strip('-')
+            if codigo:
+                codigos.append((x, y, codigo))
+        elif x >= x_nombre - TOLERANCIA_COLUMNA and any(caracter.isalnum() for caracter in texto):
+            nombres.append((x, y, texto))
+
+    numeros.sort(key=lambda numero: -numero[0])
+    alturas = [-y for y, _ in numeros]
+    # Índice -1: continuación de la fila de la página anterior
+    partes_nombre = {indice: [] for indice in range(-1, len(numeros))}
+    partes_codigo = {indice: [] for indice in range(-1, len(numeros))}
+    for x, y, texto in nombres:
+        partes_nombre[_fila_de(y, alturas, _empieza_en_minuscula(texto))].append((x, y, texto))
+    codigos.sort(key=lambda codigo: -codigo[1])
+    filas_codigos = repartir_codigos([y for _, y, _ in codigos], [y for y, _ in numeros])
+    if filas_codigos is None:
+        filas_codigos = [_fila_de(y, alturas, False) for _, y, _ in codigos]
+    for fila, codigo in zip(filas_codigos, codigos):
+        partes_codigo[fila].append(codigo)
+
+    filas = []
+    if partes_nombre[-1] or partes_codigo[-1]:
+        filas.append(('', ' '.join(_renglones(partes_nombre[-1])), _codigos(partes_codigo[-1])))
+    for indice, (_, numero) in enumerate(numeros):
+        filas.append((numero, ' '.join(_renglones(partes_nombre[indice])), _codigos(partes_codigo[indice])))
+    return filas
+
+
+def extraer_tabla_pagina(pagina) -> str:
+    """Filas de la tabla de una página como texto, una por renglón: número<TAB>nombre<TAB>códigos"""
+    return '\n'.join(f"{numero}\t{nombre}\t{' '.join(codigos)}"
+                     for numero, nombre, codigos in filas_pagina(fragmentos_pagina(pagina)))
+
+
+def leer_listado(archivo: str) -> Dict[str, Dict]:
+    """{número: {'nombre', 'codigos'}} de un listado "número nombre código" (manual o extraído)"""
+    filas = {}
+    with open(archivo, 'r', encoding='utf-8') as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) < 2:
+                continue
+            fila = filas.setdefault(partes[0], {'nombre': ' '.join(partes[1:-1]), 'codigos': set()})
+            fila['codigos'].add(partes[-1])
+    return filas
+
+
+def _normalizar_nombre(nombre: str) -> str:
+    return ''.join(caracter for caracter in nombre.lower() if caracter.isalnum())
+
+
+def comparar_con_listado(archivo: str, archivo_referencia: str) -> Dict:
+    """Coincidencia por número de fila entre el listado extraído y uno de referencia (el manual)"""
+    extraido = leer_listado(archivo)
+    referencia = leer_listado(archivo_referencia)
+    comunes = [numero for numero in referencia if numero in extraido]
+    return {
+        'filas_referencia': len(referencia),
+        'filas_extraidas': len(extraido),
+        'numeros_comunes': len(comunes),
+        'codigos_iguales': sum(1 for numero in comunes if extraido[numero]['codigos'] == referencia[numero]['codigos']),
+        'nombres_iguales': sum(1 for numero in comunes
+                               if _normalizar_nombre(extraido[numero]['nombre']) == _normalizar_nombre(referencia[numero]['nombre'])),
+        'faltantes': [numero for numero in referencia if numero not in extraido],
+        'sobrantes': [numero for numero in extraido if numero not in referencia],
+    }
+
+
+class ExtractorTablaAnexo(ExtractorCIE10):
+    """
+    Pipeline de generadores desde el PDF hasta el listado:
+
+        páginas (filas por coordenadas) → renglones → filas completas → registros → listado
+    """
+    extraer_pagina = staticmethod(extraer_tabla_pagina)
+    version_cache = VERSION_TABLA
+
+    def iterar_filas(self, lineas: Iterable[str]) -> Iterator[Tuple[int, str, List[str]]]:
+        """(número, nombre, códigos) de cada fila, con la continuación que abre una página unida a la fila anterior"""
+        pendiente = None
+        for linea in lineas:
+            if not linea:
+                continue
+            numero, nombre, codigos = linea.split('\t')
+            if not numero:
+                if pendiente is not None:
+                    pendiente[1] = f"{pendiente[1]} {nombre}".strip()
+                    pendiente[2].extend(codigos.split())
+                continue
+            if pendiente is not None:
+                yield tuple(pendiente)
+            pendiente = [int(numero), nombre, codigos.split()]
+        if pendiente is not None:
+            yield tuple(pendiente)
+
+    def iterar_registros(self, filas: Iterable[Tuple[int, str, List[str]]]) -> Iterator[Dict]:
+        """Un registro por código de cada fila, como en el listado manual ('XXXX' si la fila no tiene código)"""
+        for numero, nombre, codigos in filas:
+            for codigo in codigos or ['XXXX']:
+                yield {
+                    'numero': numero,
+                    'nombre': nombre,
+                    'codigo_cie10': codigo,
+                    'observaciones': 'Sin código asignado' if codigo == 'XXXX' else ''
+                }
+
+    def procesar(self, archivo_salida: str = ARCHIVO_LISTADO) -> bool:
+        """Extrae la tabla del anexo y escribe el listado "número nombre código" """
+        print("=== EXTRACTOR DE LA TABLA DEL ANEXO (POR COORDENADAS) ===")
+        print(f"Procesando: {self.pdf_path}")
+
+        print("\n1. Extrayendo filas por columnas (página por página)...")
+        reporte = ReporteCalidad()
+        formato_valido = 0
+        # Temporal que reemplaza al listado solo si la tabla se extrajo completa (como generar_csv)
+        temporal = archivo_salida + '.tmp'
+        try:
+            with open(temporal, 'w', encoding='utf-8') as f:
+                filas = self.iterar_filas(self.iterar_lineas(self.iterar_textos_paginas()))
+                for registro in self.iterar_registros(filas):
+                    f.write(f"{registro['numero']} {registro['nombre']} {registro['codigo_cie10']}\n")
+                    reporte.agregar(registro)
+                    if self.validar_codigo_cie10(registro['codigo_cie10']):
+                        formato_valido += 1
+        except Exception as e:
+            print(f"❌ Error al extraer la tabla: {e}")
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            return False
+
+        self.reporte = reporte.como_dict()
+        if not self.reporte['total_enfermedades']:
+            os.remove(temporal)
+            print("❌ No se encontró la tabla del anexo en el documento")
+            return False
+        os.replace(temporal, archivo_salida)
+
+        print("\n2. Reporte de calidad...")
+        print(f"Registros extraídos: {self.reporte['total_enfermedades']}")
+        print(f"Con código CIE-10: {self.reporte['con_codigo_cie10']} "
+              f"({formato_valido} con formato válido sin corregir)")
+        print(f"Sin código CIE-10: {self.reporte['sin_codigo_cie10']}")
+        print(f"Códigos únicos encontrados: {self.reporte['codigos_unicos']}")
+
+        print("✅ Proceso completado exitosamente")
+        print(f"📄 Archivo generado: {archivo_salida}")
+        return True
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Extrae por coordenadas la tabla de enfermedades del anexo técnico")
+    parser.add_argument("pdf", nargs='?', default="Resolución No. 023 de 2023.pdf", help="PDF de la resolución")
+    parser.add_argument("--salida", default=ARCHIVO_LISTADO, help=f"Listado de salida (default: {ARCHIVO_LISTADO})")
+    parser.add_argument("--comparar", default=ARCHIVO_LISTADO_MANUAL,
+                        help="Listado de referencia para comparar fila por fila (default: el listado manual)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Procesos para extraer las páginas (0 = todos los núcleos)")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="Extraer todas las páginas sin usar ni actualizar la caché por página")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf):
+        print(f"Error: No se encuentra el archivo {args.pdf}")
+        return
+
+    extractor = ExtractorTablaAnexo(args.pdf, workers=args.workers or os.cpu_count(), usar_cache=not args.sin_cache)
+    if not extractor.procesar(args.salida):
+        return
+
+    if args.comparar and os.path.exists(args.comparar):
+        comparacion = comparar_con_listado(args.salida, args.comparar)
+        comunes = comparacion['numeros_comunes'] or 1
+        print(f"\n3. Comparación con {args.comparar}...")
+        print(f"Filas: {comparacion['filas_extraidas']} extraídas, {comparacion['filas_referencia']} en la referencia, "
+              f"{comparacion['numeros_comunes']} en común")
+        print(f"Mismos códigos: {comparacion['codigos_iguales']} ({comparacion['codigos_iguales'] / comunes:.1%})")
+        print(f"Mismo nombre: {comparacion['nombres_iguales']} ({comparacion['nombres_iguales'] / comunes:.1%})")
+        if comparacion['faltantes']:
+            print(f"⚠️ Números que faltan: {', '.join(comparacion['faltantes'][:20])}")
+        if comparacion['sobrantes']:
+            print(f"⚠️ Números que no están en la referencia: {', '.join(comparacion['sobrantes'][:20])}")
+
+    print(f"\n➡️  Siguiente paso: python procesar_manual.py {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
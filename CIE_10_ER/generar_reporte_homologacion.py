@@ -2,24 +2,37 @@
 """
 Generador de reporte de homologación mejorado
 Convierte los resultados de la homologación directa al formato esperado
+
+Lee del almacén de resultados (almacen_resultados.py) la corrida 'directa' del
+CSV de entrada, filtrando las coincidencias en SQL; si el almacén aún no la
+tiene, importa una vez el CSV.
 """
 
 import pandas as pd
 from datetime import datetime
 import sys
 
-def convertir_a_formato_esperado(archivo_homologacion):
+from almacen_resultados import AlmacenResultados
+
+def convertir_a_formato_esperado(archivo_homologacion, almacen=None):
     """
-    Convierte el archivo de homologación al formato esperado similar a homologacion_orphanet_escalable
+    Convierte el archivo de homologación al formato esperado similar a homologacion_orphanet_escalable.
+    Con `almacen` se usa la corrida 'directa' de archivo_homologacion (importada si hace falta).
     """
     print(f"🔄 Procesando archivo: {archivo_homologacion}")
     
     try:
-        df = pd.read_csv(archivo_homologacion, encoding='utf-8')
-        print(f"📊 Total de registros: {len(df)}")
-        
-        # Filtrar solo las coincidencias encontradas
-        df_encontrados = df[df['encontrado'] == True].copy()
+        if almacen is not None:
+            # Solo las coincidencias encontradas: el filtro se resuelve en SQL
+            print(f"📊 Total de registros: {almacen.contar(corrida=almacen.corrida_para('directa', archivo_homologacion))}")
+            df_encontrados = almacen.cargar_corrida('directa', archivo_respaldo=archivo_homologacion,
+                                                    encontrado=True)
+        else:
+            df = pd.read_csv(archivo_homologacion, encoding='utf-8')
+            print(f"📊 Total de registros: {len(df)}")
+            
+            # Filtrar solo las coincidencias encontradas
+            df_encontrados = df[df['encontrado'] == True].copy()
         print(f"✅ Coincidencias encontradas: {len(df_encontrados)}")
         
         # Crear el formato de salida esperado
@@ -60,12 +73,12 @@ def convertir_a_formato_esperado(archivo_homologacion):
         print(f"❌ Error procesando archivo: {e}")
         return None
 
-def generar_estadisticas(df_original, df_convertido):
+def generar_estadisticas(total_colombia, df_convertido):
     """Genera estadísticas comparativas"""
     stats = {
-        'total_colombia': len(df_original),
+        'total_colombia': total_colombia,
         'total_coincidencias': len(df_convertido),
-        'tasa_exito': (len(df_convertido) / len(df_original)) * 100,
+        'tasa_exito': (len(df_convertido) / total_colombia) * 100,
         'matches_exactos': len(df_convertido[df_convertido['Tipo_Match'] == 'nombre_exacto']),
         'matches_muy_similares': len(df_convertido[df_convertido['Tipo_Match'] == 'nombre_muy_similar']),
         'matches_similares': len(df_convertido[df_convertido['Tipo_Match'] == 'nombre_similar']),
@@ -80,10 +93,11 @@ def main():
     print("🚀 GENERADOR DE REPORTE DE HOMOLOGACIÓN")
     print("=" * 55)
     
-    # Leer archivo original para estadísticas
-    try:
-        df_original = pd.read_csv(archivo_entrada, encoding='utf-8')
-    except FileNotFoundError:
+    almacen = AlmacenResultados()
+    
+    # Corrida directa del CSV de entrada; la primera vez se importa al almacén
+    corrida_id = almacen.corrida_para('directa', archivo_entrada)
+    if corrida_id is None:
         print(f"❌ No se encontró el archivo: {archivo_entrada}")
         print("📋 Archivos disponibles:")
         import glob
@@ -93,7 +107,7 @@ def main():
         sys.exit(1)
     
     # Convertir al formato esperado
-    df_convertido = convertir_a_formato_esperado(archivo_entrada)
+    df_convertido = convertir_a_formato_esperado(archivo_entrada, almacen)
     
     if df_convertido is None:
         sys.exit(1)
@@ -104,9 +118,10 @@ def main():
     
     # Guardar resultado
     df_convertido.to_csv(archivo_salida, index=False, encoding='utf-8-sig')
+    almacen.guardar_corrida('final', df_convertido, archivo=archivo_salida)
     
     # Generar estadísticas
-    stats = generar_estadisticas(df_original, df_convertido)
+    stats = generar_estadisticas(almacen.contar(corrida=corrida_id), df_convertido)
     
     print("=" * 55)
     print("📊 ESTADÍSTICAS FINALES")
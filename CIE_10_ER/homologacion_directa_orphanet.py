@@ -1,51 +1,38 @@
 import requests
-import zipfile
-import io
-import xmltodict
 import pandas as pd
 from thefuzz import process, fuzz
 from datetime import datetime
 import os
 import sys
-import re
+import argparse
+import multiprocessing
+
+from indice_orphanet import IndiceOrphanet, obtener_indice, normalizar_nombre, MAX_CANDIDATOS
+from matriz_similitud import mejores_por_scorer, top_k_por_fila, procesar_opciones, procesar_consultas, SCORERS
+from almacen_resultados import AlmacenResultados
+from metricas import obtener_metricas, LIMITES_CONTEOS
+
+# Por debajo de este puntaje (confianza media) el bloqueo se verifica contra el índice completo
+UMBRAL_REVISION_COMPLETA = 70
 
 def descargar_y_procesar_orphanet(product_id="product1"):
     """
     Descarga y procesa los datos de enfermedades raras desde Orphadata.
     Utiliza los ficheros "free products" para obtener la información más completa y actualizada.
+    Devuelve el índice precompilado de nombres (ver indice_orphanet.py), que se construye
+    una sola vez por versión y se guarda junto al snapshot local.
     """
     print(f"🔄 Descargando y procesando datos de Orphanet (producto: {product_id})...")
     try:
-        # Obtener la URL del archivo XML desde los metadatos
-        meta_url = f"http://www.orphadata.org/cgi-bin/free_{product_id}_cross_xml.json"
-        meta_response = requests.get(meta_url, timeout=60)
-        meta_response.raise_for_status()
-        meta_list = meta_response.json()
-
-        # Buscar la URL del archivo en español
-        xml_url = None
-        version_date = 'N/A'
-        for item in meta_list:
-            if isinstance(item, dict) and item.get('aLanguage') == 'Spanish':
-                xml_url = item.get('anUrl')
-                version_date = item.get('aDate')
-                break
+        # Obtener el índice de la versión vigente (desde caché si ya existe)
+        indice, version_date = obtener_indice(product_id, idioma='Spanish')
         
-        if not xml_url:
+        if indice is None:
             print("❌ Error: No se encontró la URL para el archivo XML en español.", file=sys.stderr)
             return None, None
-
-        print(f"🔗 URL del archivo XML: {xml_url}")
-        
-        # Descargar el archivo XML directamente
-        xml_response = requests.get(xml_url, timeout=120)
-        xml_response.raise_for_status()
-        
-        # Parsear el contenido XML
-        data = xmltodict.parse(xml_response.content)
         
-        print(f"✅ Datos de Orphanet descargados y parseados (versión: {version_date})")
-        return data, version_date
+        print(f"✅ Índice de Orphanet disponible (versión: {version_date}): {indice.total_disorders} enfermedades")
+        return indice, version_date
         
     except requests.exceptions.RequestException as e:
         print(f"❌ Error de red al descargar los datos de Orphanet: {e}", file=sys.stderr)
@@ -54,49 +41,6 @@ def descargar_y_procesar_orphanet(product_id="product1"):
         print(f"❌ Error inesperado al procesar los datos de Orphanet: {e}", file=sys.stderr)
         return None, None
 
-def normalizar_datos_orphanet(data):
-    """
-    Normaliza los datos XML de Orphanet en un DataFrame de pandas fácil de usar.
-    Extrae nombres, sinónimos y códigos CIE-10.
-    """
-    print("🔄 Normalizando datos de Orphanet a un formato tabular...")
-    disorders = data.get('JDBOR', {}).get('DisorderList', {}).get('Disorder', [])
-    
-    orphanet_list = []
-    for disorder in disorders:
-        orpha_number = disorder.get('OrphaNumber')
-        nombre_oficial = disorder.get('Name', {}).get('#text')
-        
-        # Extraer todos los nombres y sinónimos para mejorar la búsqueda
-        nombres_y_sinonimos = {nombre_oficial}
-        if 'SynonymList' in disorder and disorder['SynonymList']:
-            synonyms = disorder['SynonymList'].get('Synonym', [])
-            if not isinstance(synonyms, list):
-                synonyms = [synonyms]
-            for syn in synonyms:
-                nombres_y_sinonimos.add(syn.get('#text'))
-
-        # Extraer códigos CIE-10
-        codigos_cie10 = []
-        if 'ExternalReferenceList' in disorder and disorder['ExternalReferenceList']:
-            references = disorder['ExternalReferenceList'].get('ExternalReference', [])
-            if not isinstance(references, list):
-                references = [references]
-            for ref in references:
-                if ref.get('Source') == 'ICD-10':
-                    codigos_cie10.append(ref.get('Reference'))
-        
-        orphanet_list.append({
-            'orpha_number': orpha_number,
-            'nombre_oficial': nombre_oficial,
-            'nombres_y_sinonimos': list(nombres_y_sinonimos),
-            'codigos_cie10_orphanet': codigos_cie10
-        })
-        
-    df_orphanet = pd.DataFrame(orphanet_list)
-    print(f"✅ Datos de Orphanet normalizados. Total: {len(df_orphanet)} enfermedades.")
-    return df_orphanet
-
 def cargar_dataset_colombia(archivo_csv):
     """Carga el dataset de enfermedades de Colombia desde un archivo CSV."""
     print(f"🔄 Cargando dataset de Colombia desde '{archivo_csv}'...")
@@ -141,105 +85,232 @@ def cargar_dataset_colombia(archivo_csv):
         print(f"❌ Error cargando el dataset de Colombia: {e}", file=sys.stderr)
         return None
 
-def encontrar_mejor_match(nombre_colombia, choices_dict):
+def encontrar_mejor_match(nombre_colombia, indice, max_candidatos=MAX_CANDIDATOS):
     """
-    Encuentra la mejor coincidencia para un nombre de enfermedad en la lista de Orphanet.
+    Encuentra la mejor coincidencia para un nombre de enfermedad en el índice de Orphanet.
     Utiliza múltiples estrategias de búsqueda para mejorar la precisión.
+    Con max_candidatos > 0 los scorers fuzzy solo ven los nombres preseleccionados
+    por el índice de trigramas; con 0 se recorre el índice completo. Si el mejor
+    candidato queda por debajo de la confianza media se repite sin bloqueo, para que
+    los nombres cortos o atípicos no pierdan coincidencias; esa revisión se puntúa
+    con rapidfuzz (_revision_completa), con los mismos puntajes que thefuzz.
     """
-    # Limpiar el nombre de búsqueda
-    nombre_limpio = limpiar_nombre_enfermedad(nombre_colombia)
+    # Limpiar el nombre de búsqueda (misma regla que el índice)
+    nombre_limpio = normalizar_nombre(nombre_colombia)
+    
+    # Estrategia 1: Búsqueda exacta (insensible a mayúsculas y tildes) en el índice hash
+    metricas = obtener_metricas()
+    i = indice.buscar_exacto(nombre_limpio)
+    if i is not None:
+        metricas.contador('busqueda_exacta', resultado='acierto')
+        return indice.registro_de_entrada(i), 100
+    metricas.contador('busqueda_exacta', resultado='fallo')
     
-    # Estrategia 1: Búsqueda exacta (insensible a mayúsculas)
-    for choice_name, choice_data in choices_dict.items():
-        if choice_name.lower() == nombre_limpio.lower():
-            return choice_data, 100
+    return _mejor_match_fuzzy(nombre_limpio, indice, max_candidatos)
+
+
+def _mejor_match_fuzzy(nombre_limpio, indice, max_candidatos):
+    """Estrategia 2: Búsqueda fuzzy con diferentes algoritmos sobre los candidatos"""
+    nombres = indice.nombres()
+    if max_candidatos:
+        opciones = {i: nombres[i] for i in indice.candidatos(nombre_limpio, limite=max_candidatos)}
+    else:
+        opciones = {i: nombres[i] for i in indice.entradas_fuzzy()}
     
-    # Estrategia 2: Búsqueda fuzzy con diferentes algoritmos
     algoritmos = [fuzz.token_set_ratio, fuzz.token_sort_ratio, fuzz.ratio]
     mejores_resultados = []
     
-    for algoritmo in algoritmos:
-        result = process.extractOne(nombre_limpio, choices_dict.keys(), scorer=algoritmo)
-        if result:
-            best_match_name = result[0]
-            score = result[1]
-            mejores_resultados.append((choices_dict[best_match_name], score, algoritmo.__name__))
+    metricas = obtener_metricas()
+    modo = 'bloqueo' if max_candidatos else 'completo'
+    metricas.observar('candidatos_fuzzy', len(opciones), limites=LIMITES_CONTEOS, modo=modo)
+    with metricas.temporizador('busqueda_fuzzy', modo=modo):
+        for algoritmo in algoritmos:
+            result = process.extractOne(nombre_limpio, opciones, scorer=algoritmo)
+            if result:
+                score = result[1]
+                best_data = indice.registro_de_entrada(result[2])
+                mejores_resultados.append((best_data, score, algoritmo.__name__))
     
     # Seleccionar el mejor resultado
     if mejores_resultados:
         mejores_resultados.sort(key=lambda x: x[1], reverse=True)
         best_data, best_score, algorithm_used = mejores_resultados[0]
+        if max_candidatos and best_score < UMBRAL_REVISION_COMPLETA:
+            return _revision_completa(nombre_limpio, indice)
         return best_data, best_score
-        
+    
+    if max_candidatos:
+        return _revision_completa(nombre_limpio, indice)
     return None, 0
 
-def limpiar_nombre_enfermedad(nombre):
+
+# Nombres del índice ya procesados para cada scorer (ruta del artefacto -> {scorer: opciones})
+_opciones_revision = {}
+
+
+def _revision_completa(nombre_limpio, indice):
     """
-    Limpia y normaliza nombres de enfermedades para mejorar las coincidencias.
+    Mismo resultado que _mejor_match_fuzzy sin bloqueo, pero puntuando la fila
+    contra todo el índice con rapidfuzz (ver matriz_similitud): es la red de
+    seguridad del bloqueo y con thefuzz costaba más que todas las búsquedas
+    bloqueadas juntas.
     """
-    if not nombre or pd.isna(nombre):
-        return ""
+    entradas = indice.entradas_fuzzy()
+    if not entradas:
+        return None, 0
+    opciones = _opciones_revision.get(indice.ruta)
+    if opciones is None:
+        nombres = indice.nombres()
+        textos = [nombres[i] for i in entradas]
+        opciones = _opciones_revision[indice.ruta] = {
+            nombre_scorer: procesar_opciones(textos, forzar_ascii) for nombre_scorer, _, forzar_ascii in SCORERS}
     
-    # Convertir a string y limpiar
-    nombre = str(nombre).strip()
+    metricas = obtener_metricas()
+    metricas.observar('candidatos_fuzzy', len(entradas), limites=LIMITES_CONTEOS, modo='revision')
+    with metricas.temporizador('busqueda_fuzzy', modo='revision'):
+        # En empates gana el primer scorer, igual que el ordenamiento estable de _mejor_match_fuzzy
+        best_i, best_score = None, -1
+        for nombre_scorer, scorer, forzar_ascii in SCORERS:
+            indices, puntajes = top_k_por_fila(procesar_consultas([nombre_limpio], forzar_ascii),
+                                               opciones[nombre_scorer], scorer, k=1)
+            score = int(round(puntajes[0, 0]))
+            if score > best_score:
+                best_i, best_score = entradas[int(indices[0, 0])], score
+    return indice.registro_de_entrada(best_i), best_score
+
+
+def encontrar_mejores_matches_matriz(nombres_colombia, indice, top_k=5):
+    """
+    Versión por lotes de encontrar_mejor_match: calcula la matriz de similitud
+    (nombres de Colombia × índice completo) con rapidfuzz.cdist y devuelve una
+    lista de (match_data, score) en el mismo orden que nombres_colombia.
+    Los puntajes son idénticos a los de la búsqueda nombre por nombre sin bloqueo.
+    """
+    entradas = indice.entradas_fuzzy()
+    nombres = [indice.nombres()[i] for i in entradas]
+    nombres_limpios = [normalizar_nombre(n) for n in nombres_colombia]
+    matches = [None] * len(nombres_limpios)
     
-    # Normalizar texto común
-    reemplazos = {
-        'Sindrome': 'Síndrome',
-        'sindrome': 'síndrome', 
-        'Deficiencia': 'Deficiencia',
-        'deficiencia': 'deficiencia',
-        'Déficit': 'Deficiencia',
-        'déficit': 'deficiencia',
-        'Acidemia': 'Acidemia',
-        'acidemia': 'acidemia',
-        'Aciduria': 'Aciduria',
-        'aciduria': 'aciduria'
-    }
+    # Estrategia 1: Búsqueda exacta (insensible a mayúsculas y tildes) en el índice hash
+    pendientes = []
+    for fila, nombre_limpio in enumerate(nombres_limpios):
+        i = indice.buscar_exacto(nombre_limpio)
+        if i is not None:
+            matches[fila] = (indice.registro_de_entrada(i), 100)
+        else:
+            pendientes.append(fila)
     
-    for original, normalizado in reemplazos.items():
-        nombre = nombre.replace(original, normalizado)
+    if not pendientes:
+        return matches
+    if not nombres:
+        for fila in pendientes:
+            matches[fila] = (None, 0)
+        return matches
     
-    # Eliminar caracteres especiales problemáticos
-    nombre = re.sub(r'[^\w\sáéíóúñü-]', '', nombre)
+    # Estrategia 2: top-k de cada scorer sobre la matriz completa
+    print(f"🧮 Calculando matriz de similitud {len(pendientes)} × {len(nombres)}...")
+    with obtener_metricas().temporizador('matriz_similitud'):
+        top_k_scorers = mejores_por_scorer([nombres_limpios[f] for f in pendientes], nombres, k=top_k)
     
-    # Normalizar espacios
-    nombre = ' '.join(nombre.split())
+    for posicion, fila in enumerate(pendientes):
+        # Igual que el ordenamiento estable de encontrar_mejor_match: en empates gana
+        # el primer scorer (token_set, token_sort, ratio)
+        best_i, best_score = None, -1
+        for nombre_scorer, _, _ in SCORERS:
+            indices, puntajes = top_k_scorers[nombre_scorer]
+            score = int(round(puntajes[posicion, 0]))
+            if score > best_score:
+                best_i, best_score = entradas[int(indices[posicion, 0])], score
+        matches[fila] = (indice.registro_de_entrada(best_i), best_score)
     
-    return nombre
+    return matches
+
+
+# Índice abierto en cada proceso del pool (el mmap comparte las páginas del archivo)
+_indice_worker = None
 
 
-def homologar_enfermedades(df_colombia, df_orphanet):
+def _iniciar_worker(ruta_indice):
+    global _indice_worker
+    _indice_worker = IndiceOrphanet(ruta_indice)
+
+
+def _buscar_lote(lote):
     """
-    Realiza el proceso de homologación entre la lista de Colombia y los datos de Orphanet.
+    Busca un fragmento de nombres dentro de un proceso del pool y devuelve también
+    las métricas del fragmento, que el proceso principal suma a las suyas
     """
-    print("🔄 Iniciando proceso de homologación...")
+    nombres_lote, max_candidatos = lote
+    aciertos, fallos = _indice_worker.aciertos_exactos, _indice_worker.fallos_exactos
+    # Solo lo de este fragmento (con fork el registro llega con las métricas del padre)
+    metricas = obtener_metricas()
+    metricas.reiniciar()
+    matches = [encontrar_mejor_match(nombre, _indice_worker, max_candidatos) for nombre in nombres_lote]
+    return (matches, _indice_worker.aciertos_exactos - aciertos, _indice_worker.fallos_exactos - fallos,
+            metricas.instantanea())
+
+
+def encontrar_mejores_matches_en_paralelo(nombres_colombia, indice, max_candidatos=MAX_CANDIDATOS, workers=2):
+    """
+    Reparte los nombres en fragmentos contiguos entre un pool de procesos y
+    devuelve (match_data, score) en el mismo orden que nombres_colombia.
+    Cada proceso abre el mismo artefacto del índice en modo solo lectura.
+    """
+    # Varios fragmentos por proceso para repartir bien los nombres lentos
+    tamano_fragmento = max(1, -(-len(nombres_colombia) // (workers * 8)))
+    lotes = [(nombres_colombia[i:i + tamano_fragmento], max_candidatos)
+             for i in range(0, len(nombres_colombia), tamano_fragmento)]
     
-    # Crear un diccionario de búsqueda optimizado para Orphanet
-    # Mapea cada sinónimo a la información completa de la enfermedad
-    choices_dict = {}
-    for _, row in df_orphanet.iterrows():
-        for name in row['nombres_y_sinonimos']:
-            if name and isinstance(name, str) and len(name.strip()) > 2:
-                name_clean = limpiar_nombre_enfermedad(name)
-                if name_clean:
-                    choices_dict[name_clean] = row.to_dict()
+    print(f"⚙️  Repartiendo {len(nombres_colombia)} nombres en {len(lotes)} fragmentos entre {workers} procesos...")
+    matches = []
+    metricas = obtener_metricas()
+    with metricas.temporizador('busqueda_paralela', workers=workers), \
+            multiprocessing.Pool(processes=workers, initializer=_iniciar_worker, initargs=(indice.ruta,)) as pool:
+        # imap conserva el orden de los fragmentos
+        for resultados_lote, aciertos, fallos, metricas_lote in pool.imap(_buscar_lote, lotes):
+            matches.extend(resultados_lote)
+            indice.aciertos_exactos += aciertos
+            indice.fallos_exactos += fallos
+            metricas.fusionar(metricas_lote)
+    return matches
+
 
-    print(f"📚 Diccionario de búsqueda creado con {len(choices_dict)} entradas")
+def homologar_enfermedades(df_colombia, indice, max_candidatos=MAX_CANDIDATOS, usar_matriz=False, workers=1):
+    """
+    Realiza el proceso de homologación entre la lista de Colombia y el índice de Orphanet.
+    Con usar_matriz=True todos los nombres se puntúan de una vez con la matriz de similitud;
+    con workers > 1 la búsqueda nombre por nombre se reparte entre varios procesos.
+    El resultado es el mismo en los tres modos y conserva el orden de df_colombia.
+    """
+    print("🔄 Iniciando proceso de homologación...")
+    print(f"📚 Índice de búsqueda con {len(indice)} entradas")
+    if max_candidatos and not usar_matriz:
+        print(f"🧱 Bloqueo por trigramas: hasta {max_candidatos} candidatos por criterio")
+    
+    aciertos_exactos, fallos_exactos = indice.aciertos_exactos, indice.fallos_exactos
+    matches = None
+    if usar_matriz:
+        matches = encontrar_mejores_matches_matriz(df_colombia['nombre_colombia'].tolist(), indice)
+    elif workers > 1:
+        matches = encontrar_mejores_matches_en_paralelo(df_colombia['nombre_colombia'].tolist(), indice,
+                                                        max_candidatos, workers)
     
     resultados = []
     total = len(df_colombia)
     encontrados_alta_confianza = 0
     encontrados_media_confianza = 0
     
-    for index, row in df_colombia.iterrows():
+    for posicion, (index, row) in enumerate(df_colombia.iterrows()):
         nombre_a_buscar = row['nombre_colombia']
         
         # Imprimir progreso cada 50 elementos
         if (index + 1) % 50 == 0 or index == 0:
             print(f"🔎 Progreso: {index + 1}/{total} ({((index + 1)/total)*100:.1f}%)")
         
-        match_data, score = encontrar_mejor_match(nombre_a_buscar, choices_dict)
+        if matches is not None:
+            match_data, score = matches[posicion]
+        else:
+            match_data, score = encontrar_mejor_match(nombre_a_buscar, indice, max_candidatos)
         
         # Clasificar matches por confianza
         if match_data and score >= 85:  # Alta confianza
@@ -293,6 +364,8 @@ def homologar_enfermedades(df_colombia, df_orphanet):
     print(f"   • Media confianza (70-84%): {encontrados_media_confianza}")
     print(f"   • Total encontrados: {encontrados_alta_confianza + encontrados_media_confianza}")
     print(f"   • Total procesados: {total}")
+    print(f"   • Búsqueda exacta: {indice.aciertos_exactos - aciertos_exactos} aciertos, "
+          f"{indice.fallos_exactos - fallos_exactos} fallos")
     print(f"   • Tasa de éxito: {((encontrados_alta_confianza + encontrados_media_confianza)/total)*100:.1f}%")
     
     return pd.DataFrame(resultados)
@@ -300,19 +373,29 @@ def homologar_enfermedades(df_colombia, df_orphanet):
 def main():
     """Función principal para ejecutar el proceso completo."""
     
+    parser = argparse.ArgumentParser(description="Homologación directa Orphanet → Colombia")
+    parser.add_argument("--csv", default="enfermedades_raras_colombia_2023_corregido.csv", help="Archivo CSV de entrada")
+    parser.add_argument("--candidatos", type=int, default=MAX_CANDIDATOS,
+                        help="Candidatos por criterio del índice de trigramas (0 = comparar contra todo el índice)")
+    parser.add_argument("--matriz", action="store_true",
+                        help="Puntuar todos los nombres por lotes con la matriz de similitud (rapidfuzz.cdist)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Procesos para la búsqueda nombre por nombre (0 = todos los núcleos)")
+    parser.add_argument("--metricas", metavar="ARCHIVO",
+                        help="Exportar tiempos y contadores al terminar (.json, o .prom para Prometheus)")
+    args = parser.parse_args()
+    
     # --- Configuración ---
-    archivo_input_colombia = 'enfermedades_raras_colombia_2023_corregido.csv'
+    archivo_input_colombia = args.csv
     
     print("🚀 HOMOLOGACIÓN DIRECTA ORPHANET → COLOMBIA")
     print("=" * 60)
     
     # Descargar y preparar datos de Orphanet
-    orphanet_data, version_date = descargar_y_procesar_orphanet()
-    if not orphanet_data:
+    indice, version_date = descargar_y_procesar_orphanet()
+    if indice is None:
         print("❌ No se pudieron obtener los datos de Orphanet")
         sys.exit(1)
-        
-    df_orphanet = normalizar_datos_orphanet(orphanet_data)
     
     # Cargar datos de Colombia
     df_colombia = cargar_dataset_colombia(archivo_input_colombia)
@@ -321,7 +404,9 @@ def main():
         sys.exit(1)
         
     # Realizar la homologación
-    df_resultados = homologar_enfermedades(df_colombia, df_orphanet)
+    with obtener_metricas().temporizador('homologacion'):
+        df_resultados = homologar_enfermedades(df_colombia, indice, args.candidatos, usar_matriz=args.matriz,
+                                                workers=args.workers or os.cpu_count())
     
     # Guardar resultados
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -333,7 +418,15 @@ def main():
     df_resultados = df_resultados.sort_values(['orden_confianza', 'similitud'], ascending=[True, False])
     df_resultados = df_resultados.drop('orden_confianza', axis=1)
     
-    df_resultados.to_csv(archivo_output, index=False, encoding='utf-8-sig')
+    metricas = obtener_metricas()
+    with metricas.temporizador('escritura_reporte', formato='csv'):
+        df_resultados.to_csv(archivo_output, index=False, encoding='utf-8-sig')
+    
+    # Registrar la corrida en el almacén consolidado (consultado por generar_reporte_homologacion.py)
+    almacen = AlmacenResultados()
+    with metricas.temporizador('escritura_reporte', formato='almacen'):
+        corrida_id = almacen.guardar_corrida('directa', df_resultados, archivo=archivo_output,
+                                             version_orphanet=version_date)
     
     # Crear resumen estadístico
     print("\n" + "=" * 60)
@@ -341,6 +434,7 @@ def main():
     print("=" * 60)
     print(f"📅 Versión de datos de Orphanet: {version_date}")
     print(f"📁 Archivo de salida: '{archivo_output}'")
+    print(f"💾 Almacén: {almacen.ruta} (corrida {corrida_id})")
     print(f"📈 Total de enfermedades procesadas: {len(df_resultados)}")
     
     # Estadísticas por nivel de confianza
@@ -377,6 +471,9 @@ def main():
             f.write(f"  {row['similitud']:.1f}% - {row['nombre_colombia']} → {row['nombre_orphanet']}\n")
     
     print(f"📄 Estadísticas detalladas guardadas en: '{archivo_stats}'")
+    print(metricas.resumen())
+    if args.metricas:
+        print(f"📈 Métricas exportadas en: '{metricas.exportar(args.metricas)}'")
     print("=" * 60)
     print("✅ Proceso completado exitosamente")
 
@@ -385,11 +482,10 @@ if __name__ == '__main__':
     try:
         import pandas as pd
         import requests
-        import xmltodict
         from thefuzz import process, fuzz
     except ImportError:
         print("Algunas librerías no están instaladas. Intentando instalar...")
-        os.system(f'{sys.executable} -m pip install pandas requests xmltodict "thefuzz[speedup]"')
+        os.system(f'{sys.executable} -m pip install pandas requests numpy rapidfuzz "thefuzz[speedup]"')
         print("Librerías instaladas. Por favor, vuelve a ejecutar el script.")
         sys.exit(0)
         
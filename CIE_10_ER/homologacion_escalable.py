@@ -13,19 +13,20 @@ Flujo: Enumerar ORPHA → Extraer datos → Comparar con Colombia
 """
 
 import pandas as pd
-import requests
-import time
 from datetime import datetime
 import re
 import json
 
+from cache_http import obtener_cache_http
+from cliente_http import URL_ORPHANET
+from almacen_resultados import AlmacenResultados
+
 class OrphanetHomologadorEscalable:
     """Homologador escalable basado en estrategia exitosa"""
     
     def __init__(self, csv_colombia):
         self.df_colombia = pd.read_csv(csv_colombia)
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": "OrphanetHomologation/Final"})
+        self.cache_http = obtener_cache_http()
         self.resultados = []
         self.contador_exitos = 0
         self.contador_errores = 0
@@ -71,8 +72,6 @@ class OrphanetHomologadorEscalable:
                     self.resultados.append(resultado)
                 elif resultado.get('exito'):
                     print(f"   📝 ORPHA:{orpha_num} → {resultado['nombre_orphanet']} (sin match Colombia)")
-                
-                time.sleep(0.3)  # Pausa corta entre requests
         
         self.generar_reporte_final()
     
@@ -97,8 +96,8 @@ class OrphanetHomologadorEscalable:
     def procesar_orpha_individual(self, orpha_number):
         """Procesa una enfermedad ORPHA individual"""
         try:
-            url = f"https://www.orpha.net/es/disease/detail/{orpha_number}"
-            response = self.session.get(url, timeout=8, verify=False)
+            url = f"{URL_ORPHANET}/es/disease/detail/{orpha_number}"
+            response = self.cache_http.get(url, timeout=8, verify=False)
             
             if response.status_code == 200:
                 # Extraer datos de Orphanet
@@ -329,6 +328,7 @@ class OrphanetHomologadorEscalable:
         if datos_reporte:
             df_reporte = pd.DataFrame(datos_reporte)
             df_reporte.to_csv(filename, index=False, encoding='utf-8')
+            AlmacenResultados().guardar_corrida('escalable', df_reporte, archivo=filename)
             
             print(f"\n📊 REPORTE FINAL GENERADO: {filename}")
             print("=" * 80)
@@ -6,14 +6,21 @@ Procesa todas las enfermedades del CSV Colombia en grupos manejables
 
 Características:
 - Procesamiento por lotes de 100-200 enfermedades
-- Guardado automático de resultados parciales
-- Reanudación desde último punto procesado
+- Guardado automático de resultados parciales en el almacén SQLite (almacen_resultados.py)
+- Diario por registro (JSONL): una interrupción a mitad de lote no pierde trabajo
+- Reanudación idempotente: solo se buscan los registros que faltan (también
+  los que no se pudieron decidir por errores de red o HTTP, que no se anotan)
 - Monitoreo de progreso en tiempo real
-- Control de rate limiting para no sobrecargar Orphanet
+- Control de rate limiting adaptativo para no sobrecargar Orphanet (se acelera
+  mientras responde bien y frena ante 429/503/timeouts)
+- Búsquedas concurrentes con un límite global de peticiones por segundo
+- Términos de búsqueda deduplicados por lote: cada término se pide una sola vez
+  y su resultado se reparte entre todas las enfermedades que lo necesitan
+- Métricas por etapa y tasa de acierto de cada estrategia de búsqueda
+  (metricas.py), exportables con --metricas
 """
 
 import pandas as pd
-import requests
 import time
 import os
 import json
@@ -22,13 +29,75 @@ import re
 from urllib.parse import quote
 import argparse
 import sys
+import glob
+
+from motor_descargas import MotorDescargas
+from cache_http import obtener_cache_http
+from almacen_resultados import AlmacenResultados
+from planificador_busquedas import PlanificadorBusquedas, ejecutar_plan
+from memo_detalles import obtener_memo_detalles
+from extraccion_orphanet import primer_enlace_detalle, es_codigo_cie10_valido
+from parser_orphanet import extraer_detalle, extraer_codigos_cie10, MOTOR_HTML
+import cliente_http
+from metricas import obtener_metricas
+
+# Peticiones HTTP aproximadas por enfermedad (búsqueda + detalle), para estimar tiempos
+PETICIONES_POR_ENFERMEDAD = 2
+# Estrategias de plan_busqueda, en el orden en que se intentan
+ESTRATEGIAS = ('nombre_directo', 'nombre_simplificado', 'parte_nombre')
+CARPETA_RESULTADOS = "resultados_homologacion"
+
+def carpeta_predeterminada():
+    """
+    Carpeta de resultados para el servidor configurado: una corrida contra otro
+    servidor (ORPHANET_BASE_URL, p. ej. servidor_replay.py) no debe mezclar su
+    diario ni su almacén con los de orpha.net, o la siguiente reanudación real
+    daría por completados registros sintéticos
+    """
+    if cliente_http.ES_ORPHANET_OFICIAL:
+        return CARPETA_RESULTADOS
+    servidor = re.sub(r'[^\w.-]', '_', cliente_http.SERVIDOR_ORPHANET)
+    return f"{CARPETA_RESULTADOS}_{servidor}"
+
+def claves_diario(numeros):
+    """
+    Clave de cada registro en el diario: el número Colombia, con sufijo #2, #3...
+    para las repeticiones (el listado tiene algunos números duplicados)
+    """
+    vistos = {}
+    claves = []
+    for numero in numeros:
+        numero = str(numero)
+        vistos[numero] = vistos.get(numero, 0) + 1
+        claves.append(numero if vistos[numero] == 1 else f"{numero}#{vistos[numero]}")
+    return claves
 
 class HomologadorMasivo:
-    def __init__(self, archivo_csv, tamano_lote=150, delay_request=1.2, carpeta_resultados="resultados_homologacion"):
+    def __init__(self, archivo_csv, tamano_lote=150, delay_request=1.2, carpeta_resultados=None,
+                 concurrencia=4, exportar_csv=False):
+        carpeta_resultados = carpeta_resultados or carpeta_predeterminada()
         self.archivo_csv = archivo_csv
         self.tamano_lote = tamano_lote
         self.delay_request = delay_request
         self.carpeta_resultados = carpeta_resultados
+        self.exportar_csv = exportar_csv
+        
+        # Motor concurrente con el limitador adaptativo de cliente_http para orpha.net;
+        # delay_request solo fija el intervalo inicial si aún no hay una tasa aprendida
+        limitador = cliente_http.obtener_limitador(cliente_http.HOST_ORPHANET, tasa_inicial=1 / delay_request)
+        self.motor = MotorDescargas(concurrencia=concurrencia, limitador=limitador)
+        
+        # Los términos repetidos entre enfermedades (fragmentos, epónimos) se buscan una sola vez;
+        # los que fallaron por red o HTTP ('error') se reintentan cuando otra enfermedad los pida
+        self.planificador = PlanificadorBusquedas(self.buscar_por_nombre_directo, self.motor,
+                                                  memorizable=lambda resultado: 'error' not in resultado)
+        
+        # Caché de respuestas compartida entre ejecuciones y scripts
+        self.cache_http = obtener_cache_http()
+        # Detalles ya parseados por número ORPHA (varias enfermedades llegan al mismo);
+        # un espacio por parser, porque cada uno extrae códigos distintos, y por
+        # servidor si ORPHANET_BASE_URL no es orpha.net (memo_detalles.espacio_servidor)
+        self.memo_detalles = obtener_memo_detalles(f'masiva_{MOTOR_HTML}')
         
         # Crear carpeta de resultados
         os.makedirs(carpeta_resultados, exist_ok=True)
@@ -42,11 +111,23 @@ class HomologadorMasivo:
         # Cargar progreso previo
         self.progreso = self.cargar_progreso()
         
+        # Diario de resultados por registro (clave: número Colombia)
+        self.archivo_diario = os.path.join(carpeta_resultados, "diario_homologacion.jsonl")
+        self.claves = claves_diario(self.df_colombia['numero'])
+        self.diario = self.cargar_diario()
+        
+        # Almacén de resultados: todos los lotes de la homologación van a una misma corrida
+        self.almacen = AlmacenResultados(os.path.join(carpeta_resultados, "almacen_resultados.sqlite"))
+        
         print(f"🚀 HomologadorMasivo inicializado")
         print(f"📊 Total enfermedades: {len(self.df_colombia)}")
         print(f"📦 Tamaño de lote: {tamano_lote}")
-        print(f"⏱️  Delay por request: {delay_request}s")
+        print(f"⏱️  Tasa adaptativa: {limitador.tasa:.2f} peticiones/s en total (se ajusta según las respuestas)")
+        print(f"🔀 Búsquedas simultáneas: {self.motor.concurrencia}")
+        print(f"🧩 Parser HTML: {MOTOR_HTML}")
         print(f"📁 Carpeta resultados: {carpeta_resultados}")
+        if not cliente_http.ES_ORPHANET_OFICIAL:
+            print(f"⚠️  Servidor Orphanet alternativo: {cliente_http.URL_ORPHANET} (memo y resultados separados)")
     
     def cargar_dataset(self):
         """Carga el dataset de Colombia"""
@@ -91,10 +172,172 @@ class HomologadorMasivo:
         except Exception as e:
             print(f"⚠️  Error guardando progreso: {e}")
     
+    def cargar_diario(self):
+        """
+        Carga el diario de resultados. Si una línea quedó a medias por una
+        interrupción se ignora; si hay repetidos gana el último.
+        """
+        diario = {}
+        if not os.path.exists(self.archivo_diario):
+            self.importar_lotes_previos(diario)
+            return diario
+        
+        with open(self.archivo_diario, 'r', encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    entrada = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+                diario[entrada['clave']] = entrada['resultado']
+        
+        if diario:
+            print(f"📒 Diario de resultados: {len(diario)} registros completados")
+        return diario
+    
+    def importar_lotes_previos(self, diario):
+        """Carga en el diario los CSV de lotes completados antes de que existiera"""
+        registros = []
+        for lote in sorted(self.progreso.get('lotes_completados', []), key=lambda l: l['numero']):
+            archivos = sorted(glob.glob(os.path.join(self.carpeta_resultados, f"lote_{lote['numero']:03d}_*.csv")))
+            if not archivos:
+                break  # Las claves dependen del orden: solo lotes consecutivos desde el primero
+            df = pd.read_csv(archivos[-1], encoding='utf-8')
+            df = df.astype(object).where(df.notna(), None)
+            registros.extend(df.to_dict('records'))
+        
+        if registros:
+            claves = claves_diario(r['numero_colombia'] for r in registros)
+            entradas = list(zip(claves, registros))
+            self.registrar_en_diario(entradas)
+            diario.update(entradas)
+            print(f"📒 Diario creado a partir de lotes anteriores: {len(registros)} registros")
+    
+    def registrar_en_diario(self, entradas, sincronizar=True):
+        """Agrega pares (clave, resultado) al final del diario (append-only)"""
+        with open(self.archivo_diario, 'a', encoding='utf-8') as f:
+            for clave, resultado in entradas:
+                f.write(json.dumps({'clave': clave, 'resultado': resultado}, ensure_ascii=False, default=str) + '\n')
+            f.flush()
+            if sincronizar:
+                os.fsync(f.fileno())
+    
+    def sincronizar_diario(self):
+        """Fuerza a disco lo escrito en el diario"""
+        if os.path.exists(self.archivo_diario):
+            with open(self.archivo_diario, 'a', encoding='utf-8') as f:
+                os.fsync(f.fileno())
+    
+    def claves_lote(self, numero_lote):
+        """Claves del diario de las filas que forman el lote"""
+        inicio_idx = numero_lote * self.tamano_lote
+        return self.claves[inicio_idx:inicio_idx + self.tamano_lote]
+    
+    def primer_lote_pendiente(self):
+        """Primer lote que tiene registros sin resultado en el diario"""
+        total_lotes = (len(self.df_colombia) + self.tamano_lote - 1) // self.tamano_lote
+        for numero_lote in range(total_lotes):
+            if any(clave not in self.diario for clave in self.claves_lote(numero_lote)):
+                return numero_lote
+        return total_lotes
+    
+    def escribir_csv_lote(self, numero_lote, resultados):
+        """Escribe el CSV del lote reemplazando versiones anteriores del mismo lote"""
+        for anterior in glob.glob(os.path.join(self.carpeta_resultados, f"lote_{numero_lote + 1:03d}_*.csv")):
+            os.remove(anterior)
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        archivo_lote = os.path.join(
+            self.carpeta_resultados, 
+            f"lote_{numero_lote + 1:03d}_{timestamp}.csv"
+        )
+        
+        df_resultados = pd.DataFrame(resultados)
+        df_resultados.to_csv(archivo_lote, index=False, encoding='utf-8')
+        return archivo_lote, timestamp
+    
+    def corrida_almacen(self):
+        """Id de la corrida 'masiva' del almacén; se crea una vez y se guarda en el progreso"""
+        if 'corrida_almacen' not in self.progreso:
+            self.progreso['corrida_almacen'] = self.almacen.nueva_corrida('masiva', archivo=self.archivo_csv)
+            self.guardar_progreso()
+        return self.progreso['corrida_almacen']
+    
+    def guardar_lote(self, numero_lote, resultados):
+        """
+        Guarda el lote en el almacén (reemplazando una versión anterior del mismo
+        lote) y, si se pidió, también como CSV. Devuelve (destino, timestamp).
+        """
+        metricas = obtener_metricas()
+        with metricas.temporizador('escritura_reporte', formato='almacen'):
+            self.almacen.reemplazar_lote(self.corrida_almacen(), pd.DataFrame(resultados), numero_lote + 1)
+        if self.exportar_csv:
+            with metricas.temporizador('escritura_reporte', formato='csv'):
+                return self.escribir_csv_lote(numero_lote, resultados)
+        return self.almacen.ruta, datetime.now().strftime("%Y%m%d_%H%M%S")
+    
+    def actualizar_totales(self):
+        """Totales del diario en progreso_homologacion.json"""
+        self.progreso['total_procesados'] = len(self.diario)
+        self.progreso['total_matches'] = sum(1 for r in self.diario.values() if r.get('encontrado'))
+        self.guardar_progreso()
+    
+    def actualizar_progreso(self, numero_lote, archivo_lote, timestamp, matches, total):
+        """Actualiza progreso_homologacion.json con el lote guardado y los totales del diario"""
+        self.progreso['ultimo_lote'] = max(self.progreso.get('ultimo_lote', 0), numero_lote + 1)
+        self.progreso['total_procesados'] = len(self.diario)
+        self.progreso['total_matches'] = sum(1 for r in self.diario.values() if r.get('encontrado'))
+        self.progreso['lotes_completados'] = [
+            l for l in self.progreso['lotes_completados'] if l['numero'] != numero_lote + 1
+        ] + [{
+            'numero': numero_lote + 1,
+            'archivo': archivo_lote,
+            'matches': matches,
+            'total': total,
+            'timestamp': timestamp
+        }]
+        self.progreso['lotes_completados'].sort(key=lambda l: l['numero'])
+        self.guardar_progreso()
+    
+    def reconstruir_lotes(self):
+        """Regenera los lotes completos (almacén y CSV opcionales) a partir del diario"""
+        total_lotes = (len(self.df_colombia) + self.tamano_lote - 1) // self.tamano_lote
+        reconstruidos = 0
+        for numero_lote in range(total_lotes):
+            claves = self.claves_lote(numero_lote)
+            if not all(clave in self.diario for clave in claves):
+                continue
+            resultados = [self.diario[clave] for clave in claves]
+            archivo_lote, timestamp = self.guardar_lote(numero_lote, resultados)
+            matches = sum(1 for r in resultados if r.get('encontrado'))
+            self.actualizar_progreso(numero_lote, archivo_lote, timestamp, matches, len(resultados))
+            reconstruidos += 1
+        print(f"📄 {reconstruidos} lotes reconstruidos desde {self.archivo_diario}")
+    
+    def plan_registro(self, numero, nombre, codigo_cie10, observaciones):
+        """Plan de búsqueda de una enfermedad que agrega los datos de Colombia al resultado"""
+        resultado = yield from self.plan_busqueda(nombre, numero)
+        resultado.update({
+            'codigo_cie10_colombia': codigo_cie10,
+            'observaciones_colombia': observaciones
+        })
+        return resultado
+    
+    def buscar_registro(self, numero, nombre, codigo_cie10, observaciones):
+        """Busca una enfermedad y agrega los datos de Colombia al resultado"""
+        return ejecutar_plan(self.plan_registro(numero, nombre, codigo_cie10, observaciones),
+                             self.buscar_por_nombre_directo)
+    
     def buscar_en_orphanet_avanzado(self, nombre_enfermedad, numero_colombia):
         """
         Búsqueda avanzada en Orphanet usando múltiples estrategias
         """
+        return ejecutar_plan(self.plan_busqueda(nombre_enfermedad, numero_colombia), self.buscar_por_nombre_directo)
+    
+    def plan_busqueda(self, nombre_enfermedad, numero_colombia):
+        """
+        Estrategias de búsqueda como plan (ver planificador_busquedas.py): cada
+        `yield termino` recibe el resultado de buscar_por_nombre_directo(termino)
+        """
         resultados = {
             'numero_colombia': numero_colombia,
             'nombre_colombia': nombre_enfermedad,
@@ -108,10 +351,16 @@ class HomologadorMasivo:
             'error': None
         }
         
+        metricas = obtener_metricas()
+        errores = []  # Búsquedas fallidas por red o HTTP: con alguna, "no encontrado" no es concluyente
         try:
             # Estrategia 1: Búsqueda directa por nombre
-            resultado = self.buscar_por_nombre_directo(nombre_enfermedad)
+            metricas.contador('estrategia_intentos', estrategia='nombre_directo')
+            resultado = yield nombre_enfermedad
+            if resultado.get('error'):
+                errores.append(resultado['error'])
             if resultado['encontrado']:
+                metricas.contador('estrategia_aciertos', estrategia='nombre_directo')
                 resultados.update(resultado)
                 resultados['metodo_encontrado'] = 'nombre_directo'
                 return resultados
@@ -119,27 +368,45 @@ class HomologadorMasivo:
             # Estrategia 2: Búsqueda por nombre simplificado
             nombre_simple = self.simplificar_nombre(nombre_enfermedad)
             if nombre_simple != nombre_enfermedad:
-                resultado = self.buscar_por_nombre_directo(nombre_simple)
+                metricas.contador('estrategia_intentos', estrategia='nombre_simplificado')
+                resultado = yield nombre_simple
+                if resultado.get('error'):
+                    errores.append(resultado['error'])
                 if resultado['encontrado']:
+                    metricas.contador('estrategia_aciertos', estrategia='nombre_simplificado')
                     resultados.update(resultado)
                     resultados['metodo_encontrado'] = 'nombre_simplificado'
                     return resultados
             
-            # Estrategia 3: Búsqueda por partes del nombre
-            partes = self.extraer_partes_nombre(nombre_enfermedad)
+            # Estrategia 3: Búsqueda por partes del nombre (un intento por enfermedad, no por parte)
+            partes = [parte for parte in self.extraer_partes_nombre(nombre_enfermedad)
+                      if len(parte) > 5]  # Solo buscar partes significativas
+            if partes:
+                metricas.contador('estrategia_intentos', estrategia='parte_nombre')
             for parte in partes:
-                if len(parte) > 5:  # Solo buscar partes significativas
-                    resultado = self.buscar_por_nombre_directo(parte)
-                    if resultado['encontrado']:
-                        # Verificar similitud antes de aceptar
-                        similitud = self.calcular_similitud_nombres(nombre_enfermedad, resultado.get('nombre_orphanet', ''))
-                        if similitud > 0.6:
-                            resultados.update(resultado)
-                            resultados['metodo_encontrado'] = f'parte_nombre_{parte[:20]}'
-                            resultados['similitud_nombre'] = similitud
-                            return resultados
+                resultado = yield parte
+                if resultado.get('error'):
+                    errores.append(resultado['error'])
+                if resultado['encontrado']:
+                    # Verificar similitud antes de aceptar
+                    similitud = self.calcular_similitud_nombres(nombre_enfermedad, resultado.get('nombre_orphanet', ''))
+                    if similitud > 0.6:
+                        metricas.contador('estrategia_aciertos', estrategia='parte_nombre')
+                        resultados.update(resultado)
+                        resultados['metodo_encontrado'] = f'parte_nombre_{parte[:20]}'
+                        resultados['similitud_nombre'] = similitud
+                        return resultados
+                    metricas.contador('estrategia_descartes_similitud', estrategia='parte_nombre')
+            
+            if errores:
+                # Queda pendiente: no se anota en el diario y se vuelve a buscar al reanudar
+                metricas.contador('estrategia_error_busqueda')
+                resultados['error'] = f"Búsqueda incompleta ({len(errores)} con error): {errores[0]}"
+                resultados['pendiente'] = True
+                return resultados
             
             # No encontrado por ningún método
+            metricas.contador('estrategia_sin_resultado')
             resultados['error'] = 'No encontrado por ningún método de búsqueda'
             return resultados
             
@@ -160,30 +427,21 @@ class HomologadorMasivo:
         try:
             # URL de búsqueda en español
             termino_encoded = quote(termino_busqueda)
-            url_busqueda = f"https://www.orpha.net/es/disease/search?query={termino_encoded}"
+            url_busqueda = f"{cliente_http.URL_ORPHANET}/es/disease/search?query={termino_encoded}"
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'es,en;q=0.5',
-                'Connection': 'keep-alive',
-            }
-            
-            response = requests.get(url_busqueda, headers=headers, timeout=10, verify=False)
+            response = self.cache_http.get(url_busqueda, timeout=10, verify=False)
             
             if response.status_code == 200:
                 contenido = response.text
                 
-                # Buscar enlaces a páginas de detalle
-                patron_enlaces = r'href="[^"]*disease/detail/(\d+)[^"]*"[^>]*>([^<]+)</a>'
-                matches = re.findall(patron_enlaces, contenido, re.IGNORECASE)
+                # Primer enlace a una página de detalle (el más relevante)
+                enlace = primer_enlace_detalle(contenido)
                 
-                if matches:
-                    # Tomar el primer resultado (más relevante)
-                    orpha_num, nombre_encontrado = matches[0]
+                if enlace:
+                    orpha_num, nombre_encontrado = enlace
                     
                     # Verificar el detalle de la enfermedad
-                    url_detalle = f"https://www.orpha.net/es/disease/detail/{orpha_num}"
+                    url_detalle = f"{cliente_http.URL_ORPHANET}/es/disease/detail/{orpha_num}"
                     detalles = self.obtener_detalles_orphanet(url_detalle)
                     
                     if detalles['exitoso']:
@@ -194,6 +452,11 @@ class HomologadorMasivo:
                             'nombre_orphanet': detalles.get('nombre', nombre_encontrado.strip()),
                             'codigos_cie10_orphanet': detalles.get('codigos_cie10', [])
                         })
+                    else:
+                        # Fallo del detalle, no "no encontrado": el planificador no lo memoriza
+                        resultado['error'] = f"Detalle ORPHA:{orpha_num}: {detalles.get('error', 'no disponible')}"
+            else:
+                resultado['error'] = f'HTTP {response.status_code}'
             
             return resultado
             
@@ -202,36 +465,26 @@ class HomologadorMasivo:
             return resultado
     
     def obtener_detalles_orphanet(self, url_detalle):
-        """Obtiene detalles de una página específica de Orphanet"""
+        """Obtiene detalles de una página específica de Orphanet (memorizados por número ORPHA)"""
+        orpha = re.search(r'/detail/(\d+)', url_detalle)
+        if not orpha:
+            return self.descargar_detalles_orphanet(url_detalle)
+        return self.memo_detalles.obtener(orpha.group(1), lambda: self.descargar_detalles_orphanet(url_detalle),
+                                          memorizable=lambda detalles: detalles['exitoso'])
+    
+    def descargar_detalles_orphanet(self, url_detalle):
+        """Descarga y parsea una página de detalle de Orphanet"""
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'es,en;q=0.5',
-            }
-            
-            response = requests.get(url_detalle, headers=headers, timeout=10, verify=False)
+            response = self.cache_http.get(url_detalle, timeout=10, verify=False)
             
             if response.status_code == 200:
                 contenido = response.text
                 
-                # Extraer nombre
-                patrones_nombre = [
-                    r'<h1[^>]*>([^<]+)</h1>',
-                    r'<h2[^>]*>([^<]+)</h2>',
-                    r'<title>([^<]+?)\s*-\s*Orphanet</title>'
-                ]
-                
-                nombre = "No encontrado"
-                for patron in patrones_nombre:
-                    match = re.search(patron, contenido, re.IGNORECASE | re.DOTALL)
-                    if match:
-                        nombre = match.group(1).strip()
-                        nombre = re.sub(r'\s+', ' ', nombre)
-                        break
-                
-                # Extraer códigos CIE-10
-                codigos_cie10 = self.extraer_codigos_cie10(contenido)
+                # Nombre y códigos CIE-10 del bloque de referencias cruzadas
+                with obtener_metricas().temporizador('parseo_detalle', motor=MOTOR_HTML):
+                    nombre, codigos_cie10 = extraer_detalle(contenido)
+                if nombre is None:
+                    nombre = "No encontrado"
                 
                 return {
                     'exitoso': True,
@@ -244,44 +497,24 @@ class HomologadorMasivo:
         except Exception as e:
             return {'exitoso': False, 'error': str(e)}
     
+    def resumen_estrategias(self):
+        """Aciertos / intentos de cada estrategia de búsqueda en lo que va del proceso"""
+        metricas = obtener_metricas()
+        lineas = ["🎯 Estrategias de búsqueda:"]
+        for estrategia in ESTRATEGIAS:
+            intentos = metricas.valor('estrategia_intentos', estrategia=estrategia)
+            aciertos = metricas.valor('estrategia_aciertos', estrategia=estrategia)
+            tasa = f"{aciertos / intentos * 100:.1f}%" if intentos else "-"
+            lineas.append(f"   • {estrategia}: {aciertos}/{intentos} ({tasa})")
+        return '\n'.join(lineas)
+    
     def extraer_codigos_cie10(self, contenido_html):
-        """Extrae códigos CIE-10 válidos del contenido HTML"""
-        patrones = [
-            r'ICD-?10[:\s]*([A-Z]\d{2}[\.\d]*)',
-            r'CIE-?10[:\s]*([A-Z]\d{2}[\.\d]*)',
-            r'([A-Z]\d{2}\.\d+)',
-            r'([A-Z]\d{2})'
-        ]
-        
-        codigos = []
-        for patron in patrones:
-            matches = re.findall(patron, contenido_html, re.IGNORECASE)
-            codigos.extend(matches)
-        
-        # Filtrar y limpiar códigos válidos
-        codigos_validos = []
-        for codigo in codigos:
-            codigo = codigo.upper().strip()
-            if self.es_codigo_cie10_valido(codigo):
-                codigos_validos.append(codigo)
-        
-        return list(set(codigos_validos))  # Eliminar duplicados
+        """Extrae los códigos CIE-10 del bloque ICD-10/CIE-10 del contenido HTML"""
+        return extraer_codigos_cie10(contenido_html)
     
     def es_codigo_cie10_valido(self, codigo):
         """Valida si un código CIE-10 es válido"""
-        if not codigo or len(codigo) < 3:
-            return False
-        
-        # Debe empezar con letra seguida de números
-        if not re.match(r'^[A-Z]\d{2}', codigo):
-            return False
-        
-        # Evitar códigos genéricos o de ejemplo
-        codigos_invalidos = ['A00', 'B00', 'Z99', 'X99', 'Y99']
-        if any(codigo.startswith(inv) for inv in codigos_invalidos):
-            return False
-        
-        return True
+        return es_codigo_cie10_valido(codigo)
     
     def simplificar_nombre(self, nombre):
         """Simplifica un nombre para mejorar la búsqueda"""
@@ -380,73 +613,79 @@ class HomologadorMasivo:
         print(f"📊 Registros: {inicio_idx + 1} a {fin_idx} ({len(lote)} enfermedades)")
         print("-" * 60)
         
-        resultados = []
-        matches_encontrados = 0
         inicio_lote = time.time()
         
-        for i, (idx, enfermedad) in enumerate(lote.iterrows()):
-            numero = enfermedad['numero']
-            nombre = enfermedad['nombre']
-            codigo_colombia = enfermedad['codigo_cie10']
+        # Solo se buscan los registros que aún no están en el diario
+        claves = self.claves_lote(numero_lote)
+        pendientes = [(clave, enfermedad) for clave, (_, enfermedad) in zip(claves, lote.iterrows())
+                      if clave not in self.diario]
+        if len(pendientes) < len(lote):
+            print(f"♻️  {len(lote) - len(pendientes)} registros ya completados en el diario, se omiten")
+        
+        def reportar(i, resultado):
+            nombre = resultado['nombre_colombia']
+            if resultado.get('pendiente'):
+                print(f"🔍 {len(self.diario)}/{len(self.df_colombia)}: {nombre[:50]}... ⚠️  Pendiente: {resultado['error']}")
+                return
             
-            print(f"🔍 {inicio_idx + i + 1}/{len(self.df_colombia)}: {nombre[:50]}...", end=" ")
-            
-            # Buscar en Orphanet
-            resultado = self.buscar_en_orphanet_avanzado(nombre, numero)
+            # Cada resultado se agrega al diario apenas termina su búsqueda
+            clave = pendientes[i][0]
+            self.registrar_en_diario([(clave, resultado)], sincronizar=False)
+            self.diario[clave] = resultado
             
             if resultado['encontrado']:
-                matches_encontrados += 1
-                print(f"✅ MATCH - ORPHA:{resultado['orpha_number']}")
+                print(f"🔍 {len(self.diario)}/{len(self.df_colombia)}: {nombre[:50]}... ✅ MATCH - ORPHA:{resultado['orpha_number']}")
             else:
-                print(f"❌ No encontrado")
-            
-            # Agregar datos de Colombia al resultado
-            resultado.update({
-                'codigo_cie10_colombia': codigo_colombia,
-                'observaciones_colombia': enfermedad.get('observaciones', '')
-            })
-            
-            resultados.append(resultado)
-            
-            # Delay para no sobrecargar el servidor
-            time.sleep(self.delay_request)
+                print(f"🔍 {len(self.diario)}/{len(self.df_colombia)}: {nombre[:50]}... ❌ No encontrado")
         
-        # Guardar resultados del lote
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        archivo_lote = os.path.join(
-            self.carpeta_resultados, 
-            f"lote_{numero_lote + 1:03d}_{timestamp}.csv"
-        )
-        
-        df_resultados = pd.DataFrame(resultados)
-        df_resultados.to_csv(archivo_lote, index=False, encoding='utf-8')
+        # Buscar en Orphanet por rondas de términos únicos (concurrente, respetando el límite global)
+        planes = [self.plan_registro(enfermedad['numero'], enfermedad['nombre'], enfermedad['codigo_cie10'],
+                                     enfermedad.get('observaciones', '')) for _, enfermedad in pendientes]
+        busquedas_previas = self.planificador.terminos_buscados
+        pedidas_previas = self.planificador.terminos_pedidos
+        try:
+            self.planificador.ejecutar(planes, al_terminar=reportar)
+        finally:
+            self.sincronizar_diario()
+        
+        # Guardar resultados del lote (reconstruidos desde el diario, en el orden del CSV);
+        # con registros pendientes el lote se guarda cuando una reanudación lo complete
+        resultados = [self.diario[clave] for clave in claves if clave in self.diario]
+        sin_resultado = len(claves) - len(resultados)
+        matches_encontrados = sum(1 for r in resultados if r.get('encontrado'))
+        if sin_resultado:
+            archivo_lote, timestamp = None, None
+        else:
+            archivo_lote, timestamp = self.guardar_lote(numero_lote, resultados)
         
         fin_lote = time.time()
         duracion = fin_lote - inicio_lote
         
-        print(f"\n📊 LOTE {numero_lote + 1} COMPLETADO:")
+        if sin_resultado:
+            print(f"\n📊 LOTE {numero_lote + 1} INCOMPLETO:")
+            print(f"⚠️  {sin_resultado} registros con errores de búsqueda quedan pendientes; "
+                  f"se buscarán de nuevo al reanudar")
+        else:
+            print(f"\n📊 LOTE {numero_lote + 1} COMPLETADO:")
         print(f"✅ Matches encontrados: {matches_encontrados}/{len(lote)}")
         print(f"⏱️  Tiempo: {duracion/60:.1f} minutos")
-        print(f"📄 Guardado: {archivo_lote}")
+        print(f"🔁 Búsquedas: {self.planificador.terminos_buscados - busquedas_previas} términos únicos "
+              f"para {self.planificador.terminos_pedidos - pedidas_previas} solicitados")
+        print(self.memo_detalles.resumen())
+        print(self.resumen_estrategias())
         
         # Actualizar progreso
-        self.progreso['ultimo_lote'] = numero_lote + 1
-        self.progreso['total_procesados'] += len(lote)
-        self.progreso['total_matches'] += matches_encontrados
-        self.progreso['lotes_completados'].append({
-            'numero': numero_lote + 1,
-            'archivo': archivo_lote,
-            'matches': matches_encontrados,
-            'total': len(lote),
-            'timestamp': timestamp
-        })
-        
-        self.guardar_progreso()
+        if sin_resultado:
+            self.actualizar_totales()
+        else:
+            print(f"📄 Guardado: {archivo_lote}")
+            self.actualizar_progreso(numero_lote, archivo_lote, timestamp, matches_encontrados, len(lote))
         
         return {
             'numero_lote': numero_lote + 1,
             'matches': matches_encontrados,
             'total': len(lote),
+            'pendientes': sin_resultado,
             'archivo': archivo_lote
         }
     
@@ -457,7 +696,8 @@ class HomologadorMasivo:
         print("=" * 80)
         
         total_lotes = (len(self.df_colombia) + self.tamano_lote - 1) // self.tamano_lote
-        lote_inicio = self.progreso['ultimo_lote']
+        lote_inicio = self.primer_lote_pendiente()
+        pendientes = len(self.df_colombia) - len(self.diario)
         
         if lotes_maximos:
             total_lotes = min(total_lotes, lote_inicio + lotes_maximos)
@@ -467,10 +707,12 @@ class HomologadorMasivo:
         print(f"📦 Tamaño de lote: {self.tamano_lote}")
         print(f"🎯 Total lotes: {total_lotes}")
         print(f"🔄 Lote inicial: {lote_inicio + 1}")
-        print(f"⏱️  Tiempo estimado: {(total_lotes - lote_inicio) * self.tamano_lote * self.delay_request / 60:.1f} minutos")
+        print(f"⏱️  Tiempo estimado: {pendientes * PETICIONES_POR_ENFERMEDAD / self.motor.limitador.tasa / 60:.1f} minutos "
+              f"(a la tasa actual de {self.motor.limitador.tasa:.2f} peticiones/s)")
         
-        if lote_inicio > 0:
-            print(f"📈 Progreso previo: {self.progreso['total_procesados']} procesados, {self.progreso['total_matches']} matches")
+        if self.diario:
+            matches_previos = sum(1 for r in self.diario.values() if r.get('encontrado'))
+            print(f"📈 Progreso previo: {len(self.diario)} procesados, {matches_previos} matches")
         
         # Confirmar inicio
         respuesta = input(f"\n¿Continuar con la homologación? (s/N): ").strip().lower()
@@ -491,20 +733,16 @@ class HomologadorMasivo:
                 progreso_pct = ((numero_lote + 1) / total_lotes) * 100
                 print(f"\n📈 PROGRESO GENERAL: {progreso_pct:.1f}% ({numero_lote + 1}/{total_lotes} lotes)")
                 print(f"🎯 Total matches acumulados: {self.progreso['total_matches']}")
-                
-                # Pausa entre lotes para no sobrecargar
-                if numero_lote < total_lotes - 1:
-                    print(f"⏸️  Pausa de 30 segundos antes del siguiente lote...")
-                    time.sleep(30)
+                # Sin pausa entre lotes: el limitador de tokens ya acota la tasa global
         
         except KeyboardInterrupt:
             print(f"\n⏸️  PROCESO INTERRUMPIDO POR USUARIO")
-            print(f"📊 Progreso guardado hasta lote {self.progreso['ultimo_lote']}")
+            print(f"📒 Diario con {len(self.diario)} registros completados; se reanudará desde ahí")
             return
         
         except Exception as e:
             print(f"\n❌ ERROR EN PROCESAMIENTO: {e}")
-            print(f"📊 Progreso guardado hasta lote {self.progreso['ultimo_lote']}")
+            print(f"📒 Diario con {len(self.diario)} registros completados; se reanudará desde ahí")
             return
         
         fin_total = time.time()
@@ -516,15 +754,29 @@ class HomologadorMasivo:
         print(f"📋 Total procesados: {self.progreso['total_procesados']}")
         print(f"🎯 Total matches: {self.progreso['total_matches']}")
         print(f"📈 Tasa de éxito: {(self.progreso['total_matches']/self.progreso['total_procesados']*100):.1f}%")
+        print(f"🚦 Tasa final: {self.motor.limitador.tasa:.2f} peticiones/s ({self.motor.limitador.reducciones} reducciones)")
+        print(obtener_metricas().resumen())
         print(f"📁 Resultados en: {self.carpeta_resultados}")
+        sin_resultado = len(self.df_colombia) - len(self.diario)
+        if sin_resultado:
+            print(f"⚠️  {sin_resultado} registros sin resultado en el diario (errores de búsqueda o lotes "
+                  f"no procesados); se buscarán al reanudar")
         print("=" * 80)
 
 def main():
     parser = argparse.ArgumentParser(description="Homologación masiva Colombia ↔ Orphanet")
     parser.add_argument("--csv", default="enfermedades_raras_colombia_2023_corregido.csv", help="Archivo CSV de entrada")
     parser.add_argument("--lote", type=int, default=150, help="Tamaño del lote")
-    parser.add_argument("--delay", type=float, default=1.2, help="Delay entre requests")
+    parser.add_argument("--delay", type=float, default=1.2, help="Delay inicial entre requests si aún no hay una tasa aprendida")
+    parser.add_argument("--concurrencia", type=int, default=4, help="Búsquedas simultáneas")
+    parser.add_argument("--carpeta", help=f"Carpeta de resultados (default: {CARPETA_RESULTADOS}, "
+                                          "o con el host como sufijo si ORPHANET_BASE_URL apunta a otro servidor)")
+    parser.add_argument("--reconstruir", action="store_true", help="Solo regenerar los lotes desde el diario")
+    parser.add_argument("--exportar-csv", action="store_true",
+                        help="Además del almacén SQLite, escribir cada lote como lote_NNN_<timestamp>.csv")
     parser.add_argument("--max-lotes", type=int, help="Máximo número de lotes a procesar")
+    parser.add_argument("--metricas", metavar="ARCHIVO",
+                        help="Exportar tiempos y contadores al terminar (.json, o .prom para Prometheus)")
     
     args = parser.parse_args()
     
@@ -532,11 +784,22 @@ def main():
     homologador = HomologadorMasivo(
         archivo_csv=args.csv,
         tamano_lote=args.lote,
-        delay_request=args.delay
+        delay_request=args.delay,
+        carpeta_resultados=args.carpeta,
+        concurrencia=args.concurrencia,
+        exportar_csv=args.exportar_csv
     )
     
+    if args.reconstruir:
+        homologador.reconstruir_lotes()
+        return
+    
     # Ejecutar homologación
     homologador.ejecutar_homologacion_completa(lotes_maximos=args.max_lotes)
+    
+    # También tras una interrupción: las métricas cubren lo procesado hasta ahí
+    if args.metricas:
+        print(f"📈 Métricas exportadas en: {obtener_metricas().exportar(args.metricas)}")
 
 if __name__ == "__main__":
     main()
@@ -14,21 +14,18 @@ Fecha: Julio 2025
 """
 
 import pandas as pd
-import requests
-import time
 import re
 from datetime import datetime
 import json
+import cliente_http
 from urllib.parse import urlencode, quote
 import warnings
 warnings.filterwarnings("ignore")
 
 # Configuración
-ORPHANET_SEARCH_URL = "https://www.orpha.net/consor/cgi-bin/Disease_Search.php"
-DELAY_BETWEEN_REQUESTS = 2  # segundos
+ORPHANET_SEARCH_URL = f"{cliente_http.URL_ORPHANET}/consor/cgi-bin/Disease_Search.php"
 MAX_RETRIES = 3
 TIMEOUT = 10
-USER_AGENT = "OrphanetHomologation/1.0 (Research/Colombia)"
 
 class OrphanetHomologator:
     """Clase para homologación de códigos con Orphanet"""
@@ -38,8 +35,6 @@ class OrphanetHomologator:
         self.csv_path = csv_path
         self.df = None
         self.results = []
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": USER_AGENT})
         
     def load_dataset(self):
         """Carga el dataset de enfermedades raras de Colombia"""
@@ -87,7 +82,7 @@ class OrphanetHomologator:
         
         for attempt in range(MAX_RETRIES):
             try:
-                response = self.session.get(
+                response = cliente_http.get(
                     ORPHANET_SEARCH_URL, 
                     params=params, 
                     timeout=TIMEOUT,
@@ -101,8 +96,6 @@ class OrphanetHomologator:
                     
             except Exception as e:
                 print(f"❌ Error en intento {attempt + 1} para '{clean_name}': {e}")
-                if attempt < MAX_RETRIES - 1:
-                    time.sleep(DELAY_BETWEEN_REQUESTS * (attempt + 1))
         
         return {"success": False, "error": "Máximo de reintentos alcanzado"}
     
@@ -199,9 +192,6 @@ class OrphanetHomologator:
                 homolog_result["icd10_similarity"] = 0.0
             
             results.append(homolog_result)
-            
-            # Pausa entre requests
-            time.sleep(DELAY_BETWEEN_REQUESTS)
         
         self.results = results
         
@@ -320,7 +310,8 @@ def main():
         # Procesar muestra (ajustar sample_size según necesidad)
         sample_size = 20  # Empezar con muestra pequeña
         print(f"\n🎯 Procesando muestra de {sample_size} enfermedades")
-        print("⏰ Esto tomará aproximadamente {:.1f} minutos".format(sample_size * DELAY_BETWEEN_REQUESTS / 60))
+        tasa = cliente_http.obtener_limitador(cliente_http.HOST_ORPHANET).tasa
+        print("⏰ Esto tomará aproximadamente {:.1f} minutos".format(sample_size / tasa / 60))
         
         if homologator.process_sample(sample_size):
             # Generar reportes
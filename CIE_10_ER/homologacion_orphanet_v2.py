@@ -14,21 +14,18 @@ Fecha: Julio 2025
 """
 
 import pandas as pd
-import requests
-import time
 import re
 from datetime import datetime
 from bs4 import BeautifulSoup
 import json
+import cliente_http
 import warnings
 warnings.filterwarnings("ignore")
 
 # Configuración mejorada
-ORPHANET_BASE_URL = "https://www.orpha.net/consor/cgi-bin"
-DELAY_BETWEEN_REQUESTS = 1.5  # Reducir delay para eficiencia
+ORPHANET_BASE_URL = f"{cliente_http.URL_ORPHANET}/consor/cgi-bin"
 MAX_RETRIES = 2
 TIMEOUT = 8
-USER_AGENT = "OrphanetHomologation/2.0 (Research/Colombia)"
 
 class OrphanetHomologatorV2:
     """Clase mejorada para homologación con Orphanet"""
@@ -37,8 +34,6 @@ class OrphanetHomologatorV2:
         self.csv_path = csv_path
         self.df = None
         self.results = []
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": USER_AGENT})
         self.total_requests = 0
         
     def load_dataset(self):
@@ -108,8 +103,6 @@ class OrphanetHomologatorV2:
             # Si encontramos códigos Orphá específicos, usar ese resultado
             if result.get("orpha_codes") and len(result["orpha_codes"]) > 0:
                 return result
-            
-            time.sleep(0.5)  # Pequeña pausa entre estrategias
         
         return best_result
     
@@ -128,7 +121,7 @@ class OrphanetHomologatorV2:
         self.total_requests += 1
         
         try:
-            response = self.session.get(
+            response = cliente_http.get(
                 search_url,
                 params=params,
                 timeout=TIMEOUT,
@@ -314,7 +307,6 @@ class OrphanetHomologatorV2:
                 homolog_result["icd10_similarity"] = 0.0
             
             results.append(homolog_result)
-            time.sleep(DELAY_BETWEEN_REQUESTS)
         
         self.results = results
         
@@ -405,7 +397,8 @@ def main():
         # Procesar muestra
         sample_size = 10  # Muestra reducida para prueba inicial
         print(f"\n🎯 Procesando muestra de {sample_size} enfermedades")
-        print(f"⏱️ Tiempo estimado: {sample_size * DELAY_BETWEEN_REQUESTS / 60:.1f} minutos")
+        tasa = cliente_http.obtener_limitador(cliente_http.HOST_ORPHANET).tasa
+        print(f"⏱️ Tiempo estimado: {sample_size / tasa / 60:.1f} minutos (o más, si se prueban varias estrategias)")
         
         if homologator.process_homologation(sample_size):
             homologator.generate_enhanced_report()
@@ -14,30 +14,29 @@ https://www.orpha.net/es/disease/detail/932?name=Acondrog%C3%A9nesis&mode=name
 """
 
 import pandas as pd
-import requests
-import time
 from datetime import datetime
 import re
 from urllib.parse import quote, unquote
 import json
 
+from cache_http import obtener_cache_http
+from cliente_http import URL_ORPHANET
+from memo_detalles import obtener_memo_detalles
+
 # Configuración mejorada
 ORPHANET_URLS = {
-    "search_es": "https://www.orpha.net/es/disease/search",
-    "search_en": "https://www.orpha.net/en/disease/search", 
-    "detail_es": "https://www.orpha.net/es/disease/detail",
-    "detail_en": "https://www.orpha.net/en/disease/detail"
+    "search_es": f"{URL_ORPHANET}/es/disease/search",
+    "search_en": f"{URL_ORPHANET}/en/disease/search", 
+    "detail_es": f"{URL_ORPHANET}/es/disease/detail",
+    "detail_en": f"{URL_ORPHANET}/en/disease/detail"
 }
 
-USER_AGENT = "OrphanetHomologation/3.0 (Research/Colombia)"
-DELAY = 1.5
-
 class OrphanetHomologatorV3:
     """Homologador mejorado con búsqueda multiidioma"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": USER_AGENT})
+        self.cache_http = obtener_cache_http()
+        self.memo_detalles = obtener_memo_detalles('v3')
         self.resultados = []
         
     def demostrar_busqueda_hibrida(self):
@@ -73,10 +72,10 @@ class OrphanetHomologatorV3:
         for i, caso in enumerate(casos_prueba):
             print(f"\n{'='*15} CASO {i+1}: {caso['nombre_es']} {'='*15}")
             self.procesar_caso_completo(caso)
-            time.sleep(DELAY)
         
         print(f"\n{'='*80}")
         print("✅ DEMOSTRACIÓN HÍBRIDA COMPLETADA")
+        print(self.memo_detalles.resumen())
         print("Se probaron múltiples estrategias de búsqueda")
         print("=" * 80)
     
@@ -129,7 +128,7 @@ class OrphanetHomologatorV3:
                 'mode': 'name'
             }
             
-            response = self.session.get(search_url, params=params, timeout=10, verify=False)
+            response = self.cache_http.get(search_url, params=params, timeout=10, verify=False)
             
             if response.status_code == 200:
                 return self.parsear_resultados_busqueda(response.text, nombre, idioma)
@@ -141,7 +140,7 @@ class OrphanetHomologatorV3:
                 }
                 
         except Exception as e:
-            search_url = ORPHANET_URLS.get(f"search_{idioma}", "https://www.orpha.net/es/disease/search")
+            search_url = ORPHANET_URLS.get(f"search_{idioma}", ORPHANET_URLS["search_es"])
             return {
                 "exito": False,
                 "error": str(e),
@@ -178,12 +177,17 @@ class OrphanetHomologatorV3:
             }
     
     def verificar_orpha_directo(self, orpha_number):
-        """Verifica directamente un número ORPHA conocido"""
+        """Verifica directamente un número ORPHA conocido (memorizado por número ORPHA)"""
+        return self.memo_detalles.obtener(orpha_number, lambda: self.descargar_detalle(orpha_number),
+                                          memorizable=lambda resultado: resultado.get('exito'))
+    
+    def descargar_detalle(self, orpha_number):
+        """Descarga y parsea la página de detalle de un número ORPHA"""
         try:
             # URL directa al detalle
             detail_url = f"{ORPHANET_URLS['detail_es']}/{orpha_number}"
             
-            response = self.session.get(detail_url, timeout=10, verify=False)
+            response = self.cache_http.get(detail_url, timeout=10, verify=False)
             
             if response.status_code == 200:
                 return self.parsear_detalle_enfermedad(response.text, orpha_number)
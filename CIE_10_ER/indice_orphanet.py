@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+ÍNDICE PRECOMPILADO DE NOMBRES ORPHANET
+Artefacto binario compartido por todos los scripts de homologación
+
+Se construye una sola vez por versión de Orphanet y se guarda junto al snapshot
+(ver cache_orphanet.py) como indice_nombres.bin. El archivo se abre con mmap, por
+lo que cargarlo no requiere parsear el XML ni recorrer un DataFrame.
+
+Secciones del artefacto (arreglos uint32 salvo las tablas de texto):
+- nombres_texto / nombres_offsets:  nombres normalizados (nombre oficial + sinónimos)
+- nombres_disorder:                  disorder al que apunta cada nombre
+- orpha:                             número ORPHA de cada disorder
+- oficial_texto / oficial_offsets:   nombre oficial (sin normalizar) de cada disorder
+- cie10_texto / cie10_offsets:       códigos CIE-10 distintos, ordenados
+- disorder_cie10_ptr / _ids:         códigos CIE-10 de cada disorder (CSR)
+- cie10_disorder_ptr / _ids:         postings código CIE-10 -> disorders (CSR)
+- ngramas_texto / ngramas_offsets:   trigramas de caracteres distintos, ordenados
+- ngrama_ptr / ngrama_ids:           postings trigrama -> nombres (CSR)
+- nombres_ngramas:                   cantidad de trigramas distintos de cada nombre
+
+Los trigramas alimentan la generación de candidatos (bloqueo): antes de correr los
+scorers de thefuzz se preselecciona un subconjunto pequeño de nombres parecidos.
+Los nombres de menos de LONGITUD_MINIMA_NOMBRE caracteres (siglas como "AT")
+están en la tabla de nombres y sirven para la búsqueda exacta y los diccionarios
+nombre -> ORPHA, pero no tienen trigramas ni entran en la búsqueda fuzzy
+(entradas_fuzzy), igual que antes en la homologación directa.
+"""
+
+import os
+import re
+import sys
+import json
+import mmap
+import time
+import bisect
+import argparse
+import unicodedata
+from array import array
+
+import numpy as np
+
+from cache_orphanet import (DIRECTORIO_CACHE, TTL_METADATOS, cargar_registros_orphanet,
+                            obtener_version_publicada, ruta_snapshot, escribir_atomico)
+from metricas import obtener_metricas
+
+MAGIA = b'ORPHIDX3'
+NOMBRE_ARTEFACTO = 'indice_nombres.bin'
+LONGITUD_MINIMA_NOMBRE = 3
+MAX_CANDIDATOS = 100    # Por criterio; con 50 ya cambian coincidencias en el fixture
+
+
+def normalizar_nombre(nombre):
+    """
+    Limpia y normaliza nombres de enfermedades para mejorar las coincidencias.
+    Es la regla única usada tanto para construir el índice como para las consultas.
+    """
+    if not nombre or nombre != nombre:  # None, '' o NaN
+        return ""
+
+    # Convertir a string y limpiar
+    nombre = str(nombre).strip()
+
+    # Normalizar texto común
+    reemplazos = {
+        'Sindrome': 'Síndrome',
+        'sindrome': 'síndrome',
+        'Déficit': 'Deficiencia',
+        'déficit': 'deficiencia'
+    }
+
+    for original, normalizado in reemplazos.items():
+        nombre = nombre.replace(original, normalizado)
+
+    # Eliminar caracteres especiales problemáticos
+    nombre = re.sub(r'[^\w\sáéíóúñü-]', '', nombre)
+
+    # Normalizar espacios
+    nombre = ' '.join(nombre.split())
+
+    return nombre
+
+
+def clave_exacta(nombre_normalizado):
+    """
+    Clave para la búsqueda exacta: sin mayúsculas (casefold), sin tildes ni
+    diéresis y con los espacios colapsados
+    """
+    descompuesto = unicodedata.normalize('NFKD', nombre_normalizado.casefold())
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_tildes.split())
+
+
+def ngramas(texto):
+    """
+    Trigramas de caracteres del texto tal como lo ven los scorers de thefuzz
+    (minúsculas, sin signos de puntuación), con un espacio de relleno en los bordes
+    para que también representen el inicio y el fin de cada palabra.
+    """
+    procesado = ' '.join(re.sub(r'\W+', ' ', texto.lower()).split())
+    if not procesado:
+        return set()
+    relleno = f' {procesado} '
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+def _tabla_texto(textos):
+    """Concatena textos en UTF-8 y devuelve (bytes, offsets)"""
+    offsets = array('I', [0])
+    partes = []
+    total = 0
+    for texto in textos:
+        codificado = texto.encode('utf-8')
+        partes.append(codificado)
+        total += len(codificado)
+        offsets.append(total)
+    return b''.join(partes), offsets
+
+
+def _csr(listas):
+    """Convierte una lista de listas de enteros en (punteros, ids)"""
+    punteros = array('I', [0])
+    ids = array('I')
+    for lista in listas:
+        ids.extend(lista)
+        punteros.append(len(ids))
+    return punteros, ids
+
+
+def construir_indice(registros, ruta_artefacto):
+    """
+    Construye el artefacto binario a partir de los registros planos de Orphanet.
+
+    Cada nombre normalizado aparece una sola vez, en el orden de su primera
+    aparición; si varios disorders comparten un nombre, gana el último.
+    """
+    nombre_a_disorder = {}
+    orpha = array('I')
+    oficiales = []
+    codigos_por_disorder = []
+
+    for d, registro in enumerate(registros):
+        orpha_number = registro['orpha_number']
+        orpha.append(int(orpha_number) if orpha_number and str(orpha_number).isdigit() else 0)
+        oficiales.append(registro['nombre_oficial'] or '')
+        codigos_por_disorder.append(list(dict.fromkeys(registro['codigos_cie10_orphanet'])))
+
+        for nombre in [registro['nombre_oficial']] + list(registro['sinonimos']):
+            if nombre and isinstance(nombre, str):
+                nombre_limpio = normalizar_nombre(nombre)
+                if nombre_limpio:
+                    nombre_a_disorder[nombre_limpio] = d
+
+    # Tabla de códigos CIE-10 distintos (ordenada para búsqueda binaria)
+    codigos = sorted({c for lista in codigos_por_disorder for c in lista})
+    posicion_codigo = {c: i for i, c in enumerate(codigos)}
+    postings = [[] for _ in codigos]
+    for d, lista in enumerate(codigos_por_disorder):
+        for c in lista:
+            postings[posicion_codigo[c]].append(d)
+
+    nombres_texto, nombres_offsets = _tabla_texto(nombre_a_disorder.keys())
+    oficial_texto, oficial_offsets = _tabla_texto(oficiales)
+    cie10_texto, cie10_offsets = _tabla_texto(codigos)
+    disorder_cie10_ptr, disorder_cie10_ids = _csr(
+        [[posicion_codigo[c] for c in lista] for lista in codigos_por_disorder])
+    cie10_disorder_ptr, cie10_disorder_ids = _csr(postings)
+
+    # Índice invertido de trigramas sobre los nombres normalizados (sin los nombres cortos)
+    postings_ngramas = {}
+    nombres_ngramas = array('I')
+    for i, nombre in enumerate(nombre_a_disorder):
+        grams = ngramas(nombre) if len(nombre) >= LONGITUD_MINIMA_NOMBRE else set()
+        nombres_ngramas.append(len(grams))
+        for gram in grams:
+            postings_ngramas.setdefault(gram, []).append(i)
+    lista_ngramas = sorted(postings_ngramas)
+    ngramas_texto, ngramas_offsets = _tabla_texto(lista_ngramas)
+    ngrama_ptr, ngrama_ids = _csr(postings_ngramas[g] for g in lista_ngramas)
+
+    secciones = [
+        ('nombres_texto', nombres_texto),
+        ('nombres_offsets', nombres_offsets),
+        ('nombres_disorder', array('I', nombre_a_disorder.values())),
+        ('orpha', orpha),
+        ('oficial_texto', oficial_texto),
+        ('oficial_offsets', oficial_offsets),
+        ('cie10_texto', cie10_texto),
+        ('cie10_offsets', cie10_offsets),
+        ('disorder_cie10_ptr', disorder_cie10_ptr),
+        ('disorder_cie10_ids', disorder_cie10_ids),
+        ('cie10_disorder_ptr', cie10_disorder_ptr),
+        ('cie10_disorder_ids', cie10_disorder_ids),
+        ('ngramas_texto', ngramas_texto),
+        ('ngramas_offsets', ngramas_offsets),
+        ('ngrama_ptr', ngrama_ptr),
+        ('ngrama_ids', ngrama_ids),
+        ('nombres_ngramas', nombres_ngramas),
+    ]
+    _escribir_secciones(ruta_artefacto, secciones)
+    return len(nombre_a_disorder)
+
+
+def _escribir_secciones(ruta, secciones):
+    """Escribe cabecera (JSON) y secciones alineadas a 8 bytes"""
+    cuerpos = [(nombre, datos.tobytes() if isinstance(datos, array) else datos,
+                'I' if isinstance(datos, array) else 'B') for nombre, datos in secciones]
+
+    # Se repite hasta que el tamaño de la cabecera (que contiene los offsets) se estabiliza
+    tabla = {}
+    cabecera = b''
+    while True:
+        posicion = len(MAGIA) + 4 + len(cabecera)
+        posicion += -posicion % 8
+        for nombre, cuerpo, tipo in cuerpos:
+            tabla[nombre] = [posicion, len(cuerpo), tipo]
+            posicion += len(cuerpo)
+            posicion += -posicion % 8
+        nueva = json.dumps({'byteorder': sys.byteorder, 'secciones': tabla}).encode('utf-8')
+        nueva += b' ' * (-len(nueva) % 8)
+        if len(nueva) == len(cabecera):
+            cabecera = nueva
+            break
+        cabecera = nueva
+
+    def escribir(f):
+        f.write(MAGIA)
+        f.write(len(cabecera).to_bytes(4, 'little'))
+        f.write(cabecera)
+        for nombre, cuerpo, _ in cuerpos:
+            inicio = tabla[nombre][0]
+            f.write(b'\0' * (inicio - f.tell()))
+            f.write(cuerpo)
+
+    escribir_atomico(ruta, escribir)
+
+
+class IndiceOrphanet:
+    """Vista de solo lectura sobre el artefacto binario (mapeado en memoria)"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        with open(ruta, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        vista = memoryview(self._mmap)
+
+        if bytes(vista[:len(MAGIA)]) != MAGIA:
+            raise ValueError(f"Artefacto de índice no válido o de otra versión: {ruta}")
+        largo = int.from_bytes(vista[len(MAGIA):len(MAGIA) + 4], 'little')
+        cabecera = json.loads(bytes(vista[len(MAGIA) + 4:len(MAGIA) + 4 + largo]))
+        if cabecera['byteorder'] != sys.byteorder:
+            raise ValueError(f"Artefacto de índice generado con otro orden de bytes: {ruta}")
+
+        for nombre, (inicio, longitud, tipo) in cabecera['secciones'].items():
+            seccion = vista[inicio:inicio + longitud]
+            setattr(self, '_' + nombre, seccion.cast(tipo) if tipo == 'I' else seccion)
+
+        self._nombres = None
+        self._entradas_fuzzy = None
+        self._posiciones = None
+        self._exactos = None
+        self.aciertos_exactos = 0
+        self.fallos_exactos = 0
+        self._codigos = None
+        self._ngramas = None
+
+    def __len__(self):
+        return len(self._nombres_disorder)
+
+    @property
+    def total_disorders(self):
+        return len(self._orpha)
+
+    @staticmethod
+    def _texto(datos, offsets, i):
+        return bytes(datos[offsets[i]:offsets[i + 1]]).decode('utf-8')
+
+    def nombre(self, i):
+        """Nombre normalizado de la entrada i"""
+        return self._texto(self._nombres_texto, self._nombres_offsets, i)
+
+    def nombres(self):
+        """Lista de todos los nombres normalizados (se decodifica una sola vez)"""
+        if self._nombres is None:
+            offsets = self._nombres_offsets
+            texto = bytes(self._nombres_texto)
+            self._nombres = [texto[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(self))]
+        return self._nombres
+
+    def entradas_fuzzy(self):
+        """Entradas que participan en la búsqueda fuzzy: todas salvo los nombres cortos"""
+        if self._entradas_fuzzy is None:
+            self._entradas_fuzzy = [i for i, nombre in enumerate(self.nombres())
+                                    if len(nombre) >= LONGITUD_MINIMA_NOMBRE]
+        return self._entradas_fuzzy
+
+    def posicion(self, nombre_normalizado):
+        """Entrada correspondiente a un nombre ya normalizado (o None)"""
+        if self._posiciones is None:
+            self._posiciones = {nombre: i for i, nombre in enumerate(self.nombres())}
+        return self._posiciones.get(nombre_normalizado)
+
+    def buscar_exacto(self, nombre_normalizado):
+        """
+        Entrada cuyo nombre coincide exactamente, ignorando mayúsculas y tildes
+        (o None). Si varias coinciden gana la primera del índice. Lleva la cuenta
+        de aciertos y fallos en aciertos_exactos / fallos_exactos.
+        """
+        if self._exactos is None:
+            self._exactos = {}
+            for i, nombre in enumerate(self.nombres()):
+                self._exactos.setdefault(clave_exacta(nombre), i)
+        i = self._exactos.get(clave_exacta(nombre_normalizado))
+        if i is None:
+            self.fallos_exactos += 1
+        else:
+            self.aciertos_exactos += 1
+        return i
+
+    def disorder_de(self, i):
+        """Disorder al que apunta la entrada i"""
+        return self._nombres_disorder[i]
+
+    def orpha_number(self, d):
+        """Número ORPHA (texto) del disorder d, o None si el XML no lo traía"""
+        orpha = self._orpha[d]
+        return str(orpha) if orpha else None
+
+    def nombre_oficial(self, d):
+        return self._texto(self._oficial_texto, self._oficial_offsets, d)
+
+    def _codigo(self, c):
+        return self._texto(self._cie10_texto, self._cie10_offsets, c)
+
+    def codigos_cie10(self, d):
+        """Códigos CIE-10 que Orphanet asigna al disorder d"""
+        ptr = self._disorder_cie10_ptr
+        return [self._codigo(c) for c in self._disorder_cie10_ids[ptr[d]:ptr[d + 1]]]
+
+    def disorders_por_cie10(self, codigo):
+        """Disorders que tienen asignado exactamente el código CIE-10 dado"""
+        if self._codigos is None:
+            self._codigos = [self._codigo(c) for c in range(len(self._cie10_offsets) - 1)]
+        c = bisect.bisect_left(self._codigos, codigo)
+        if c == len(self._codigos) or self._codigos[c] != codigo:
+            return []
+        ptr = self._cie10_disorder_ptr
+        return list(self._cie10_disorder_ids[ptr[c]:ptr[c + 1]])
+
+    def candidatos(self, nombre_normalizado, limite=MAX_CANDIDATOS):
+        """
+        Entradas candidatas para un nombre, en orden ascendente (el mismo orden
+        de nombres(), para que los empates se resuelvan igual que sin bloqueo).
+
+        Se cuentan los trigramas compartidos con cada nombre y se toman los
+        `limite` mejores según tres criterios: similitud de Jaccard (nombres
+        parecidos en conjunto) y contención en ambos sentidos (candidato dentro
+        de la consulta y consulta dentro del candidato), porque token_set_ratio
+        da 100 cuando un conjunto de palabras está incluido en el otro. En los
+        empates se prefieren las entradas de menor posición, igual que extractOne.
+        """
+        if self._ngramas is None:
+            total = len(self._ngramas_offsets) - 1
+            self._ngramas = {self._texto(self._ngramas_texto, self._ngramas_offsets, g): g
+                             for g in range(total)}
+            self._ngrama_ids_np = np.frombuffer(self._ngrama_ids, dtype=np.uint32)
+            self._nombres_ngramas_np = np.frombuffer(self._nombres_ngramas, dtype=np.uint32).astype(np.float64)
+
+        grams_consulta = ngramas(nombre_normalizado)
+        posiciones = [self._ngramas[g] for g in grams_consulta if g in self._ngramas]
+        if not posiciones:
+            return []
+
+        ptr = self._ngrama_ptr
+        postings = np.concatenate([self._ngrama_ids_np[ptr[g]:ptr[g + 1]] for g in posiciones])
+        compartidos = np.bincount(postings, minlength=len(self)).astype(np.float64)
+
+        tamano_consulta = len(grams_consulta)
+        longitudes = np.maximum(self._nombres_ngramas_np, 1)
+        desempate = np.arange(len(self)) * 1e-12
+        criterios = (
+            compartidos / (tamano_consulta + longitudes - compartidos),  # Jaccard
+            compartidos / longitudes,                                   # candidato ⊂ consulta
+            compartidos / tamano_consulta,                              # consulta ⊂ candidato
+        )
+
+        seleccion = set()
+        for puntaje in criterios:
+            puntaje = puntaje - desempate
+            if limite < len(puntaje):
+                mejores = np.argpartition(-puntaje, limite)[:limite]
+            else:
+                mejores = np.arange(len(puntaje))
+            seleccion.update(int(i) for i in mejores if compartidos[i] > 0)
+
+        return sorted(seleccion)
+
+    def registro(self, d):
+        """Datos del disorder d con las mismas claves que usaban los scripts"""
+        return {
+            'orpha_number': self.orpha_number(d),
+            'nombre_oficial': self.nombre_oficial(d),
+            'codigos_cie10_orphanet': self.codigos_cie10(d)
+        }
+
+    def registro_de_entrada(self, i):
+        return self.registro(self.disorder_de(i))
+
+    def diccionario_orpha(self):
+        """Diccionario nombre normalizado -> número ORPHA (omite disorders sin ORPHA)"""
+        diccionario = {}
+        for i, nombre in enumerate(self.nombres()):
+            orpha = self.orpha_number(self.disorder_de(i))
+            if orpha:
+                diccionario[nombre] = orpha
+        return diccionario
+
+
+def obtener_indice(product_id="product1", idioma="Spanish",
+                   ttl_metadatos=TTL_METADATOS, directorio=DIRECTORIO_CACHE):
+    """
+    Devuelve (indice, version). El artefacto se construye solo la primera vez
+    para cada versión; después se abre directamente desde el snapshot.
+    """
+    xml_url, version = obtener_version_publicada(product_id, idioma, ttl_metadatos, directorio)
+    if not xml_url:
+        return None, None
+
+    ruta_artefacto = os.path.join(ruta_snapshot(product_id, idioma, version, directorio), NOMBRE_ARTEFACTO)
+    metricas = obtener_metricas()
+    if os.path.exists(ruta_artefacto):
+        try:
+            with metricas.temporizador('apertura_indice'):
+                return IndiceOrphanet(ruta_artefacto), version
+        except ValueError as e:
+            print(f"⚠️  {e}, se reconstruye")
+
+    registros, version = cargar_registros_orphanet(product_id, idioma, ttl_metadatos, directorio)
+    print("🔄 Construyendo índice de nombres Orphanet...")
+    with metricas.temporizador('construccion_indice'):
+        total = construir_indice(registros, ruta_artefacto)
+    print(f"📚 Índice guardado: {total} nombres en {ruta_artefacto}")
+
+    return IndiceOrphanet(ruta_artefacto), version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye o verifica el índice de nombres Orphanet")
+    parser.add_argument("--producto", default="product1", help="Producto de Orphadata")
+    parser.add_argument("--idioma", default="Spanish", help="Idioma del XML")
+
+    args = parser.parse_args()
+
+    inicio = time.time()
+    indice, version = obtener_indice(args.producto, args.idioma)
+    if indice is None:
+        print("❌ No se encontró el XML para el idioma solicitado")
+        sys.exit(1)
+
+    print(f"✅ Índice versión {version}: {len(indice)} nombres, {indice.total_disorders} disorders "
+          f"({time.time() - inicio:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
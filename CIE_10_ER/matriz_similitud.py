@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+MATRIZ DE SIMILITUD COLOMBIA × ORPHANET
+Puntuación por lotes con rapidfuzz.process.cdist (C++ y multihilo)
+
+En lugar de llamar process.extractOne nombre por nombre, se calcula la matriz
+completa (consultas × nombres Orphanet) por bloques de filas y se devuelve el
+top-k de cada fila como arreglos de NumPy.
+
+Los puntajes reproducen exactamente los de thefuzz.process.extractOne:
+- la consulta se procesa con full_process antes de compararla
+- para token_set_ratio / token_sort_ratio thefuzz fuerza ASCII en consulta y opciones
+- el mejor se elige con el puntaje sin redondear (primer índice en empates)
+  y recién después se redondea a entero
+"""
+
+import numpy as np
+from rapidfuzz import process as rf_process, fuzz as rf_fuzz
+from thefuzz import utils as tf_utils
+
+# (nombre, scorer de rapidfuzz, ¿thefuzz fuerza ASCII en las opciones?)
+SCORERS = (
+    ('token_set_ratio', rf_fuzz.token_set_ratio, True),
+    ('token_sort_ratio', rf_fuzz.token_sort_ratio, True),
+    ('ratio', rf_fuzz.ratio, False),
+)
+TAMANO_BLOQUE = 256
+# Desplazamiento por columna para desempatar a favor del menor índice; los
+# puntajes distintos de rapidfuzz difieren en mucho más que N * 1e-9
+_DESEMPATE = 1e-9
+
+
+def procesar_opciones(opciones, forzar_ascii):
+    """Procesa las opciones igual que thefuzz para el scorer correspondiente"""
+    return [tf_utils.full_process(o, force_ascii=forzar_ascii) for o in opciones]
+
+
+def procesar_consultas(consultas, forzar_ascii):
+    """
+    Procesa las consultas igual que thefuzz.process.extractOne: primero
+    full_process y luego el mismo procesador que se aplica a las opciones
+    """
+    return procesar_opciones([tf_utils.full_process(c) for c in consultas], forzar_ascii)
+
+
+def top_k_por_fila(consultas, opciones, scorer, k=5, tamano_bloque=TAMANO_BLOQUE, workers=-1):
+    """
+    Calcula la matriz consultas × opciones por bloques de filas y devuelve
+    (indices, puntajes), ambos de forma (len(consultas), k), ordenados de mayor
+    a menor puntaje y, en empates, de menor a mayor índice. Las consultas y
+    opciones deben venir ya procesadas.
+    """
+    total = len(consultas)
+    k = min(k, len(opciones))
+    indices = np.zeros((total, k), dtype=np.int64)
+    puntajes = np.zeros((total, k), dtype=np.float64)
+    if k == 0:
+        return indices, puntajes
+
+    desempate = np.arange(len(opciones), dtype=np.float64) * _DESEMPATE
+
+    for inicio in range(0, total, tamano_bloque):
+        fin = min(inicio + tamano_bloque, total)
+        # float64: con float32 algunos puntajes cambiarían de entero al redondear
+        matriz = rf_process.cdist(consultas[inicio:fin], opciones, scorer=scorer,
+                                  dtype=np.float64, workers=workers)
+        ajustada = matriz - desempate
+
+        if k < ajustada.shape[1]:
+            parcial = np.argpartition(-ajustada, k - 1, axis=1)[:, :k]
+        else:
+            parcial = np.broadcast_to(np.arange(ajustada.shape[1]), ajustada.shape)
+        orden = np.argsort(-np.take_along_axis(ajustada, parcial, axis=1), axis=1, kind='stable')
+        mejores = np.take_along_axis(parcial, orden, axis=1)
+
+        indices[inicio:fin] = mejores
+        puntajes[inicio:fin] = np.take_along_axis(matriz, mejores, axis=1)
+
+    return indices, puntajes
+
+
+def mejores_por_scorer(consultas, opciones, k=5, tamano_bloque=TAMANO_BLOQUE, workers=-1):
+    """
+    Aplica los tres scorers de la homologación. Devuelve un dict
+    nombre_scorer -> (indices, puntajes) con el top-k por fila de cada uno.
+    """
+    resultados = {}
+    for nombre, scorer, forzar_ascii in SCORERS:
+        consultas_procesadas = procesar_consultas(consultas, forzar_ascii)
+        opciones_procesadas = procesar_opciones(opciones, forzar_ascii)
+        resultados[nombre] = top_k_por_fila(consultas_procesadas, opciones_procesadas, scorer,
+                                            k=k, tamano_bloque=tamano_bloque, workers=workers)
+    return resultados
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+MEMO DE PÁGINAS DE DETALLE POR NÚMERO ORPHA
+Registro ya parseado de cada disease/detail/{orpha}, en memoria y en disco
+
+Estructura en disco:
+    .cache_orphanet/detalles_orpha.sqlite
+
+Varias enfermedades de Colombia llegan al mismo número ORPHA por términos de
+búsqueda distintos; con el memo la página se descarga y se parsea una sola vez
+por periodo (el mismo TTL que la caché HTTP) y las siguientes consultas
+devuelven el registro guardado.
+
+Cada script parsea el detalle a su manera, así que los registros se guardan
+por espacio (p. ej. 'masiva', 'v3', 'prueba_directo') y número ORPHA. Todo
+registro devuelto incluye 'obtenido_en' (fecha ISO de la descarga).
+
+Si ORPHANET_BASE_URL apunta a otro servidor (servidor_replay.py), el espacio
+lleva su host y puerto ('masiva@127.0.0.1:8765'): los números ORPHA de un
+sitio sintético no pisan ni suplantan los registros de orpha.net.
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import argparse
+import threading
+import time
+from datetime import datetime
+
+import cliente_http
+from cache_orphanet import DIRECTORIO_CACHE
+from cache_http import TTL_RESPUESTAS
+
+RUTA_MEMO_DETALLES = os.path.join(DIRECTORIO_CACHE, 'detalles_orpha.sqlite')
+TTL_DETALLES = TTL_RESPUESTAS     # Segundos antes de volver a descargar y parsear un detalle
+
+
+def conectar(ruta=RUTA_MEMO_DETALLES):
+    """Abre la base del memo creando la tabla si no existe"""
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    conexion = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+    conexion.execute('PRAGMA journal_mode=WAL')
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS detalles (
+            espacio TEXT NOT NULL,
+            orpha_number TEXT NOT NULL,
+            registro TEXT NOT NULL,
+            obtenido_en REAL NOT NULL,
+            PRIMARY KEY (espacio, orpha_number)
+        )
+    """)
+    conexion.commit()
+    return conexion
+
+
+class MemoDetalles:
+    """Memo de registros de detalle de un espacio, seguro para usar desde varios hilos"""
+
+    def __init__(self, espacio, ruta=RUTA_MEMO_DETALLES, ttl=TTL_DETALLES):
+        self.espacio = espacio
+        self.ruta = ruta
+        self.ttl = ttl
+        self.aciertos_memoria = 0
+        self.aciertos_disco = 0
+        self.descargas = 0
+
+        self._memoria = {}            # orpha -> registro
+        self._en_curso = {}           # orpha -> lock, para no descargar dos veces a la vez
+        self._lock = threading.Lock()
+
+        self._conexion = conectar(ruta)
+
+    def _vigente(self, registro):
+        return time.time() - registro['_obtenido_ts'] < self.ttl
+
+    def _leer_disco(self, orpha):
+        with self._lock:
+            fila = self._conexion.execute(
+                'SELECT registro, obtenido_en FROM detalles WHERE espacio = ? AND orpha_number = ?',
+                (self.espacio, orpha)).fetchone()
+        if fila is None:
+            return None
+        registro = json.loads(fila[0])
+        registro['_obtenido_ts'] = fila[1]
+        return registro
+
+    def _guardar(self, orpha, registro):
+        ahora = time.time()
+        registro = dict(registro, obtenido_en=datetime.fromtimestamp(ahora).isoformat(timespec='seconds'))
+        with self._lock:
+            self._conexion.execute('INSERT OR REPLACE INTO detalles VALUES (?, ?, ?, ?)',
+                                   (self.espacio, orpha, json.dumps(registro, ensure_ascii=False), ahora))
+            self._conexion.commit()
+        registro['_obtenido_ts'] = ahora
+        return registro
+
+    def obtener(self, orpha_number, cargar, memorizable=None):
+        """
+        Devuelve el registro del número ORPHA. Si no hay uno vigente llama a
+        cargar() (descarga + parseo) y lo guarda, salvo que memorizable(registro)
+        sea falso (p. ej. un error HTTP, que conviene reintentar más adelante).
+        """
+        orpha = str(orpha_number)
+        with self._lock:
+            registro = self._memoria.get(orpha)
+            if registro is not None and self._vigente(registro):
+                self.aciertos_memoria += 1
+                return self._copia(registro)
+            lock_orpha = self._en_curso.setdefault(orpha, threading.Lock())
+
+        with lock_orpha:
+            # Otro hilo pudo haberlo cargado mientras se esperaba
+            with self._lock:
+                registro = self._memoria.get(orpha)
+            if registro is not None and self._vigente(registro):
+                with self._lock:
+                    self.aciertos_memoria += 1
+                return self._copia(registro)
+
+            registro = self._leer_disco(orpha)
+            if registro is not None and self._vigente(registro):
+                with self._lock:
+                    self._memoria[orpha] = registro
+                    self.aciertos_disco += 1
+                return self._copia(registro)
+
+            nuevo = cargar()
+            with self._lock:
+                self.descargas += 1
+            if memorizable is not None and not memorizable(nuevo):
+                return nuevo
+            registro = self._guardar(orpha, nuevo)
+            with self._lock:
+                self._memoria[orpha] = registro
+            return self._copia(registro)
+
+    @staticmethod
+    def _copia(registro):
+        """Copia para el llamador (que puede modificarla) sin el timestamp interno"""
+        copia = copy.deepcopy(registro)
+        copia.pop('_obtenido_ts', None)
+        return copia
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos_memoria + self.aciertos_disco + self.descargas
+            entradas = self._conexion.execute('SELECT COUNT(*) FROM detalles WHERE espacio = ?',
+                                              (self.espacio,)).fetchone()[0]
+        aciertos = self.aciertos_memoria + self.aciertos_disco
+        return {
+            'espacio': self.espacio,
+            'entradas': entradas,
+            'aciertos_memoria': self.aciertos_memoria,
+            'aciertos_disco': self.aciertos_disco,
+            'descargas': self.descargas,
+            'tasa_aciertos': (aciertos / consultas * 100) if consultas else 0.0
+        }
+
+    def resumen(self):
+        """Línea de estadísticas para los reportes de los scripts"""
+        stats = self.estadisticas()
+        return (f"🗂️  Detalles ORPHA: {stats['aciertos_memoria'] + stats['aciertos_disco']} desde el memo "
+                f"({stats['aciertos_memoria']} memoria, {stats['aciertos_disco']} disco), "
+                f"{stats['descargas']} descargados; tasa de aciertos {stats['tasa_aciertos']:.1f}%")
+
+    def vaciar(self):
+        with self._lock:
+            self._memoria.clear()
+            self._conexion.execute('DELETE FROM detalles WHERE espacio = ?', (self.espacio,))
+            self._conexion.commit()
+
+
+_memos = {}
+_lock_memos = threading.Lock()
+
+
+def espacio_servidor(espacio):
+    """Espacio del memo para el servidor configurado en cliente_http (ORPHANET_BASE_URL)"""
+    if cliente_http.ES_ORPHANET_OFICIAL:
+        return espacio
+    return f"{espacio}@{cliente_http.SERVIDOR_ORPHANET}"
+
+
+def obtener_memo_detalles(espacio):
+    """Memo compartido por el proceso para un espacio (se abre la primera vez que se usa)"""
+    espacio = espacio_servidor(espacio)
+    with _lock_memos:
+        if espacio not in _memos:
+            _memos[espacio] = MemoDetalles(espacio)
+        return _memos[espacio]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memo de páginas de detalle de Orphanet por número ORPHA")
+    parser.add_argument("--vaciar", metavar="ESPACIO",
+                        help="Eliminar los registros de un espacio (el nombre tal como aparece en el listado)")
+    args = parser.parse_args()
+
+    if args.vaciar:
+        MemoDetalles(args.vaciar).vaciar()
+        print(f"🗑️  Memo vaciado: {args.vaciar}")
+
+    conexion = conectar()
+    print(f"💾 {RUTA_MEMO_DETALLES}")
+    for espacio, entradas in conexion.execute('SELECT espacio, COUNT(*) FROM detalles GROUP BY espacio'):
+        print(f"   • {espacio}: {entradas} registros")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+MÉTRICAS DE LOS SCRIPTS DE HOMOLOGACIÓN
+Temporizadores, contadores e histogramas en memoria para ver dónde se va el tiempo
+
+Los scripts solo informaban su avance con print; con este registro cada etapa
+(descarga y parseo del XML, construcción del índice, búsqueda fuzzy, peticiones
+HTTP, escritura de reportes...) acumula su tiempo y sus conteos, y al final de
+la corrida se exportan:
+
+    JSON        metricas.json   (resumen con cuenta, suma, mínimo, máximo y cubetas)
+    Prometheus  metricas.prom   (formato de texto de exposición, para node_exporter
+                                 --collector.textfile o un Pushgateway)
+
+Uso:
+    from metricas import obtener_metricas
+    metricas = obtener_metricas()
+
+    with metricas.temporizador('construccion_indice'):
+        ...                                           # histograma construccion_indice_segundos
+    metricas.contador('http_respuestas', host='www.orpha.net', estado=200)
+    metricas.observar('candidatos_fuzzy', len(opciones), limites=LIMITES_CONTEOS)
+
+    metricas.exportar('metricas.json')                # o .prom para el formato Prometheus
+
+Las etiquetas son argumentos con nombre; cada combinación de nombre y etiquetas
+es una serie distinta. Es seguro usarlo desde varios hilos (motor_descargas).
+Cada proceso tiene su propio registro: los procesos hijos devuelven
+instantanea() junto con sus resultados y el proceso principal la suma con
+fusionar().
+"""
+
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+PREFIJO_PROMETHEUS = 'homologacion_'
+EXTENSIONES_PROMETHEUS = ('.prom', '.txt')
+
+# Límites superiores de las cubetas (le) por defecto, en segundos
+LIMITES_SEGUNDOS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+LIMITES_CONTEOS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000)
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def _formatear_etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    valores = []
+    for k, v in etiquetas:
+        v = v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        valores.append(f'{k}="{v}"')
+    return '{' + ','.join(valores) + '}'
+
+
+def _numero(valor):
+    """Número en formato Prometheus (los enteros sin decimales)"""
+    if valor == float('inf'):
+        return '+Inf'
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+
+class Histograma:
+    """Distribución de una serie: cuenta, suma, extremos y cubetas con límite superior"""
+
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = tuple(limites)
+        self.cubetas = [0] * (len(self.limites) + 1)    # La última es +Inf
+        self.cuenta = 0
+        self.suma = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def observar(self, valor):
+        self.cubetas[bisect.bisect_left(self.limites, valor)] += 1
+        self.cuenta += 1
+        self.suma += valor
+        self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+        self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def fusionar(self, otro):
+        """Suma las observaciones de otro histograma con los mismos límites"""
+        if otro.limites != self.limites:
+            raise ValueError("No se pueden fusionar histogramas con límites distintos")
+        self.cubetas = [a + b for a, b in zip(self.cubetas, otro.cubetas)]
+        self.cuenta += otro.cuenta
+        self.suma += otro.suma
+        for valor in (otro.minimo, otro.maximo):
+            if valor is not None:
+                self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+                self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+    def acumuladas(self):
+        """Pares (límite, observaciones <= límite) como las cubetas 'le' de Prometheus"""
+        total = 0
+        pares = []
+        for limite, cantidad in zip(self.limites + (float('inf'),), self.cubetas):
+            total += cantidad
+            pares.append((limite, total))
+        return pares
+
+    def percentil(self, p):
+        """Estimación del percentil p (0-100) por el límite de la cubeta que lo contiene"""
+        if not self.cuenta:
+            return None
+        objetivo = self.cuenta * p / 100
+        for limite, acumuladas in self.acumuladas():
+            if acumuladas >= objetivo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+    def a_dict(self):
+        return {
+            'cuenta': self.cuenta,
+            'suma': round(self.suma, 6),
+            'media': round(self.suma / self.cuenta, 6) if self.cuenta else None,
+            'minimo': self.minimo,
+            'maximo': self.maximo,
+            'p50': self.percentil(50),
+            'p95': self.percentil(95),
+            'cubetas': {_numero(limite): acumuladas for limite, acumuladas in self.acumuladas()},
+        }
+
+
+class RegistroMetricas:
+    """Contadores e histogramas con etiquetas, seguros para usar desde varios hilos"""
+
+    def __init__(self):
+        self._contadores = {}         # (nombre, etiquetas) -> valor
+        self._histogramas = {}        # (nombre, etiquetas) -> Histograma
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+
+    def contador(self, nombre, valor=1, **etiquetas):
+        """Suma `valor` al contador"""
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + valor
+
+    def observar(self, nombre, valor, limites=LIMITES_SEGUNDOS, **etiquetas):
+        """Agrega una observación al histograma (`limites` solo cuenta la primera vez)"""
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = Histograma(limites)
+            histograma.observar(valor)
+
+    @contextmanager
+    def temporizador(self, nombre, **etiquetas):
+        """Mide el bloque y lo agrega al histograma `<nombre>_segundos` (también si lanza una excepción)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(f'{nombre}_segundos', time.perf_counter() - inicio, **etiquetas)
+
+    def valor(self, nombre, **etiquetas):
+        """Valor actual de un contador (0 si no existe)"""
+        with self._lock:
+            return self._contadores.get(_clave(nombre, etiquetas), 0)
+
+    def series(self, nombre):
+        """{etiquetas: valor} de todas las series de un contador (etiquetas como tupla de pares)"""
+        with self._lock:
+            return {etiquetas: valor for (n, etiquetas), valor in self._contadores.items() if n == nombre}
+
+    def tiempos(self):
+        """{nombre: segundos totales} de los temporizadores, sumando todas sus etiquetas"""
+        totales = {}
+        with self._lock:
+            for (nombre, _), histograma in self._histogramas.items():
+                if nombre.endswith('_segundos'):
+                    nombre = nombre[:-len('_segundos')]
+                    totales[nombre] = totales.get(nombre, 0) + histograma.suma
+        return totales
+
+    def reiniciar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+            self.inicio = time.time()
+
+    def instantanea(self):
+        """Copia serializable (pickle) de los contadores e histogramas, para fusionar() en otro proceso"""
+        with self._lock:
+            histogramas = {}
+            for clave, histograma in self._histogramas.items():
+                copia = histogramas[clave] = Histograma(histograma.limites)
+                copia.fusionar(histograma)
+            return {'contadores': dict(self._contadores), 'histogramas': histogramas}
+
+    def fusionar(self, instantanea):
+        """Suma al registro una instantanea() tomada en otro proceso"""
+        with self._lock:
+            for clave, valor in instantanea['contadores'].items():
+                self._contadores[clave] = self._contadores.get(clave, 0) + valor
+            for clave, histograma in instantanea['histogramas'].items():
+                propio = self._histogramas.get(clave)
+                if propio is None:
+                    propio = self._histogramas[clave] = Histograma(histograma.limites)
+                propio.fusionar(histograma)
+
+    def a_dict(self):
+        with self._lock:
+            contadores = [{'nombre': nombre, 'etiquetas': dict(etiquetas), 'valor': valor}
+                          for (nombre, etiquetas), valor in sorted(self._contadores.items())]
+            histogramas = [dict({'nombre': nombre, 'etiquetas': dict(etiquetas)}, **histograma.a_dict())
+                           for (nombre, etiquetas), histograma in sorted(self._histogramas.items())]
+        return {
+            'inicio': datetime.fromtimestamp(self.inicio).isoformat(),
+            'duracion_s': round(time.time() - self.inicio, 3),
+            'contadores': contadores,
+            'histogramas': histogramas,
+        }
+
+    def texto_prometheus(self):
+        """Métricas en el formato de texto de exposición de Prometheus"""
+        lineas = []
+        with self._lock:
+            declarados = set()
+            for (nombre, etiquetas), valor in sorted(self._contadores.items()):
+                metrica = f'{PREFIJO_PROMETHEUS}{nombre}_total'
+                if metrica not in declarados:
+                    lineas.append(f'# TYPE {metrica} counter')
+                    declarados.add(metrica)
+                lineas.append(f'{metrica}{_formatear_etiquetas(etiquetas)} {_numero(valor)}')
+
+            for (nombre, etiquetas), histograma in sorted(self._histogramas.items()):
+                metrica = f'{PREFIJO_PROMETHEUS}{nombre}'
+                if metrica not in declarados:
+                    lineas.append(f'# TYPE {metrica} histogram')
+                    declarados.add(metrica)
+                for limite, acumuladas in histograma.acumuladas():
+                    etiquetas_cubeta = etiquetas + (('le', _numero(limite)),)
+                    lineas.append(f'{metrica}_bucket{_formatear_etiquetas(etiquetas_cubeta)} {acumuladas}')
+                lineas.append(f'{metrica}_sum{_formatear_etiquetas(etiquetas)} {_numero(histograma.suma)}')
+                lineas.append(f'{metrica}_count{_formatear_etiquetas(etiquetas)} {histograma.cuenta}')
+        return '\n'.join(lineas) + '\n'
+
+    def exportar(self, ruta):
+        """Escribe las métricas en JSON o, si la extensión es .prom/.txt, en formato Prometheus"""
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        if ruta.endswith(EXTENSIONES_PROMETHEUS):
+            contenido = self.texto_prometheus()
+        else:
+            contenido = json.dumps(self.a_dict(), ensure_ascii=False, indent=2)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            f.write(contenido)
+        return ruta
+
+    def resumen(self):
+        """Tiempo por etapa, de mayor a menor, como texto para imprimir al final"""
+        with self._lock:
+            filas = sorted(((nombre[:-len('_segundos')] + _formatear_etiquetas(etiquetas), histograma)
+                            for (nombre, etiquetas), histograma in self._histogramas.items()
+                            if nombre.endswith('_segundos')),
+                           key=lambda fila: fila[1].suma, reverse=True)
+        if not filas:
+            return "⏱️  Sin tiempos registrados"
+        lineas = ["⏱️  Tiempo por etapa:"]
+        for nombre, histograma in filas:
+            lineas.append(f"   • {nombre}: {histograma.suma:.2f}s en {histograma.cuenta} llamadas "
+                          f"(media {histograma.suma / histograma.cuenta * 1000:.1f} ms, "
+                          f"máx {histograma.maximo * 1000:.1f} ms)")
+        return '\n'.join(lineas)
+
+
+_registro = None
+_lock_registro = threading.Lock()
+
+
+def obtener_metricas():
+    """Registro compartido por el proceso (se crea la primera vez que se usa)"""
+    global _registro
+    with _lock_registro:
+        if _registro is None:
+            _registro = RegistroMetricas()
+        return _registro
+
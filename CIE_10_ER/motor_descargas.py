@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+MOTOR DE DESCARGAS CONCURRENTES PARA ORPHANET
+Reemplaza los time.sleep fijos de los scrapers por un límite global de tasa
+
+Componentes:
+- LimitadorTokens: token bucket compartido; cada petición HTTP consume un token,
+  de modo que el total de peticiones por segundo no supera la tasa configurada
+  sin importar cuántas búsquedas estén en curso
+- LimitadorAdaptativo: token bucket AIMD; sube la tasa poco a poco mientras
+  las respuestas llegan rápido y con 200, y la recorta a la mitad ante 429,
+  503, timeouts o Retry-After. La tasa aprendida se guarda en JSON entre
+  ejecuciones (cliente_http.py mantiene uno por host)
+- MotorDescargas: ejecuta las búsquedas (código síncrono con requests) en hilos
+  mediante asyncio.to_thread, con un máximo de búsquedas simultáneas (semáforo)
+
+Así la latencia de red de varias enfermedades se superpone, pero el presupuesto
+de cortesía hacia orpha.net (peticiones/segundo) se mantiene igual.
+"""
+
+import os
+import time
+import json
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Estados que indican que el servidor está saturado o nos está limitando
+ESTADOS_SATURACION = (429, 502, 503, 504)
+TASA_MINIMA = 0.1               # Peticiones/s: nunca más lento que una cada 10 s
+TASA_MAXIMA = 5.0
+INCREMENTO = 0.05               # Peticiones/s que se suman por cada segundo de respuestas sanas
+FACTOR_REDUCCION = 0.5          # Multiplicador ante saturación
+FACTOR_LENTITUD = 0.9           # Multiplicador ante respuestas 200 más lentas que el objetivo
+LATENCIA_OBJETIVO = 2.0         # Segundos
+INTERVALO_GUARDADO = 10.0       # Segundos mínimos entre escrituras del estado (salvo reducciones)
+_lock_estado = threading.Lock()
+
+
+class LimitadorTokens:
+    """
+    Token bucket seguro entre hilos. Cada llamada reserva un token y devuelve
+    cuánto hay que esperar para usarlo; los tokens se reponen a `tasa` por
+    segundo hasta un máximo de `rafaga`.
+    """
+
+    def __init__(self, tasa, rafaga=1):
+        if tasa <= 0:
+            raise ValueError("La tasa debe ser mayor que cero")
+        self.tasa = tasa
+        self.rafaga = max(1, rafaga)
+        self._tokens = float(self.rafaga)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reservar(self):
+        """Reserva un token y devuelve los segundos de espera antes de usarlo"""
+        with self._lock:
+            ahora = time.monotonic()
+            self._tokens = min(self.rafaga, self._tokens + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            self._tokens -= 1
+            # Tokens negativos = peticiones ya reservadas a futuro
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.tasa
+
+    def esperar(self):
+        """Versión bloqueante, para llamar desde los hilos que hacen requests.get"""
+        espera = self.reservar()
+        if espera > 0:
+            time.sleep(espera)
+
+    async def adquirir(self):
+        """Versión asíncrona"""
+        espera = self.reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+def segundos_retry_after(valor):
+    """Segundos indicados por una cabecera Retry-After (número o fecha HTTP)"""
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LimitadorAdaptativo(LimitadorTokens):
+    """
+    Token bucket con control AIMD de la tasa. Después de cada petición se
+    llama a registrar_respuesta() o registrar_error():
+
+    - 200 rápido: suma INCREMENTO / tasa (≈ INCREMENTO peticiones/s por segundo)
+    - 200 lento (> latencia_objetivo): multiplica por FACTOR_LENTITUD
+    - 429/5xx de saturación (también si se reintentó), timeouts y errores de conexión: multiplica por
+      FACTOR_REDUCCION, como mucho una vez por intervalo (las peticiones que
+      ya estaban en vuelo no vuelven a recortar)
+    - Retry-After: además el bucket queda en deuda hasta que venza, de modo
+      que las peticiones en espera salen después y manteniendo el espaciado
+
+    Con `ruta_estado` la tasa se carga al crear el limitador y se guarda en
+    ese JSON bajo `clave`, así la siguiente ejecución arranca donde quedó.
+    """
+
+    def __init__(self, tasa, rafaga=1, tasa_minima=TASA_MINIMA, tasa_maxima=TASA_MAXIMA,
+                 latencia_objetivo=LATENCIA_OBJETIVO, ruta_estado=None, clave='default'):
+        self.tasa_minima = tasa_minima
+        self.tasa_maxima = tasa_maxima
+        self.latencia_objetivo = latencia_objetivo
+        self.ruta_estado = ruta_estado
+        self.clave = clave
+        self.reducciones = 0
+        self._ultima_reduccion = 0.0
+        self._ultimo_guardado = 0.0
+
+        guardada = self._cargar_tasa()
+        super().__init__(self._acotar(guardada if guardada else tasa), rafaga)
+
+    def _acotar(self, tasa):
+        return min(self.tasa_maxima, max(self.tasa_minima, tasa))
+
+    def registrar_respuesta(self, estado, latencia, retry_after=None, reintentada=False):
+        """
+        Ajusta la tasa según el código HTTP y la latencia de una respuesta.
+        `reintentada`: hubo intentos fallidos previos (p. ej. reintentos de urllib3)
+        """
+        pausa = segundos_retry_after(retry_after)
+        if reintentada or estado in ESTADOS_SATURACION or pausa:
+            self._reducir(FACTOR_REDUCCION, pausa)
+        elif estado < 400 and latencia > self.latencia_objetivo:
+            self._reducir(FACTOR_LENTITUD)
+        elif estado < 400:
+            with self._lock:
+                self.tasa = self._acotar(self.tasa + INCREMENTO / self.tasa)
+            self.guardar()
+
+    def registrar_error(self):
+        """Timeout o error de conexión: se trata como saturación"""
+        self._reducir(FACTOR_REDUCCION)
+
+    def _reducir(self, factor, pausa=None):
+        with self._lock:
+            ahora = time.monotonic()
+            # Una sola reducción por intervalo entre peticiones
+            reducir = ahora - self._ultima_reduccion >= 1 / self.tasa
+            if reducir:
+                self._ultima_reduccion = ahora
+                self.tasa = self._acotar(self.tasa * factor)
+                self.reducciones += 1
+            if pausa:
+                # Tokens negativos = tiempo hasta el próximo token disponible
+                self._tokens = min(self.rafaga, self._tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                self._tokens = min(self._tokens, 1 - pausa * self.tasa)
+        if reducir:
+            self.guardar(forzar=True)
+
+    def _cargar_tasa(self):
+        if not self.ruta_estado or not os.path.exists(self.ruta_estado):
+            return None
+        try:
+            with open(self.ruta_estado, 'r', encoding='utf-8') as f:
+                return json.load(f).get(self.clave, {}).get('tasa')
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def guardar(self, forzar=False):
+        """Guarda la tasa actual en el JSON de estado (compartido entre claves)"""
+        if not self.ruta_estado:
+            return
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo_guardado < INTERVALO_GUARDADO:
+            return
+        self._ultimo_guardado = ahora
+        with _lock_estado:
+            try:
+                estado = {}
+                if os.path.exists(self.ruta_estado):
+                    with open(self.ruta_estado, 'r', encoding='utf-8') as f:
+                        estado = json.load(f)
+                estado[self.clave] = {'tasa': round(self.tasa, 4), 'actualizado': time.time()}
+                directorio = os.path.dirname(self.ruta_estado)
+                if directorio:
+                    os.makedirs(directorio, exist_ok=True)
+                ruta_tmp = self.ruta_estado + '.tmp'
+                with open(ruta_tmp, 'w', encoding='utf-8') as f:
+                    json.dump(estado, f, indent=2)
+                os.replace(ruta_tmp, self.ruta_estado)
+            except (OSError, ValueError):
+                pass  # El estado es solo una optimización para la próxima ejecución
+
+
+class MotorDescargas:
+    """
+    Ejecuta una función de búsqueda sobre muchos elementos con concurrencia
+    acotada. La función corre en un hilo y debe llamar a limitador.esperar()
+    antes de cada petición HTTP.
+    """
+
+    def __init__(self, concurrencia=4, tasa=1.0, rafaga=1, limitador=None):
+        self.concurrencia = max(1, concurrencia)
+        # Se puede compartir un limitador existente (p. ej. el adaptativo de cliente_http)
+        self.limitador = limitador or LimitadorTokens(tasa, rafaga)
+
+    async def _ejecutar_todos(self, funcion, argumentos, al_terminar):
+        loop = asyncio.get_running_loop()
+        # El ejecutor por defecto de asyncio limita los hilos según los núcleos
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrencia))
+        semaforo = asyncio.Semaphore(self.concurrencia)
+
+        async def ejecutar(posicion, args):
+            async with semaforo:
+                resultado = await asyncio.to_thread(funcion, *args)
+            if al_terminar:
+                al_terminar(posicion, resultado)
+            return resultado
+
+        # gather conserva el orden de entrada
+        return await asyncio.gather(*(ejecutar(p, args) for p, args in enumerate(argumentos)))
+
+    def mapear(self, funcion, argumentos, al_terminar=None):
+        """
+        Llama funcion(*args) para cada tupla de `argumentos` y devuelve los
+        resultados en el mismo orden. `al_terminar(posicion, resultado)` se
+        invoca a medida que cada llamada finaliza.
+        """
+        return asyncio.run(self._ejecutar_todos(funcion, list(argumentos), al_terminar))
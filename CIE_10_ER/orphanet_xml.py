@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+CARGADOR STREAMING DEL XML DE ORPHADATA (product1)
+Recorre JDBOR/DisorderList/Disorder de forma incremental con iterparse
+
+Características:
+- No construye el árbol completo ni un dict anidado (xmltodict)
+- Cada Disorder se convierte en un registro plano y se libera enseguida
+- Memoria pico aproximadamente constante sin importar el tamaño del producto
+- Lee una ruta o un objeto tipo archivo; la descarga y su copia local las
+  hace cache_orphanet.py
+"""
+
+import xml.etree.ElementTree as ET
+
+import cliente_http
+
+URL_METADATOS = "http://www.orphadata.org/cgi-bin/free_{product_id}_cross_xml.json"
+RUTA_DISORDER = ('JDBOR', 'DisorderList', 'Disorder')
+
+
+def obtener_metadatos_producto(product_id="product1", idioma="Spanish"):
+    """
+    Consulta el JSON de metadatos de Orphadata y devuelve (url_xml, version)
+    para el idioma pedido. Devuelve (None, None) si el idioma no existe.
+    """
+    meta_url = URL_METADATOS.format(product_id=product_id)
+    meta_response = cliente_http.get(meta_url, timeout=60)
+    meta_response.raise_for_status()
+
+    for item in meta_response.json():
+        if isinstance(item, dict) and item.get('aLanguage') == idioma:
+            return item.get('anUrl'), item.get('aDate')
+
+    return None, None
+
+
+def _texto(elemento):
+    """Texto limpio de un elemento (o None si no existe o está vacío)"""
+    if elemento is None or elemento.text is None:
+        return None
+    texto = elemento.text.strip()
+    return texto or None
+
+
+def _registro_desde_disorder(disorder):
+    """Convierte un elemento <Disorder> en un registro plano"""
+    # Las versiones actuales usan OrphaCode; las antiguas OrphaNumber
+    orpha_number = _texto(disorder.find('OrphaCode')) or _texto(disorder.find('OrphaNumber'))
+
+    # Solo hijos directos: DisorderType/DisorderGroup también tienen <Name>
+    nombre_oficial = _texto(disorder.find('Name'))
+
+    sinonimos = []
+    for syn in disorder.iterfind('SynonymList/Synonym'):
+        texto = _texto(syn)
+        if texto:
+            sinonimos.append(texto)
+
+    codigos_cie10 = []
+    for ref in disorder.iterfind('ExternalReferenceList/ExternalReference'):
+        if _texto(ref.find('Source')) == 'ICD-10':
+            referencia = _texto(ref.find('Reference'))
+            if referencia:
+                codigos_cie10.append(referencia)
+
+    return {
+        'orpha_number': orpha_number,
+        'nombre_oficial': nombre_oficial,
+        'sinonimos': sinonimos,
+        'codigos_cie10_orphanet': codigos_cie10
+    }
+
+
+def iterar_disorders(fuente):
+    """
+    Genera registros planos para cada JDBOR/DisorderList/Disorder.
+
+    `fuente` puede ser una ruta o un objeto tipo archivo en modo binario.
+    Cada Disorder se elimina de su padre después de convertirlo, de modo
+    que nunca hay más de un Disorder completo en memoria.
+    """
+    ruta_disorder = list(RUTA_DISORDER)
+    ruta_lista = ruta_disorder[:2]
+    ruta = []
+    padre_disorders = None
+
+    for evento, elem in ET.iterparse(fuente, events=('start', 'end')):
+        if evento == 'start':
+            # Solo se siguen los tres primeros niveles de la ruta
+            if len(ruta) < 3:
+                ruta.append(elem.tag)
+                if ruta == ruta_lista:
+                    padre_disorders = elem
+            else:
+                ruta.append(None)
+            continue
+
+        if len(ruta) == 3 and ruta == ruta_disorder:
+            yield _registro_desde_disorder(elem)
+            padre_disorders.remove(elem)
+        ruta.pop()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+PARSER DOM DE PÁGINAS DE DETALLE DE ORPHANET
+Nombre y códigos CIE-10 tomados de la estructura de la página, no de todo el HTML
+
+Los patrones de extraccion_orphanet aceptan cualquier token con forma de código
+([A-Z]\\d{2}) en cualquier parte de la página: colores y selectores CSS, scripts,
+atributos, enlaces a otras enfermedades... y es_codigo_cie10_valido() solo
+descarta unos pocos a mano. Aquí la página se parsea con un parser HTML en C y:
+
+- se eliminan <script>, <style>, comentarios y demás contenido no visible
+- el nombre es el texto del primer <h1> (si no <h2>, si no el <title>)
+- los códigos salen solo del bloque de referencias cruzadas: el texto que
+  sigue a la etiqueta 'ICD-10'/'CIE-10'/'CIM-10' ('<strong>ICD-10:</strong> Q87.4',
+  'ICD-10 code: Q87.4', '<dt>CIE-10</dt><dd>Q87.4</dd><dd>E75.2</dd>',
+  '<h3>ICD-10</h3><p>Q87.4 - Marfan</p>', celdas de tabla...), hasta el
+  primer texto que ya no empieza por un código (la siguiente etiqueta)
+- si la página menciona ICD-10 pero el bloque no tiene una de esas formas, se
+  usan los patrones de extraccion_orphanet y se cuenta en metricas.py
+  (parser_respaldo_regex), para no memorizar como exitosa una página sin códigos
+
+Motores, en orden de preferencia (dependencias opcionales):
+    selectolax  pip install selectolax
+    lxml        pip install lxml
+    regex       extraccion_orphanet, si no hay ninguno instalado o el HTML no se
+                puede parsear
+"""
+
+import re
+import sys
+import argparse
+
+import extraccion_orphanet
+from metricas import obtener_metricas
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+if LexborHTMLParser is not None:
+    MOTOR_HTML = 'selectolax'
+elif lxml is not None:
+    MOTOR_HTML = 'lxml'
+else:
+    MOTOR_HTML = 'regex'
+
+ETIQUETAS_NO_VISIBLES = ['script', 'style', 'noscript', 'template', 'svg']
+SEPARADOR = '\x00'
+
+CODIGO = r'[A-Z]\d{2}(?:\.\d+)?'
+# Etiqueta en cualquier parte de un segmento de texto ('ICD-10', 'CIM-10 / ICD-10',
+# 'ICD-10 code:'); lo que sigue en el segmento es el primer valor
+PATRON_ETIQUETA_CIE10 = re.compile(r'(?<![\w.])(?:ICD|CIE|CIM)-?10\b(?:\s*(?:codes?|c[oó]digos?))?\s*:?',
+                                   re.IGNORECASE)
+# Segmento que empieza por uno o más códigos, solos o seguidos del nombre ('Q87.4 - Marfan');
+# el grupo 1 son los códigos, sin el nombre
+PATRON_LISTA_CODIGOS = re.compile(rf'^[\s,;/:]*({CODIGO}(?:[\s,;/]+{CODIGO})*)(?:[\s,;/.]*$|\s*[-–:(]|\s+[^\W\d_])',
+                                  re.IGNORECASE)
+PATRON_CODIGO_VALOR = re.compile(CODIGO, re.IGNORECASE)
+PATRON_SEPARADORES = re.compile(r'^[\s,;/:\-]*$')
+PATRON_SUFIJO_TITULO = re.compile(r'\s*-\s*Orphanet\s*$', re.IGNORECASE)
+PATRON_ESPACIOS = re.compile(r'\s+')
+
+
+def _limpiar(texto):
+    return PATRON_ESPACIOS.sub(' ', texto).strip()
+
+
+def codigos_de_texto(texto):
+    """
+    Códigos CIE-10 del texto visible de la página (textos de cada nodo unidos
+    con SEPARADOR, en orden del documento): los segmentos que siguen a cada
+    etiqueta ICD-10/CIE-10 mientras sean listas de códigos.
+    """
+    codigos = []
+    for etiqueta in PATRON_ETIQUETA_CIE10.finditer(texto):
+        inicio = etiqueta.end()
+        while True:
+            fin = texto.find(SEPARADOR, inicio)
+            segmento = texto[inicio:fin] if fin >= 0 else texto[inicio:]
+            if not PATRON_SEPARADORES.match(segmento):
+                lista = PATRON_LISTA_CODIGOS.match(segmento)
+                if not lista:
+                    break
+                for codigo in PATRON_CODIGO_VALOR.findall(lista.group(1)):
+                    codigo = codigo.upper()
+                    if codigo not in codigos:
+                        codigos.append(codigo)
+            if fin < 0:
+                break
+            inicio = fin + 1
+    return codigos
+
+
+def _nombre_de_titulo(titulo):
+    return _limpiar(PATRON_SUFIJO_TITULO.sub('', titulo)) or None
+
+
+def _detalle_selectolax(html):
+    arbol = LexborHTMLParser(html)
+    arbol.strip_tags(ETIQUETAS_NO_VISIBLES)
+
+    nombre = None
+    for selector in ('h1', 'h2'):
+        for nodo in arbol.css(selector):
+            nombre = _limpiar(nodo.text(deep=True, separator=' '))
+            if nombre:
+                break
+        if nombre:
+            break
+    if not nombre:
+        titulo = arbol.css_first('title')
+        nombre = _nombre_de_titulo(titulo.text()) if titulo is not None else None
+
+    raiz = arbol.body or arbol.root
+    texto = raiz.text(deep=True, separator=SEPARADOR) if raiz is not None else ''
+    return nombre, codigos_de_texto(texto)
+
+
+def _detalle_lxml(html):
+    raiz = lxml.html.fromstring(html)
+    etree.strip_elements(raiz, *ETIQUETAS_NO_VISIBLES, etree.Comment, etree.ProcessingInstruction,
+                         with_tail=False)
+
+    nombre = None
+    for etiqueta in ('h1', 'h2'):
+        for nodo in raiz.iter(etiqueta):
+            nombre = _limpiar(' '.join(nodo.itertext()))
+            if nombre:
+                break
+        if nombre:
+            break
+    if not nombre:
+        titulo = raiz.find('.//title')
+        nombre = _nombre_de_titulo(titulo.text_content()) if titulo is not None else None
+
+    cuerpo = raiz.find('.//body')
+    return nombre, codigos_de_texto(SEPARADOR.join((cuerpo if cuerpo is not None else raiz).itertext()))
+
+
+def extraer_detalle_dom(html, motor=None):
+    """Nombre (o None) y códigos CIE-10 del bloque de referencias cruzadas, con el motor indicado"""
+    motor = motor or MOTOR_HTML
+    if motor == 'selectolax':
+        return _detalle_selectolax(html)
+    if motor == 'lxml':
+        return _detalle_lxml(html)
+    return extraccion_orphanet.extraer_detalle(html)
+
+
+def extraer_detalle(html):
+    """
+    Nombre (o None) y códigos CIE-10 de una página de detalle. Usa el parser DOM
+    disponible y, si no hay ninguno, la página no se puede parsear o menciona
+    ICD-10 sin un bloque de códigos reconocible, los patrones de extraccion_orphanet.
+    """
+    if MOTOR_HTML == 'regex':
+        return extraccion_orphanet.extraer_detalle(html)
+    try:
+        nombre, codigos = extraer_detalle_dom(html)
+    except Exception:
+        obtener_metricas().contador('parser_respaldo_regex', motivo='error_dom')
+        return extraccion_orphanet.extraer_detalle(html)
+    if codigos or not PATRON_ETIQUETA_CIE10.search(html):
+        return nombre, codigos
+
+    nombre_regex, codigos = extraccion_orphanet.extraer_detalle(html)
+    obtener_metricas().contador('parser_respaldo_regex', motivo='sin_bloque_cie10')
+    return nombre or nombre_regex, codigos
+
+
+def extraer_codigos_cie10(html):
+    """Lista de códigos CIE-10 del bloque ICD-10/CIE-10 de una página"""
+    return extraer_detalle(html)[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrae nombre y códigos CIE-10 de páginas de detalle de Orphanet")
+    parser.add_argument("archivos", nargs='+', help="Páginas HTML guardadas")
+    parser.add_argument("--motor", choices=['selectolax', 'lxml', 'regex'], default=MOTOR_HTML,
+                        help=f"Parser a usar (default: {MOTOR_HTML})")
+
+    args = parser.parse_args()
+
+    if args.motor == 'selectolax' and LexborHTMLParser is None or args.motor == 'lxml' and lxml is None:
+        print(f"❌ {args.motor} no está instalado (pip install {args.motor})")
+        sys.exit(1)
+
+    print(f"🧩 Parser HTML: {args.motor}")
+    for archivo in args.archivos:
+        with open(archivo, 'r', encoding='utf-8', errors='replace') as f:
+            nombre, codigos = extraer_detalle_dom(f.read(), args.motor)
+        print(f"📄 {archivo}: {nombre or 'No encontrado'} | CIE-10: {', '.join(codigos) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+PLANIFICADOR DE BÚSQUEDAS POR LOTE
+Agrupa los términos de búsqueda de muchas enfermedades y pide cada uno una sola vez
+
+Cada enfermedad se describe con un plan: un generador que hace `yield termino`
+para pedir una búsqueda, recibe el resultado y decide si pide otro término
+(nombre completo -> nombre simplificado -> fragmentos) o termina con `return
+resultado`. El planificador avanza todos los planes del lote en rondas:
+
+1. junta el siguiente término de cada plan activo
+2. normaliza y deduplica (los fragmentos como "deficiencia" o "síndrome" se
+   repiten en cientos de enfermedades)
+3. busca solo los términos nuevos, en paralelo con MotorDescargas
+4. reparte cada resultado a todos los planes que lo pidieron
+
+Como cada plan ve exactamente los mismos resultados y en el mismo orden que
+si buscara por su cuenta, el resultado final no cambia; solo el número de
+peticiones. Los resultados quedan en memoria para los lotes siguientes, salvo
+los que memorizable(resultado) rechace (p. ej. un fallo de red o un HTTP 503):
+esos solo se reparten en su ronda y el término se vuelve a buscar la próxima
+vez que un plan lo pida.
+"""
+
+import threading
+
+
+def clave_termino(termino):
+    """Clave de deduplicación: espacios colapsados y sin distinguir mayúsculas"""
+    return ' '.join(str(termino).split()).casefold()
+
+
+def ejecutar_plan(plan, buscar):
+    """Ejecuta un plan de forma secuencial, llamando buscar(termino) en cada paso"""
+    try:
+        termino = next(plan)
+        while True:
+            termino = plan.send(buscar(termino))
+    except StopIteration as fin:
+        return fin.value
+
+
+class PlanificadorBusquedas:
+    """Ejecuta planes de búsqueda en rondas, con un resultado por término único"""
+
+    def __init__(self, buscar, motor, normalizar=clave_termino, memorizable=None):
+        self.buscar = buscar
+        self.motor = motor
+        self.normalizar = normalizar
+        self.memorizable = memorizable
+        self.resultados = {}          # clave normalizada -> resultado de buscar() memorizable
+        self.terminos_pedidos = 0     # Términos solicitados por los planes
+        self.terminos_buscados = 0    # Términos únicos que realmente se buscaron
+        self._lock = threading.Lock()
+
+    def _avanzar(self, plan, resultado=None, primero=False):
+        """Devuelve (termino, None) si el plan pide otro término o (None, final) si terminó"""
+        try:
+            return (next(plan) if primero else plan.send(resultado)), None
+        except StopIteration as fin:
+            return None, fin.value
+
+    def ejecutar(self, planes, al_terminar=None):
+        """
+        Ejecuta todos los planes y devuelve sus resultados en el mismo orden.
+        `al_terminar(posicion, resultado)` se invoca cuando un plan termina.
+        """
+        planes = list(planes)
+        finales = [None] * len(planes)
+        pendientes = {}  # posicion -> término que espera
+
+        def registrar(posicion, termino, final):
+            if termino is None:
+                finales[posicion] = final
+                if al_terminar:
+                    al_terminar(posicion, final)
+            else:
+                pendientes[posicion] = termino
+
+        for posicion, plan in enumerate(planes):
+            registrar(posicion, *self._avanzar(plan, primero=True))
+
+        while pendientes:
+            # Términos de esta ronda que aún no tienen resultado (uno por clave)
+            nuevos = {}
+            for termino in pendientes.values():
+                clave = self.normalizar(termino)
+                if clave not in self.resultados and clave not in nuevos:
+                    nuevos[clave] = termino
+            self.terminos_pedidos += len(pendientes)
+            self.terminos_buscados += len(nuevos)
+
+            obtenidos = {}  # Resultados de esta ronda, memorizables o no
+
+            def guardar(i, resultado, claves=list(nuevos)):
+                with self._lock:
+                    obtenidos[claves[i]] = resultado
+                    if self.memorizable is None or self.memorizable(resultado):
+                        self.resultados[claves[i]] = resultado
+
+            if nuevos:
+                self.motor.mapear(self.buscar, [(termino,) for termino in nuevos.values()], al_terminar=guardar)
+
+            ronda, pendientes = pendientes, {}
+            for posicion, termino in ronda.items():
+                clave = self.normalizar(termino)
+                resultado = obtenidos[clave] if clave in obtenidos else self.resultados[clave]
+                registrar(posicion, *self._avanzar(planes[posicion], resultado))
+
+        return finales
+
+    def estadisticas(self):
+        ahorradas = self.terminos_pedidos - self.terminos_buscados
+        return {
+            'terminos_pedidos': self.terminos_pedidos,
+            'terminos_buscados': self.terminos_buscados,
+            'busquedas_ahorradas': ahorradas,
+            'porcentaje_ahorro': (ahorradas / self.terminos_pedidos * 100) if self.terminos_pedidos else 0.0
+        }
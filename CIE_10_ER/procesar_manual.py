@@ -6,6 +6,7 @@ Corrige códigos que empiezan con 0 por Q y genera CSV según especificaciones d
 
 import re
 import csv
+import argparse
 import pandas as pd
 from typing import List, Dict, Tuple, Optional
 
@@ -198,8 +199,14 @@ def generar_reporte_correcciones(enfermedades: List[Dict]) -> Dict:
 
 def main():
     """Función principal"""
-    archivo_txt = "enfermedades_raras_huerfanas_listado_2023_colombia.txt"
-    archivo_csv = "enfermedades_raras_colombia_2023_corregido.csv"
+    parser = argparse.ArgumentParser(description="Corrige y convierte a CSV el listado de enfermedades raras (número nombre código)")
+    parser.add_argument("archivo_txt", nargs='?', default="enfermedades_raras_huerfanas_listado_2023_colombia.txt",
+                        help="Listado manual o el generado por extraer_tabla_anexo.py")
+    parser.add_argument("--salida", default="enfermedades_raras_colombia_2023_corregido.csv", help="CSV de salida")
+    args = parser.parse_args()
+    
+    archivo_txt = args.archivo_txt
+    archivo_csv = args.salida
     
     print("=== PROCESADOR DE ENFERMEDADES RARAS COLOMBIA 2023 ===")
     print("Corrigiendo códigos que empiezan con 0 -> Q")
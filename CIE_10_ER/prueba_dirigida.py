@@ -6,11 +6,13 @@ Testa el sistema con enfermedades que sabemos que deben estar en Orphanet
 """
 
 import pandas as pd
-import requests
-import time
 from urllib.parse import quote
 import re
 
+from cache_http import obtener_cache_http
+from cliente_http import URL_ORPHANET
+from extraccion_orphanet import primer_enlace_detalle
+
 def buscar_en_orphanet_simple(nombre_enfermedad):
     """Búsqueda simplificada en Orphanet"""
     try:
@@ -19,30 +21,23 @@ def buscar_en_orphanet_simple(nombre_enfermedad):
         
         # URL de búsqueda en español
         termino_encoded = quote(termino)
-        url_busqueda = f"https://www.orpha.net/es/disease/search?query={termino_encoded}"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'es,en;q=0.5',
-        }
+        url_busqueda = f"{URL_ORPHANET}/es/disease/search?query={termino_encoded}"
         
-        response = requests.get(url_busqueda, headers=headers, timeout=10, verify=False)
+        response = obtener_cache_http().get(url_busqueda, timeout=10, verify=False)
         
         if response.status_code == 200:
             contenido = response.text
             
-            # Buscar enlaces a páginas de detalle
-            patron_enlaces = r'href="[^"]*disease/detail/(\d+)[^"]*"[^>]*>([^<]+)</a>'
-            matches = re.findall(patron_enlaces, contenido, re.IGNORECASE)
+            # Primer enlace a una página de detalle
+            enlace = primer_enlace_detalle(contenido)
             
-            if matches:
-                orpha_num, nombre_encontrado = matches[0]
+            if enlace:
+                orpha_num, nombre_encontrado = enlace
                 return {
                     'encontrado': True,
                     'orpha': orpha_num,
                     'nombre_orphanet': nombre_encontrado.strip(),
-                    'url': f"https://www.orpha.net/es/disease/detail/{orpha_num}",
+                    'url': f"{URL_ORPHANET}/es/disease/detail/{orpha_num}",
                     'url_busqueda': url_busqueda
                 }
         
@@ -120,8 +115,6 @@ def main():
             'url_busqueda': resultado.get('url_busqueda', ''),
             'error': resultado.get('error', '')
         })
-        
-        time.sleep(1.5)  # Delay entre búsquedas
     
     print(f"\n" + "=" * 80)
     print(f"📊 RESULTADOS DE PRUEBA DIRIGIDA:")
@@ -9,11 +9,13 @@ Estrategia simplificada:
 3. Implementar búsqueda inversa por código CIE-10
 """
 
-import requests
 import re
 from urllib.parse import quote
 import time
 
+import cliente_http
+from memo_detalles import obtener_memo_detalles
+
 def probar_url_directa():
     """Prueba la URL específica que encontraste"""
     print("=" * 80)
@@ -25,7 +27,7 @@ def probar_url_directa():
         "nombre": "Acondrogénesis",
         "codigo_colombia": "Q770",
         "orpha_number": "932",
-        "url_conocida": "https://www.orpha.net/es/disease/detail/932?name=Acondrog%C3%A9nesis&mode=name"
+        "url_conocida": f"{cliente_http.URL_ORPHANET}/es/disease/detail/932?name=Acondrog%C3%A9nesis&mode=name"
     }
     
     print(f"📋 CASO DE PRUEBA: {caso_conocido['nombre']}")
@@ -53,14 +55,14 @@ def probar_url_directa():
     
     print(f"\n{'='*80}")
     print("✅ PRUEBAS COMPLETADAS")
+    print(obtener_memo_detalles('prueba_directo').resumen())
     print("Si alguna funciona, podemos aplicarla al resto del dataset")
     print("=" * 80)
 
 def acceder_url_directa(url):
     """Accede directamente a una URL conocida"""
     try:
-        headers = {"User-Agent": "OrphanetTest/1.0 (Research)"}
-        response = requests.get(url, headers=headers, timeout=10, verify=False)
+        response = cliente_http.get(url, timeout=10, verify=False)
         
         if response.status_code == 200:
             # Extraer información de la página
@@ -83,7 +85,7 @@ def buscar_por_nombre_español(nombre):
     """Busca usando el sistema de búsqueda en español"""
     try:
         # URL base de búsqueda
-        base_url = "https://www.orpha.net/es/disease/search"
+        base_url = f"{cliente_http.URL_ORPHANET}/es/disease/search"
         
         # Parámetros de búsqueda
         params = {
@@ -91,8 +93,7 @@ def buscar_por_nombre_español(nombre):
             "lang": "es"
         }
         
-        headers = {"User-Agent": "OrphanetSearch/1.0"}
-        response = requests.get(base_url, params=params, headers=headers, timeout=10, verify=False)
+        response = cliente_http.get(base_url, params=params, timeout=10, verify=False)
         
         if response.status_code == 200:
             return parsear_resultados_busqueda(response.text, nombre)
@@ -111,13 +112,18 @@ def buscar_por_nombre_español(nombre):
         }
 
 def verificar_orpha_directo(orpha_number):
-    """Verifica acceso directo a página de ORPHA"""
+    """Verifica acceso directo a página de ORPHA (memorizado por número ORPHA)"""
+    return obtener_memo_detalles('prueba_directo').obtener(
+        orpha_number, lambda: descargar_detalle_orpha(orpha_number),
+        memorizable=lambda resultado: resultado.get('exito'))
+
+def descargar_detalle_orpha(orpha_number):
+    """Descarga y parsea la página de detalle de un número ORPHA"""
     try:
         # URL directa al detalle
-        url_detalle = f"https://www.orpha.net/es/disease/detail/{orpha_number}"
+        url_detalle = f"{cliente_http.URL_ORPHANET}/es/disease/detail/{orpha_number}"
         
-        headers = {"User-Agent": "OrphanetDirect/1.0"}
-        response = requests.get(url_detalle, headers=headers, timeout=10, verify=False)
+        response = cliente_http.get(url_detalle, timeout=10, verify=False)
         
         if response.status_code == 200:
             resultado = parsear_pagina_detalle(response.text, url_detalle)
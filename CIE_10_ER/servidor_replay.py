@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+SERVIDOR LOCAL EN LUGAR DE ORPHA.NET
+Reproduce respuestas grabadas (o un sitio sintético) para pruebas y benchmarks sin red
+
+Fuentes de respuestas:
+    (por defecto)     las páginas guardadas en la caché HTTP (.cache_orphanet)
+    --corpus DIR      un corpus exportado con --exportar (indice.json + archivos)
+    --sintetico CSV   sitio generado a partir del listado de Colombia: cada
+                      enfermedad tiene su página de detalle (nombre, ORPHA y su
+                      CIE-10) y la búsqueda devuelve las que contienen todas las
+                      palabras de la consulta
+
+Inyección de fallos, reproducible con --semilla (la decisión depende de la URL
+y de cuántas veces se ha pedido, no del orden de llegada):
+    --latencia MS / --jitter MS    demora de cada respuesta
+    --tasa-error P                 fracción de respuestas 503
+    --tasa-429 P                   fracción de respuestas 429 con Retry-After
+
+Los scrapers apuntan aquí con la variable de entorno ORPHANET_BASE_URL:
+    python servidor_replay.py --sintetico enfermedades_raras_colombia_2023_corregido.csv
+    ORPHANET_BASE_URL=http://127.0.0.1:8765 python homologacion_masiva_lotes.py --lote 20
+
+Con otra URL base los scripts no tocan los datos de orpha.net: el memo de
+detalles usa un espacio con el host ('masiva_…@127.0.0.1:8765') y
+homologacion_masiva_lotes.py escribe diario, almacén y lotes en
+resultados_homologacion_127.0.0.1_8765/ (o la carpeta de --carpeta). Los
+ORPHA sintéticos (100000 + número Colombia) no son números reales.
+
+GET /__estadisticas devuelve los contadores del servidor en JSON.
+"""
+
+import os
+import re
+import sys
+import json
+import html
+import time
+import zlib
+import random
+import sqlite3
+import argparse
+import threading
+import unicodedata
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl, quote
+
+import pandas as pd
+
+from cache_http import RUTA_CACHE_HTTP, normalizar_url
+
+PUERTO = 8765
+HOST_GRABADO = 'www.orpha.net'     # Host de las respuestas que se toman de la caché HTTP
+RUTA_ESTADISTICAS = '/__estadisticas'
+RETRY_AFTER = 2                    # Segundos anunciados en las respuestas 429
+RESULTADOS_BUSQUEDA = 10           # Enlaces por página de búsqueda del sitio sintético
+ORPHA_BASE_SINTETICO = 100000      # ORPHA sintético = base + número Colombia
+
+
+def clave_replay(ruta):
+    """Ruta y consulta normalizadas (mismo criterio que la caché HTTP), sin esquema ni host"""
+    partes = urlsplit(normalizar_url(f"http://replay{ruta}"))
+    return partes.path + (f"?{partes.query}" if partes.query else '')
+
+
+class CorpusGrabado:
+    """Respuestas grabadas: clave de replay -> (estado, content-type, cuerpo)"""
+
+    def __init__(self, respuestas):
+        self.respuestas = respuestas
+
+    @classmethod
+    def desde_cache(cls, ruta=RUTA_CACHE_HTTP, host=HOST_GRABADO):
+        respuestas = {}
+        if os.path.exists(ruta):
+            conexion = sqlite3.connect(ruta)
+            for clave, estado, cabeceras, cuerpo in conexion.execute(
+                    'SELECT clave, estado, cabeceras, cuerpo FROM respuestas'):
+                partes = urlsplit(clave)
+                if partes.netloc != host:
+                    continue
+                tipo = json.loads(cabeceras).get('Content-Type', 'text/html; charset=utf-8')
+                ruta_replay = partes.path + (f"?{partes.query}" if partes.query else '')
+                respuestas[ruta_replay] = (estado, tipo, zlib.decompress(cuerpo))
+            conexion.close()
+        return cls(respuestas)
+
+    @classmethod
+    def desde_directorio(cls, directorio):
+        with open(os.path.join(directorio, 'indice.json'), 'r', encoding='utf-8') as f:
+            indice = json.load(f)
+        respuestas = {}
+        for clave, entrada in indice.items():
+            with open(os.path.join(directorio, entrada['archivo']), 'rb') as f:
+                respuestas[clave] = (entrada['estado'], entrada['content_type'], f.read())
+        return cls(respuestas)
+
+    def exportar(self, directorio):
+        """Escribe el corpus como indice.json + un archivo por respuesta"""
+        os.makedirs(os.path.join(directorio, 'respuestas'), exist_ok=True)
+        indice = {}
+        for i, (clave, (estado, tipo, cuerpo)) in enumerate(sorted(self.respuestas.items())):
+            archivo = os.path.join('respuestas', f"{i:06d}.html")
+            with open(os.path.join(directorio, archivo), 'wb') as f:
+                f.write(cuerpo)
+            indice[clave] = {'archivo': archivo, 'estado': estado, 'content_type': tipo}
+        with open(os.path.join(directorio, 'indice.json'), 'w', encoding='utf-8') as f:
+            json.dump(indice, f, ensure_ascii=False, indent=1)
+
+    def responder(self, clave):
+        return self.respuestas.get(clave)
+
+    def descripcion(self):
+        return f"{len(self.respuestas)} respuestas grabadas"
+
+
+def _palabras(texto):
+    texto = unicodedata.normalize('NFKD', str(texto).casefold())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.findall(r'\w+', texto)
+
+
+class SitioSintetico:
+    """Sitio de Orphanet generado a partir del listado de Colombia (búsquedas y detalles)"""
+
+    PATRON_DETALLE = re.compile(r'^/\w+/disease/detail/(\d+)')
+
+    def __init__(self, archivo_csv):
+        df = pd.read_csv(archivo_csv, encoding='utf-8')
+        self.enfermedades = {}      # orpha -> (nombre, cie10)
+        self.indice = {}            # palabra -> orphas que la contienen
+        for _, fila in df.iterrows():
+            orpha = ORPHA_BASE_SINTETICO + int(fila['Número'])
+            if orpha in self.enfermedades:
+                continue
+            codigo = str(fila['Código_CIE10'])
+            codigo = f"{codigo[:3]}.{codigo[3:]}" if len(codigo) > 3 else codigo
+            self.enfermedades[orpha] = (str(fila['Nombre_Enfermedad']), codigo)
+            for palabra in set(_palabras(fila['Nombre_Enfermedad'])):
+                self.indice.setdefault(palabra, set()).add(orpha)
+
+    def buscar(self, consulta):
+        palabras = _palabras(consulta)
+        if not palabras:
+            return []
+        conjuntos = [self.indice.get(palabra, set()) for palabra in palabras]
+        return sorted(set.intersection(*conjuntos))[:RESULTADOS_BUSQUEDA]
+
+    def _pagina(self, titulo, cuerpo):
+        return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{titulo} - Orphanet</title>'
+                f'<style>.btn-primary{{color:#a00;background:#E10}}</style>'
+                f'<script>var config={{"v":"Q99.1"}};</script></head><body>'
+                f'<nav><a href="/es/">Orphanet</a></nav><main>{cuerpo}</main></body></html>').encode('utf-8')
+
+    def _busqueda(self, consulta):
+        enlaces = ''.join(
+            f'<li><a href="/es/disease/detail/{orpha}?name={quote(nombre)}&mode=name">{html.escape(nombre)}</a> '
+            f'<b>{html.escape(nombre)}</b> ORPHA:{orpha}</li>'
+            for orpha, (nombre, _) in ((orpha, self.enfermedades[orpha]) for orpha in self.buscar(consulta)))
+        cuerpo = f'<h2>Resultados para "{html.escape(consulta)}"</h2><ul>{enlaces or "<li>Sin resultados</li>"}</ul>'
+        return self._pagina('Búsqueda', cuerpo)
+
+    def _detalle(self, orpha):
+        nombre, codigo = self.enfermedades[orpha]
+        nombre = html.escape(nombre)
+        cuerpo = (f'<h1>{nombre}</h1><p>Enfermedad rara ({nombre}).</p>'
+                  f'<ul><li><strong>ORPHA:</strong>{orpha}</li><li><strong>ICD-10:</strong> {codigo}</li>'
+                  f'<li><strong>OMIM:</strong> {orpha * 3 % 999999}</li></ul>')
+        return self._pagina(nombre, cuerpo)
+
+    def responder(self, clave):
+        partes = urlsplit(clave)
+        consulta = dict(parse_qsl(partes.query))
+        tipo = 'text/html; charset=utf-8'
+        detalle = self.PATRON_DETALLE.match(partes.path)
+        if detalle:
+            orpha = int(detalle.group(1))
+            return (200, tipo, self._detalle(orpha)) if orpha in self.enfermedades else None
+        if partes.path.endswith('/disease/search') or partes.path.endswith('Disease_Search.php'):
+            termino = consulta.get('query') or consulta.get('search_value') or consulta.get('diseaseGroup', '')
+            return 200, tipo, self._busqueda(termino)
+        return None
+
+    def descripcion(self):
+        return f"sitio sintético con {len(self.enfermedades)} enfermedades"
+
+
+class ServidorReplay(ThreadingHTTPServer):
+    """Servidor HTTP que responde desde un corpus e inyecta latencia, errores y 429"""
+
+    daemon_threads = True
+
+    def __init__(self, corpus, host='127.0.0.1', puerto=PUERTO, latencia=0.0, jitter=0.0,
+                 tasa_error=0.0, tasa_429=0.0, retry_after=RETRY_AFTER, semilla=0):
+        super().__init__((host, puerto), ManejadorReplay)
+        self.corpus = corpus
+        self.latencia = latencia        # Segundos
+        self.jitter = jitter            # Segundos
+        self.tasa_error = tasa_error
+        self.tasa_429 = tasa_429
+        self.retry_after = retry_after
+        self.semilla = semilla
+        self.estadisticas = {'peticiones': 0, 'servidas': 0, 'sin_respuesta': 0,
+                             'errores_inyectados': 0, 'limitadas_429': 0, 'bytes': 0}
+        self._intentos = {}             # clave -> veces pedida
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, puerto = self.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def decidir(self, clave):
+        """(demora, fallo) de esta petición; fallo es None, 503 o 429"""
+        with self._lock:
+            intento = self._intentos.get(clave, 0)
+            self._intentos[clave] = intento + 1
+            self.estadisticas['peticiones'] += 1
+        azar = random.Random(f"{self.semilla}:{clave}:{intento}")
+        demora = self.latencia + self.jitter * azar.random()
+        sorteo = azar.random()
+        if sorteo < self.tasa_429:
+            return demora, 429
+        if sorteo < self.tasa_429 + self.tasa_error:
+            return demora, 503
+        return demora, None
+
+    def contar(self, campo, cantidad=1):
+        with self._lock:
+            self.estadisticas[campo] += cantidad
+
+
+class ManejadorReplay(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # Keep-alive, como el pool de cliente_http
+
+    def _enviar(self, estado, tipo, cuerpo, cabeceras=None, con_cuerpo=True):
+        self.send_response(estado)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(cuerpo)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        if con_cuerpo:
+            self.wfile.write(cuerpo)
+
+    def _responder(self, con_cuerpo=True):
+        servidor = self.server
+        if self.path == RUTA_ESTADISTICAS:
+            with servidor._lock:
+                cuerpo = json.dumps(servidor.estadisticas).encode('utf-8')
+            self._enviar(200, 'application/json', cuerpo, con_cuerpo=con_cuerpo)
+            return
+
+        clave = clave_replay(self.path)
+        demora, fallo = servidor.decidir(clave)
+        if demora > 0:
+            time.sleep(demora)
+
+        if fallo == 429:
+            servidor.contar('limitadas_429')
+            self._enviar(429, 'text/plain', b'Too Many Requests', {'Retry-After': str(servidor.retry_after)},
+                         con_cuerpo=con_cuerpo)
+            return
+        if fallo == 503:
+            servidor.contar('errores_inyectados')
+            self._enviar(503, 'text/plain', b'Service Unavailable', con_cuerpo=con_cuerpo)
+            return
+
+        respuesta = servidor.corpus.responder(clave)
+        if respuesta is None:
+            servidor.contar('sin_respuesta')
+            self._enviar(404, 'text/plain', b'Not Found', con_cuerpo=con_cuerpo)
+            return
+        estado, tipo, cuerpo = respuesta
+        servidor.contar('servidas')
+        servidor.contar('bytes', len(cuerpo))
+        self._enviar(estado, tipo, cuerpo, con_cuerpo=con_cuerpo)
+
+    def do_GET(self):
+        self._responder()
+
+    def do_HEAD(self):
+        self._responder(con_cuerpo=False)
+
+    def log_message(self, formato, *args):
+        pass
+
+
+def iniciar_en_hilo(corpus, **opciones):
+    """Arranca un ServidorReplay en un hilo de fondo (puerto=0 elige uno libre) y lo devuelve"""
+    opciones.setdefault('puerto', 0)
+    servidor = ServidorReplay(corpus, **opciones)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que reproduce respuestas de orpha.net")
+    parser.add_argument("--corpus", help="Directorio de un corpus exportado")
+    parser.add_argument("--sintetico", metavar="CSV", help="Generar el sitio a partir del listado de Colombia")
+    parser.add_argument("--cache", default=RUTA_CACHE_HTTP, help=f"Caché HTTP de la que leer (default: {RUTA_CACHE_HTTP})")
+    parser.add_argument("--host-grabado", default=HOST_GRABADO,
+                        help=f"Host de las respuestas de la caché a reproducir (default: {HOST_GRABADO})")
+    parser.add_argument("--exportar", metavar="DIR", help="Exportar las respuestas de la caché HTTP a un corpus y salir")
+    parser.add_argument("--host", default='127.0.0.1', help="Interfaz (default: 127.0.0.1)")
+    parser.add_argument("--puerto", type=int, default=PUERTO, help=f"Puerto (default: {PUERTO})")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Latencia por respuesta en ms (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latencia aleatoria adicional en ms (default: 0)")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Fracción de respuestas 503 (default: 0)")
+    parser.add_argument("--tasa-429", type=float, default=0.0, help="Fracción de respuestas 429 (default: 0)")
+    parser.add_argument("--retry-after", type=int, default=RETRY_AFTER,
+                        help=f"Segundos de Retry-After en las 429 (default: {RETRY_AFTER})")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla de la inyección de fallos (default: 0)")
+
+    args = parser.parse_args()
+
+    try:
+        if args.sintetico:
+            corpus = SitioSintetico(args.sintetico)
+        elif args.corpus:
+            corpus = CorpusGrabado.desde_directorio(args.corpus)
+        else:
+            corpus = CorpusGrabado.desde_cache(args.cache, args.host_grabado)
+    except Exception as e:
+        print(f"❌ Error cargando las respuestas: {e}")
+        sys.exit(1)
+
+    if args.exportar:
+        if not isinstance(corpus, CorpusGrabado):
+            print("❌ Solo se pueden exportar respuestas grabadas")
+            sys.exit(1)
+        corpus.exportar(args.exportar)
+        print(f"💾 Corpus exportado: {corpus.descripcion()} en {args.exportar}")
+        return
+
+    servidor = ServidorReplay(corpus, host=args.host, puerto=args.puerto,
+                              latencia=args.latencia / 1000, jitter=args.jitter / 1000,
+                              tasa_error=args.tasa_error, tasa_429=args.tasa_429,
+                              retry_after=args.retry_after, semilla=args.semilla)
+    print(f"🛰️  Servidor replay en {servidor.url} ({corpus.descripcion()})")
+    print(f"⏱️  Latencia: {args.latencia:.0f} ms + hasta {args.jitter:.0f} ms | "
+          f"errores 503: {args.tasa_error:.1%} | 429: {args.tasa_429:.1%}")
+    print(f"🔗 ORPHANET_BASE_URL={servidor.url}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n📊 {json.dumps(servidor.estadisticas)}")
+
+
+if __name__ == "__main__":
+    main()